@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# benchmark_checksum.py
+# - Times the hot paths of the checksum tool on synthetic STM32 images:
+# -- hex/bin import, crc calculation (word and 8-bit modes, every available crc engine), empty page scan and hex export
+# - Results are printed (and optionally saved) as json, so runs of different versions can be compared
+# - Usage:
+# -- python benchmark_checksum.py [--sizes 16 64] [--densities 0.25 1.0] [--repeat 5] [--output bench_output.json] [--verify-engines 10]
+# - --verify-engines: also cross-check every crc engine against the nibble routine (update_crc32_from_data_at_address) on random images
+
+# Module Imports
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Local Backend Imports
+from hex_files import HexFileInClass, HexFileOutClass
+from memory_map_stm32_64kb import MemoryMap_STM32_64kB
+
+BENCHMARK_FORMAT_VERSION = 1
+
+
+# ======= Synthetic Images =START=
+# create_synthetic_memory_map: fills a fraction ('density') of the pages in the first 'size_kb' of rom with random data
+# - the remaining pages stay erased (0xFF), pages are picked with a fixed seed so runs are repeatable
+def create_synthetic_memory_map(size_kb, density, seed=0):
+    memory_map = MemoryMap_STM32_64kB()
+    random_generator = random.Random(seed)
+    page_count = min(size_kb*1024, memory_map.PROCESSOR_ROM_SIZE) // memory_map.ROM_PAGE_SIZE
+    filled_page_count = max(1, int(round(page_count*density)))
+    for this_page_id in sorted(random_generator.sample(range(page_count), filled_page_count)):
+        page_data = bytes(random_generator.getrandbits(8) for this_byte in range(memory_map.ROM_PAGE_SIZE))
+        memory_map.write_data_to_rom(this_page_id*memory_map.ROM_PAGE_SIZE, page_data)
+    return memory_map, page_count
+
+# write_synthetic_files: saves a synthetic memory map as a hex file and a bin file, returns both paths
+def write_synthetic_files(memory_map, page_count, directory):
+    hex_file_path = os.path.join(directory, "synthetic.hex")
+    bin_file_path = os.path.join(directory, "synthetic.bin")
+    HexFileOutClass().write_data_pages_to_file(hex_file_path, memory_map, 0, page_count-1)
+    with open(bin_file_path, "wb") as file_target:
+        file_target.write(bytes(memory_map.get_memoryview_for_page_range(0, page_count-1)))
+    return hex_file_path, bin_file_path
+# ======= Synthetic Images ==END==
+
+
+# ======= Timing =START=
+# time_function: runs a function 'repeat' times, returns the timing summary
+# - setup_function (optional) runs before every repetition and is not timed
+def time_function(function, repeat, setup_function=None):
+    durations = []
+    for this_repetition in range(repeat):
+        if setup_function:
+            setup_function()
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return {"best_s": min(durations), "mean_s": sum(durations)/len(durations), "repeat": repeat}
+
+# benchmark_image: time every stage for one image size/density
+def benchmark_image(size_kb, density, repeat, directory, include_nibble=False):
+    results = []
+    image_memory_map, page_count = create_synthetic_memory_map(size_kb, density)
+    hex_file_path, bin_file_path = write_synthetic_files(image_memory_map, page_count, directory)
+    image_parameters = {"size_kb": size_kb, "density": density, "pages": page_count}
+
+    def add_result(stage, timing, **extra_fields):
+        result = {"stage": stage}
+        result.update(image_parameters)
+        result.update(extra_fields)
+        result.update(timing)
+        results.append(result)
+
+    # Import
+    memory_map = MemoryMap_STM32_64kB()
+    hex_file_in = HexFileInClass(memory_map_out=memory_map)
+    add_result("parse_hex_file", time_function(lambda: hex_file_in.import_firmware_file(hex_file_path), repeat), file_size=os.path.getsize(hex_file_path))
+    add_result("parse_binary_file", time_function(lambda: hex_file_in.import_firmware_file(bin_file_path), repeat), file_size=os.path.getsize(bin_file_path))
+
+    # CRC (page cache disabled, so every repetition does the full calculation)
+    crc_end_address = page_count*image_memory_map.ROM_PAGE_SIZE - 4
+    for use_8bit_chunks in (False, True):
+        image_memory_map.use_8bit_chunks_on_settings = use_8bit_chunks
+        for this_engine in image_memory_map.CRC_ENGINES:
+            if this_engine == image_memory_map.CRC_ENGINE_NIBBLE and not include_nibble:
+                continue
+            if image_memory_map.set_crc_engine(this_engine) != image_memory_map.SUCCESS_CODE:
+                continue # engine not available (optional dependency missing)
+            image_memory_map.use_crc_page_cache = False # (set_crc_engine selects the default for the engine)
+            timing = time_function(lambda: image_memory_map.get_crc32_for_address_range(0, crc_end_address), repeat)
+            add_result("get_crc32_for_address_range", timing, mode="8bit" if use_8bit_chunks else "word", engine=this_engine,
+                       crc=image_memory_map.get_crc32_for_address_range(0, crc_end_address))
+        # - page cache: re-check after one page was written (the parameter patching use case, with the python table engine)
+        image_memory_map.set_crc_engine(image_memory_map.CRC_ENGINE_TABLE)
+        image_memory_map.use_crc_page_cache = True
+        image_memory_map.get_crc32_for_address_range(0, crc_end_address)
+        timing = time_function(lambda: image_memory_map.get_crc32_for_address_range(0, crc_end_address), repeat,
+                               setup_function=lambda: image_memory_map.write_to_rom(0, image_memory_map.get_u8_value_at_address(0)))
+        add_result("get_crc32_for_address_range_one_page_modified", timing, mode="8bit" if use_8bit_chunks else "word")
+    image_memory_map.use_8bit_chunks_on_settings = False
+
+    # Page Scan
+    add_result("get_empty_pages", time_function(image_memory_map.get_empty_pages, repeat))
+
+    # Export
+    hex_file_out = HexFileOutClass()
+    export_file_path = os.path.join(directory, "export.hex")
+    add_result("write_data_pages_to_file", time_function(lambda: hex_file_out.write_data_pages_to_file(export_file_path, image_memory_map, 0, page_count-1), repeat))
+    return results
+# ======= Timing ==END==
+
+
+# ======= Engine Validation =START=
+# verify_crc_engines: compare every available crc engine with the nibble routine on random images and random address ranges
+# - returns: result dictionary (engines_agree is False if any engine gave a different crc for any range)
+def verify_crc_engines(image_count, ranges_per_image=8, seed=0):
+    random_generator = random.Random(seed)
+    engines_agree = True
+    failed_ranges = []
+    for this_image in range(image_count):
+        memory_map, page_count = create_synthetic_memory_map(64, random_generator.random(), seed=seed + this_image)
+        for use_8bit_chunks in (False, True):
+            memory_map.use_8bit_chunks_on_settings = use_8bit_chunks
+            for this_range in range(ranges_per_image):
+                start_address = random_generator.randrange(0, memory_map.PROCESSOR_ROM_SIZE // 2) & ~0x03
+                end_address = start_address + (random_generator.randrange(0, memory_map.PROCESSOR_ROM_SIZE // 2) & ~0x03)
+                if use_8bit_chunks:
+                    end_address += random_generator.randrange(4)
+                if not memory_map.verify_crc_engines_for_address_range(start_address, end_address):
+                    engines_agree = False
+                    failed_ranges.append({"image": this_image, "mode": "8bit" if use_8bit_chunks else "word", "start": start_address, "end": end_address})
+    return {"stage": "verify_crc_engines", "images": image_count, "ranges": image_count*ranges_per_image*2, "engines_agree": engines_agree, "failed_ranges": failed_ranges}
+# ======= Engine Validation ==END==
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description="benchmark import, crc and export stages on synthetic STM32 images")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64], help="image sizes in kB (max 64)")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.25, 1.0], help="fraction of pages that contain data")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions per stage (best and mean time are reported)")
+    parser.add_argument("--include-nibble", action="store_true", help="also time the (slow) nibble crc engine")
+    parser.add_argument("--output", help="also save the json results to this file")
+    parser.add_argument("--verify-engines", type=int, default=0, metavar="IMAGES", help="cross-check all crc engines on this many random images (exit code 1 on a mismatch)")
+    return parser
+
+# Main Function
+def main(argv=None):
+    arguments = get_argument_parser().parse_args(argv)
+    report = {
+        "format_version": BENCHMARK_FORMAT_VERSION,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": [],
+    }
+    directory = tempfile.mkdtemp(prefix="p21_benchmark_")
+    try:
+        for this_size_kb in arguments.sizes:
+            for this_density in arguments.densities:
+                report["results"] += benchmark_image(this_size_kb, this_density, arguments.repeat, directory, arguments.include_nibble)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    exit_code = 0
+    if arguments.verify_engines:
+        engine_validation = verify_crc_engines(arguments.verify_engines)
+        report["results"].append(engine_validation)
+        if not engine_validation["engines_agree"]:
+            exit_code = 1
+    report_text = json.dumps(report, indent=2)
+    print(report_text)
+    if arguments.output:
+        with open(arguments.output, "w") as file_target:
+            file_target.write(report_text)
+    return exit_code
+
+
+# Code to Run if this File is run as the main application
+if __name__ == '__main__':
+    sys.exit(main())
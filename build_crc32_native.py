@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# build_crc32_native.py
+# - Builds the optional compiled crc backend (crc32_stm32_native.c) next to crc32_stm32_native.py
+# - The tool works without it (the python/zlib engines are used), the library only makes crc calculation faster
+# - Usage:
+# -- python build_crc32_native.py [--compiler cc]
+# -- Windows (Visual Studio developer prompt): python build_crc32_native.py --compiler cl
+# - Exit Codes:
+# -- 0: library built and passed its self-test
+# -- 1: compiler failed, or the library failed its self-test
+
+# Module Imports
+import argparse
+import os
+import subprocess
+import sys
+
+# Local Backend Imports
+from crc32_stm32_native import get_native_library_path, load_native_crc32_engine
+
+NATIVE_SOURCE_FILE_NAME = "crc32_stm32_native.c"
+
+
+# get_compile_command: command line that builds the shared library with the given compiler
+def get_compile_command(compiler, source_path, library_path):
+    if os.path.basename(compiler).lower() in ("cl", "cl.exe"):
+        return [compiler, "/nologo", "/O2", "/LD", source_path, "/Fe" + library_path]
+    return [compiler, "-O3", "-shared", "-fPIC", "-o", library_path, source_path]
+
+# build_native_library: compile, then load the result (which runs the self-test)
+# - returns: exit code
+def build_native_library(compiler):
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), NATIVE_SOURCE_FILE_NAME)
+    library_path = get_native_library_path()
+    compile_command = get_compile_command(compiler, source_path, library_path)
+    print(" ".join(compile_command))
+    try:
+        subprocess.check_call(compile_command)
+    except (OSError, subprocess.CalledProcessError) as error_data:
+        print("could not build native crc library: {0}".format(error_data))
+        return 1
+    if load_native_crc32_engine(library_path) is None:
+        print("native crc library failed its self-test (it will not be used): " + library_path)
+        return 1
+    print("native crc library built and verified: " + library_path)
+    return 0
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description="build the optional compiled STM32 crc library")
+    default_compiler = os.environ.get("CC", "cl" if sys.platform == "win32" else "cc")
+    parser.add_argument("--compiler", default=default_compiler, help="C compiler (default: $CC, or cc/cl)")
+    return parser
+
+# Main Function
+def main(argv=None):
+    arguments = get_argument_parser().parse_args(argv)
+    return build_native_library(arguments.compiler)
+
+
+# Code to Run if this File is run as the main application
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,7 +26,9 @@ if app_config.is_python3:
     print("python3 patch for unicode!")
     unicode = str
 
-from product_properties_p21odp import product_p21odp
+from product_properties_p21odp import product_p21odp, create_product_p21odp
+from firmware_import_worker import start_firmware_import
+from firmware_files import find_firmware_files, get_fixed_output_path, is_firmware_file_path
 from type_conversions import type_converter
 # from hex_files import product_p21odp.hex_file_in
 
@@ -50,6 +52,9 @@ class CentralWidget(QtWidgets.QFrame):
     # init_system: Initialize all variables and structures used by this class
     def init_system(self):
         self.last_selected_directory = "" # for save to file function
+        self.import_worker = None # running firmware import (product_p21odp is only read by the GUI when this is None)
+        self.selected_file_name = "" # last selected firmware file (used by fix checksum)
+        self.SELECT_FILE_BUTTON_TEXT = "select file (hex/hxf/bin)"
         pass
 
     # init_widgets: Initialize all Graphical Objects used by this class
@@ -65,7 +70,7 @@ class CentralWidget(QtWidgets.QFrame):
         # - firmware update buttons
         # -- drive firmware
         # self.select_drive_fw_file_button = QtWidgets.QPushButton("open binary file (hex/hxf/bin)") # TODO: Replace with select_drive_fw_file_button
-        self.select_drive_fw_file_button = QtWidgets.QPushButton("select file (hex/hxf/bin)")
+        self.select_drive_fw_file_button = QtWidgets.QPushButton(self.SELECT_FILE_BUTTON_TEXT)
         self.write_drive_fw_file_button = QtWidgets.QPushButton("write")
         self.verify_drive_fw_file_button = QtWidgets.QPushButton("read")
         self.drive_fw_status_label = QtWidgets.QLabel("-")
@@ -74,6 +79,8 @@ class CentralWidget(QtWidgets.QFrame):
         # - firmware status buttons
         # -- drive firmware (crc info)
         self.drive_mcu_fw_crc_groupbox = DriveFirmwareCrcsWidget()
+        # -- file queue (many files, dropped on to the table)
+        self.firmware_queue_widget = FirmwareQueueWidget()
 
         # -- spacer widgets
         self.spacer = QtWidgets.QLabel() # Used to push all widgets to the top when the window is big
@@ -89,6 +96,7 @@ class CentralWidget(QtWidgets.QFrame):
         self.drive_fw_layout.addWidget(self.select_drive_fw_file_button, 1, 1, 1, 3)
         self.drive_fw_layout.addWidget(self.write_drive_fw_file_button, 1, 4, 1, 1)
         self.drive_fw_layout.addWidget(self.drive_fw_status_label, 1, 5, 1, 1)
+        self.drive_fw_layout.addWidget(self.fix_button, 2, 1, 1, 3)
         if app_config.DISPLAY_READ_BUTTONS:
             self.drive_fw_layout.addWidget(self.verify_drive_fw_file_button, 1, 6, 1, 1)
         self.drive_fw_layout.setContentsMargins(10,20,10,20)
@@ -101,6 +109,7 @@ class CentralWidget(QtWidgets.QFrame):
         # self.layout.addWidget(self.fix_button)
         self.layout.addWidget(self.drive_mcu_fw_groupbox)
         self.layout.addWidget(self.drive_mcu_fw_crc_groupbox)
+        self.layout.addWidget(self.firmware_queue_widget)
         self.setLayout(self.layout)
 
         pass
@@ -118,6 +127,7 @@ class CentralWidget(QtWidgets.QFrame):
 
     def set_serial_monitor_callback(self, callback):
         self.serial_monitor_cb = callback
+        self.firmware_queue_widget.set_serial_monitor_callback(callback)
 
     def display_message(self, message, rx=False, add_timestamp=True):
         if self.serial_monitor_cb:
@@ -127,6 +137,11 @@ class CentralWidget(QtWidgets.QFrame):
     # ======= Callback Implementations =START=
     def select_drive_fw_file_button_cb(self):
         # print("open button: select file")
+        # - while a file is being imported, the button cancels the import
+        if self.import_worker:
+            self.display_message("cancelling import: " + str(self.import_worker.file_path))
+            self.import_worker.cancel()
+            return
         self.file_select_title_text = "Select Firmware File"
         if not self.last_selected_directory:
             self.file_select_default_directory = QtCore.QDir().homePath()
@@ -148,21 +163,63 @@ class CentralWidget(QtWidgets.QFrame):
 
         if self.selected_file_name:
             self.display_message("importing firmware file: " + str(self.selected_file_name))
-            product_p21odp.import_firmware_file(self.selected_file_name)
-            self.select_drive_fw_file_button.setText(base_file_name)
             self.set_last_selected_directory(QtCore.QDir().absoluteFilePath(self.selected_file_name))
-            self.update_crc_data_display()
+            self.select_drive_fw_file_button.setText("cancel import (" + base_file_name + ")")
+            self.import_worker = start_firmware_import(product_p21odp, self.selected_file_name, progress_cb=self.firmware_import_progress_cb, finished_cb=self.firmware_import_finished_cb)
         else:
             self.display_message("could not open file")
 
+    # firmware_import_progress_cb: called on the GUI thread for every stage of a running import
+    def firmware_import_progress_cb(self, file_path, stage):
+        self.drive_fw_status_label.setText(stage)
+
+    # firmware_import_finished_cb: called on the GUI thread when the import worker is done (product_p21odp is free again)
+    def firmware_import_finished_cb(self, file_path, status_code, crc_results):
+        self.import_worker = None
+        if status_code == product_p21odp.hex_file_in.IMPORT_SUCCESS:
+            self.select_drive_fw_file_button.setText(os.path.basename(file_path))
+            self.drive_fw_status_label.setText("-")
+            self.update_crc_data_display()
+        elif status_code == product_p21odp.FIX_ERROR_BOOTLOADER_IN_BIN:
+            self.select_drive_fw_file_button.setText(os.path.basename(file_path))
+            self.drive_fw_status_label.setText("fix failed")
+            self.display_message("bin files don't hold the bootloader pages, save the corrected file as hex: " + str(file_path))
+        elif status_code in (product_p21odp.FIX_ERROR_FILE_WRITE, product_p21odp.FIX_ERROR_DATA_OUTSIDE_ROM):
+            self.select_drive_fw_file_button.setText(os.path.basename(file_path))
+            self.drive_fw_status_label.setText("fix failed")
+            self.display_message("could not write corrected file (data outside of rom, or file not writable): " + str(file_path))
+        elif status_code == product_p21odp.hex_file_in.IMPORT_CANCELLED:
+            self.select_drive_fw_file_button.setText(self.SELECT_FILE_BUTTON_TEXT)
+            self.drive_fw_status_label.setText("cancelled")
+            self.display_message("import cancelled: " + str(file_path))
+        else:
+            self.select_drive_fw_file_button.setText(self.SELECT_FILE_BUTTON_TEXT)
+            self.drive_fw_status_label.setText("import failed")
+            self.display_message("could not import file: " + str(file_path))
+
     def update_crc_data_display(self):
         self.drive_mcu_fw_crc_groupbox.drive_bootlader_read_crc_val_label.setText(product_p21odp.stored_bootloader_crc32_value_str)
         self.drive_mcu_fw_crc_groupbox.drive_bootlader_calc_crc_val_label.setText(product_p21odp.bootloader_crc32_value_str)
         self.drive_mcu_fw_crc_groupbox.drive_firmware_read_crc_val_label.setText(product_p21odp.stored_firmware_crc32_value_str)
         self.drive_mcu_fw_crc_groupbox.drive_firmware_calc_crc_val_label.setText(product_p21odp.firmware_crc32_value_str)
 
+    # fix_button_cb: save a copy of the selected file with the calculated crcs written in to the crc slots (in the background)
     def fix_button_cb(self):
-        print("Fixing Checksum! INERT!!!")
+        if self.import_worker:
+            self.display_message("wait for the running import to finish before fixing the checksum")
+            return
+        if not self.selected_file_name:
+            self.display_message("select a firmware file first")
+            return
+        selected_output_file = QtWidgets.QFileDialog.getSaveFileName(self, "Save Corrected Firmware File", get_fixed_output_path(self.selected_file_name), "Hex files (*.hex *.hxf);;Binary files (*.bin)")
+        if app_config.is_python3: # Python3 Platform: (file name, selected filter)
+            selected_output_file = selected_output_file[0]
+        output_file_name = unicode(selected_output_file)
+        if not output_file_name:
+            return
+        self.display_message("fixing checksum: " + str(self.selected_file_name) + " -> " + output_file_name)
+        self.select_drive_fw_file_button.setText("cancel fix (" + os.path.basename(self.selected_file_name) + ")")
+        self.import_worker = start_firmware_import(product_p21odp, self.selected_file_name, progress_cb=self.firmware_import_progress_cb, finished_cb=self.firmware_import_finished_cb, fix_output_path=output_file_name)
 
 
     # ======= Callback Implementations ==END==
@@ -269,3 +326,197 @@ class DriveFirmwareCrcsWidget(QtWidgets.QFrame):
     # ======= Callback Implementations =START=
     # ======= Callback Implementations ==END==
 
+
+# FirmwareQueueWidget: table of firmware files that are checked in the background (one row per file)
+# - files/ directories can be dropped on the widget, or added with the 'add files' button
+# - every file is imported by its own worker (own product and memory map, see firmware_import_worker.py) on the global thread pool,
+# -- rows are filled in as the workers finish
+# - the workers are threads: hex parsing is python code and holds the GIL, so files queued together are mostly parsed one after
+# -- another (only the zlib/native crc calculation runs in parallel). The queue keeps the GUI responsive, it does not make
+# -- checking many files faster - use 'python -m p21_checksum batch' (process pool) for large numbers of files
+class FirmwareQueueWidget(QtWidgets.QFrame):
+    def __init__(self):    # Standard Python Function, called at the instantiation of a class
+        super(FirmwareQueueWidget, self).__init__()      # Calls the basic Widget Init Sequence
+        # Initialize Variables
+        self.init_system()
+        # Create Widgets
+        self.init_widgets()
+        # Assign Widgets to a local layout
+        self.arrange_widgets()
+        # Assign Local Widget Callbacks
+        self.init_callbacks()
+    # ======= Widget Creation/ Arrangement =START=
+    # init_system: Initialize all variables and structures used by this class
+    def init_system(self):
+        self.serial_monitor_cb = None
+        self.last_selected_directory = ""
+        self.queue_workers = {} # table row -> FirmwareImportWorker (rows are removed from here when their worker has finished)
+        # Table Columns
+        self.COLUMN_FILE = 0
+        self.COLUMN_STATUS = 1
+        self.COLUMN_BOOTLOADER_CRC_READ = 2
+        self.COLUMN_BOOTLOADER_CRC_CALC = 3
+        self.COLUMN_FIRMWARE_CRC_READ = 4
+        self.COLUMN_FIRMWARE_CRC_CALC = 5
+        self.COLUMN_TIME = 6
+        self.COLUMN_TITLES = ["file", "status", "bootloader crc (read)", "bootloader crc (calc)", "firmware crc (read)", "firmware crc (calc)", "time"]
+        # Row Status Text
+        self.STATUS_QUEUED = "queued"
+        self.STATUS_PASS = "pass"
+        self.STATUS_FAIL = "fail"
+        self.STATUS_ERROR = "error"
+        self.STATUS_CANCELLED = "cancelled"
+
+    # init_widgets: Initialize all Graphical Objects used by this class
+    def init_widgets(self):
+        # Declare Widgets
+        self.queue_groupbox = QtWidgets.QGroupBox("file queue (drop files or folders here)")
+        self.queue_table = QtWidgets.QTableWidget(0, len(self.COLUMN_TITLES))
+        self.queue_table.setHorizontalHeaderLabels(self.COLUMN_TITLES)
+        self.queue_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.queue_table.horizontalHeader().setStretchLastSection(True)
+        self.queue_table.setAcceptDrops(False) # drops are handled by this frame
+        self.add_files_button = QtWidgets.QPushButton("add files")
+        self.clear_queue_button = QtWidgets.QPushButton("clear")
+        self.queue_status_label = QtWidgets.QLabel("-")
+        self.queue_status_label.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignVCenter)
+        self.setAcceptDrops(True)
+
+    # arrange_widgets: Set up on-screen position of all GUI Objects used by this class
+    def arrange_widgets(self):
+        # - groupbox layout
+        self.queue_layout = QtWidgets.QGridLayout()
+        self.queue_layout.addWidget(self.add_files_button, 0, 0, 1, 1)
+        self.queue_layout.addWidget(self.clear_queue_button, 0, 1, 1, 1)
+        self.queue_layout.addWidget(self.queue_status_label, 0, 2, 1, 1)
+        self.queue_layout.addWidget(self.queue_table, 1, 0, 1, 3)
+        self.queue_layout.setContentsMargins(10,20,10,20)
+        self.queue_groupbox.setLayout(self.queue_layout)
+        # - global layout
+        self.layout = QtWidgets.QVBoxLayout()
+        self.layout.addWidget(self.queue_groupbox)
+        self.layout.setContentsMargins(0,0,0,0) # This frame is invisible, allow contents to expand all the way out
+        self.setLayout(self.layout)
+    # ======= Widget Creation/ Arrangement ==END==
+
+    # ======= Widget Status =START=
+    def set_row_text(self, row, column, text):
+        self.queue_table.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+
+    def update_queue_status_label(self):
+        row_count = self.queue_table.rowCount()
+        self.queue_status_label.setText("{} files, {} running".format(row_count, len(self.queue_workers)))
+    # ======= Widget Status ==END==
+
+    # ======= Callback Assignments =START=
+    def init_callbacks(self):
+        self.add_files_button.clicked.connect(self.add_files_button_cb)
+        self.clear_queue_button.clicked.connect(self.clear_queue_button_cb)
+
+    def set_serial_monitor_callback(self, callback):
+        self.serial_monitor_cb = callback
+
+    def display_message(self, message, rx=False, add_timestamp=True):
+        if self.serial_monitor_cb:
+            self.serial_monitor_cb(message, rx, add_timestamp)
+    # ======= Callback Assignments ==END==
+
+    # ======= Drag and Drop =START=
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        dropped_paths = [unicode(this_url.toLocalFile()) for this_url in event.mimeData().urls() if this_url.isLocalFile()]
+        event.acceptProposedAction()
+        self.add_paths_to_queue(dropped_paths)
+    # ======= Drag and Drop ==END==
+
+    # ======= Callback Implementations =START=
+    def add_files_button_cb(self):
+        if not self.last_selected_directory:
+            default_directory = QtCore.QDir().homePath()
+        else:
+            default_directory = self.last_selected_directory
+        selected_files = QtWidgets.QFileDialog.getOpenFileNames(self, "Select Firmware Files", default_directory, "Hex files (*.hex *.hxf *.bin)")
+        if app_config.is_python3: # Python3 Platform: (list of files, selected filter)
+            selected_files = selected_files[0]
+        self.add_paths_to_queue([unicode(this_file_name) for this_file_name in selected_files])
+
+    # clear_queue_button_cb: cancel every running import and empty the table
+    def clear_queue_button_cb(self):
+        for this_worker in self.queue_workers.values():
+            this_worker.cancel()
+        self.queue_workers = {}
+        self.queue_table.setRowCount(0)
+        self.update_queue_status_label()
+
+    # add_paths_to_queue: add a row per firmware file (directories are searched recursively) and start its import
+    def add_paths_to_queue(self, paths):
+        firmware_file_paths = []
+        for this_path in paths:
+            if os.path.isdir(this_path):
+                firmware_file_paths.extend(find_firmware_files(this_path))
+            elif is_firmware_file_path(this_path):
+                firmware_file_paths.append(this_path)
+        if paths:
+            self.last_selected_directory = os.path.dirname(paths[0])
+        for this_file_path in firmware_file_paths:
+            self.add_file_to_queue(this_file_path)
+        self.update_queue_status_label()
+
+    def add_file_to_queue(self, file_path):
+        row = self.queue_table.rowCount()
+        self.queue_table.insertRow(row)
+        file_item = QtWidgets.QTableWidgetItem(os.path.basename(file_path))
+        file_item.setToolTip(file_path)
+        self.queue_table.setItem(row, self.COLUMN_FILE, file_item)
+        self.set_row_text(row, self.COLUMN_STATUS, self.STATUS_QUEUED)
+        # - every file gets its own product, so workers never share a memory map (results cache is shared)
+        product = create_product_p21odp()
+        if product_p21odp.result_cache:
+            product.assign_result_cache(product_p21odp.result_cache)
+        self.queue_workers[row] = start_firmware_import(product, file_path, progress_cb=self.queue_import_progress_cb, finished_cb=self.queue_import_finished_cb)
+
+    # queue_import_progress_cb: show the current stage of every running worker for this file path
+    def queue_import_progress_cb(self, file_path, stage):
+        for this_row, this_worker in self.queue_workers.items():
+            if this_worker.file_path == file_path and not this_worker.is_finished:
+                self.set_row_text(this_row, self.COLUMN_STATUS, stage)
+
+    # queue_import_finished_cb: fill in the rows of all workers that have finished (results are read from the workers)
+    def queue_import_finished_cb(self, file_path, status_code, crc_results):
+        finished_rows = [this_row for this_row, this_worker in self.queue_workers.items() if this_worker.is_finished]
+        for this_row in finished_rows:
+            self.update_row_with_results(this_row, self.queue_workers.pop(this_row))
+        self.update_queue_status_label()
+
+    def update_row_with_results(self, row, worker):
+        hex_file_in = worker.product.hex_file_in
+        crc_results = worker.crc_results
+        if worker.status_code == hex_file_in.IMPORT_CANCELLED:
+            row_status = self.STATUS_CANCELLED
+        elif worker.status_code != hex_file_in.IMPORT_SUCCESS or worker.write_errors_detected:
+            row_status = self.STATUS_ERROR
+        elif crc_results["bootloader_crc_match"] and crc_results["firmware_crc_match"]:
+            row_status = self.STATUS_PASS
+        else:
+            row_status = self.STATUS_FAIL
+        self.set_row_text(row, self.COLUMN_STATUS, row_status)
+        if crc_results:
+            self.set_row_text(row, self.COLUMN_BOOTLOADER_CRC_READ, crc_results["bootloader_crc_stored"])
+            self.set_row_text(row, self.COLUMN_BOOTLOADER_CRC_CALC, crc_results["bootloader_crc_calc"])
+            self.set_row_text(row, self.COLUMN_FIRMWARE_CRC_READ, crc_results["firmware_crc_stored"])
+            self.set_row_text(row, self.COLUMN_FIRMWARE_CRC_CALC, crc_results["firmware_crc_calc"])
+        self.set_row_text(row, self.COLUMN_TIME, "{:.3f}s".format(worker.elapsed_time_s))
+        self.display_message("{}: {}".format(row_status, worker.file_path))
+    # ======= Callback Implementations ==END==
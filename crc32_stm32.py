@@ -0,0 +1,241 @@
+# crc32_stm32.py
+# - Table driven implementation of the STM32 hardware CRC (polynomial 0x04C11DB7, non-reflected, no final xor)
+# - Produces results that are bit-identical to the nibble table routines in MemoryMap_STM32_64kB
+import struct # For converting whole buffers of bytes into u32 "words" in a single call
+
+# Crc32_STM32 Class: Holds precomputed lookup tables and routines for calculating the STM32 CRC over buffers
+# - word mode: data is fed as little-endian u32 words (matches the STM32 CRC peripheral, and update_crc32_from_data_at_address)
+# - byte mode: data is fed one byte at a time, msb first (matches update_crc32_from_data_at_address_8bit_chunks)
+class Crc32_STM32():
+    def __init__(self, parent=None):
+        # CRC Parameters
+        self.POLYNOMIAL = 0x04C11DB7
+        self.INIT_VALUE = 0xFFFFFFFF
+        self.MASK_U32 = 0xFFFFFFFF
+        # Table Parameters
+        self.TABLE_SIZE = 0x100 # one entry per possible byte value
+        self.SLICE_COUNT = 8 # slice-by-8: two u32 words are folded into the crc per loop iteration
+        self.WORD_SIZE_IN_BYTES = 4
+        # Word Formats (struct format characters)
+        self.WORD_ORDER_LITTLE_ENDIAN = "<"
+        self.WORD_ORDER_BIG_ENDIAN = ">"
+
+        self.init_tables()
+        self.init_shift_operators()
+        self.fill_crc_tables = {} # fill byte value -> crcs of 2^n fill bytes (see get_fill_crcs)
+
+    # ======= Lookup Tables =START=
+    # init_tables: build all lookup tables once, so that crc calculations only perform table lookups
+    def init_tables(self):
+        self.byte_table = self.build_byte_table()
+        self.slice_tables = self.build_slice_tables(self.byte_table)
+
+    # build_byte_table: standard 256 entry table, each entry is the crc of one byte shifted through the polynomial
+    # - note: the first 16 entries match ROM_CRC32_NIBBLE_TABLE (the IAR tech-note table)
+    def build_byte_table(self):
+        byte_table = []
+        for this_byte in range(self.TABLE_SIZE):
+            crc_value = this_byte << 24
+            for this_bit in range(8):
+                if crc_value & 0x80000000:
+                    crc_value = ((crc_value << 1) ^ self.POLYNOMIAL) & self.MASK_U32
+                else:
+                    crc_value = (crc_value << 1) & self.MASK_U32
+            byte_table.append(crc_value)
+        return byte_table
+
+    # build_slice_tables: builds the tables used by the slice-by-4/slice-by-8 loops
+    # - slice_tables[n][b] is the contribution of byte 'b' when it is followed by 'n' more bytes
+    def build_slice_tables(self, byte_table):
+        slice_tables = [list(byte_table)]
+        for this_slice in range(1, self.SLICE_COUNT):
+            previous_table = slice_tables[this_slice-1]
+            this_table = []
+            for this_byte in range(self.TABLE_SIZE):
+                previous_value = previous_table[this_byte]
+                this_table.append(((previous_value << 8) & self.MASK_U32) ^ byte_table[previous_value >> 24])
+            slice_tables.append(this_table)
+        return slice_tables
+    # ======= Lookup Tables ==END==
+
+    # ======= CRC Calculation =START=
+    # update_crc32_bytes: feed a buffer into the crc one byte at a time (msb first)
+    # - receives: crc_value (running crc), data (bytes, bytearray, memoryview or list of u8s)
+    # - returns: updated crc value
+    def update_crc32_bytes(self, crc_value, data):
+        byte_table = self.byte_table
+        for this_byte in data:
+            crc_value = ((crc_value << 8) & 0xFFFFFFFF) ^ byte_table[(crc_value >> 24) ^ this_byte]
+        return crc_value
+
+    # update_crc32_words: feed a buffer into the crc one u32 word at a time
+    # - receives: crc_value (running crc), data (length must be a multiple of 4), word_order (struct byte order character)
+    # -- little-endian word order gives the STM32 peripheral result
+    # -- big-endian word order gives the same result as feeding the bytes one at a time
+    # - returns: updated crc value
+    def update_crc32_words(self, crc_value, data, word_order="<"):
+        word_count = len(data) // self.WORD_SIZE_IN_BYTES
+        if not word_count:
+            return crc_value
+        words = struct.unpack(word_order + str(word_count) + "I", data)
+        t0, t1, t2, t3, t4, t5, t6, t7 = self.slice_tables
+        # slice-by-8: two words per iteration
+        pair_count = word_count >> 1
+        this_index = 0
+        for this_pair in range(pair_count):
+            first_word = crc_value ^ words[this_index]
+            second_word = words[this_index+1]
+            crc_value = (t7[first_word >> 24] ^ t6[(first_word >> 16) & 0xFF] ^ t5[(first_word >> 8) & 0xFF] ^ t4[first_word & 0xFF] ^
+                         t3[second_word >> 24] ^ t2[(second_word >> 16) & 0xFF] ^ t1[(second_word >> 8) & 0xFF] ^ t0[second_word & 0xFF])
+            this_index += 2
+        # slice-by-4: remaining odd word
+        if word_count & 0x01:
+            first_word = crc_value ^ words[this_index]
+            crc_value = t3[first_word >> 24] ^ t2[(first_word >> 16) & 0xFF] ^ t1[(first_word >> 8) & 0xFF] ^ t0[first_word & 0xFF]
+        return crc_value
+
+    # get_crc32_word_mode: calculate the STM32 crc of a buffer fed as little-endian u32 words
+    # - data is expected to be a multiple of 4 bytes long (any trailing bytes are ignored)
+    def get_crc32_word_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.INIT_VALUE
+        return self.update_crc32_words(crc_value, data, self.WORD_ORDER_LITTLE_ENDIAN)
+
+    # get_crc32_byte_mode: calculate the STM32 crc of a buffer fed one byte at a time
+    # - the aligned portion of the buffer is handled by the word loop (big-endian words are equivalent to msb-first bytes)
+    def get_crc32_byte_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.INIT_VALUE
+        aligned_length = len(data) - (len(data) % self.WORD_SIZE_IN_BYTES)
+        crc_value = self.update_crc32_words(crc_value, data[:aligned_length], self.WORD_ORDER_BIG_ENDIAN)
+        crc_value = self.update_crc32_bytes(crc_value, data[aligned_length:])
+        return crc_value
+    # ======= CRC Calculation ==END==
+
+    # ======= CRC Combine (GF(2) Shift Operators) =START=
+    # - The crc (without init value) is linear over GF(2), so a running crc can be advanced over 'n' bytes of zeros
+    # -- by multiplying it with a 32x32 bit matrix. This allows crcs of separate blocks to be combined:
+    # -- crc(A+B) = shift_crc32(crc(A), len(B)) ^ crc_with_zero_init(B)
+    # - Matrices are stored as a list of 32 columns (column 'n' is the result for input bit 'n').
+    # init_shift_operators: build the operator for one zero bit, then square it up to cover all byte counts in a u32
+    def init_shift_operators(self):
+        one_bit_operator = [self.POLYNOMIAL if this_bit == 31 else (1 << (this_bit+1)) for this_bit in range(32)]
+        operator = one_bit_operator
+        for this_square in range(3): # 1 bit -> 2 bits -> 4 bits -> 8 bits (one byte)
+            operator = self.gf2_matrix_square(operator)
+        # shift_operators[n] advances a crc over 2^n bytes of zeros
+        self.shift_operators = [operator]
+        for this_power in range(1, 32):
+            self.shift_operators.append(self.gf2_matrix_square(self.shift_operators[this_power-1]))
+        # - the polynomial has a constant term, so one zero bit is an invertible step (x -> x/2, folding the polynomial back in)
+        # -- unshift_operators[n] takes a crc back over 2^n bytes of zeros (used for crc forcing)
+        one_bit_inverse_operator = [((self.POLYNOMIAL >> 1) | 0x80000000) if this_bit == 0 else (1 << (this_bit-1)) for this_bit in range(32)]
+        operator = one_bit_inverse_operator
+        for this_square in range(3):
+            operator = self.gf2_matrix_square(operator)
+        self.unshift_operators = [operator]
+        for this_power in range(1, 32):
+            self.unshift_operators.append(self.gf2_matrix_square(self.unshift_operators[this_power-1]))
+
+    # gf2_matrix_times: multiply a matrix with a u32 vector
+    def gf2_matrix_times(self, matrix, vector):
+        result = 0
+        this_bit = 0
+        while vector:
+            if vector & 0x01:
+                result ^= matrix[this_bit]
+            vector >>= 1
+            this_bit += 1
+        return result
+
+    # gf2_matrix_multiply: returns the matrix for 'first_matrix' applied after 'second_matrix'
+    def gf2_matrix_multiply(self, first_matrix, second_matrix):
+        return [self.gf2_matrix_times(first_matrix, this_column) for this_column in second_matrix]
+
+    # gf2_matrix_square: returns the matrix applied twice
+    def gf2_matrix_square(self, matrix):
+        return self.gf2_matrix_multiply(matrix, matrix)
+
+    # get_shift_operator: returns the matrix that advances a crc over 'length_bytes' bytes of zeros
+    def get_shift_operator(self, length_bytes):
+        operator = [1 << this_bit for this_bit in range(32)] # identity
+        this_power = 0
+        while length_bytes:
+            if length_bytes & 0x01:
+                operator = self.gf2_matrix_multiply(self.shift_operators[this_power], operator)
+            length_bytes >>= 1
+            this_power += 1
+        return operator
+
+    # get_operator_tables: converts a matrix into four 256 entry tables, so it can be applied with four lookups
+    # - operator_tables[n][b] is the result for input byte 'b' at bit position 8*n
+    def get_operator_tables(self, matrix):
+        operator_tables = []
+        for this_slice in range(self.WORD_SIZE_IN_BYTES):
+            operator_tables.append([self.gf2_matrix_times(matrix, this_byte << (8*this_slice)) for this_byte in range(self.TABLE_SIZE)])
+        return operator_tables
+
+    # shift_crc32: advance a running crc over 'length_bytes' bytes of zeros
+    def shift_crc32(self, crc_value, length_bytes):
+        this_power = 0
+        while length_bytes:
+            if length_bytes & 0x01:
+                crc_value = self.gf2_matrix_times(self.shift_operators[this_power], crc_value)
+            length_bytes >>= 1
+            this_power += 1
+        return crc_value
+
+    # unshift_crc32: inverse of shift_crc32, take a running crc back over 'length_bytes' bytes of zeros
+    def unshift_crc32(self, crc_value, length_bytes):
+        this_power = 0
+        while length_bytes:
+            if length_bytes & 0x01:
+                crc_value = self.gf2_matrix_times(self.unshift_operators[this_power], crc_value)
+            length_bytes >>= 1
+            this_power += 1
+        return crc_value
+
+    # update_crc32_fill: advance a running crc over 'length_bytes' bytes that all have the same value (erased flash is 0xFF)
+    # - a run of identical bytes gives the same result in word mode and byte mode (whole words only in word mode)
+    # - uses the crcs of 2^n fill bytes, so the cost only grows with log2(length_bytes)
+    def update_crc32_fill(self, crc_value, fill_byte, length_bytes):
+        fill_crcs = self.get_fill_crcs(fill_byte)
+        fill_crc_value = 0 # crc of the whole run, calculated with an init value of 0
+        this_power = 0
+        remaining_length = length_bytes
+        while remaining_length:
+            if remaining_length & 0x01:
+                fill_crc_value = self.combine_crc32(fill_crc_value, fill_crcs[this_power], 1 << this_power)
+            remaining_length >>= 1
+            this_power += 1
+        return self.combine_crc32(crc_value, fill_crc_value, length_bytes)
+
+    # get_fill_crcs: fill_crcs[n] is the crc (init value 0) of 2^n bytes of fill_byte, built once per fill value
+    def get_fill_crcs(self, fill_byte):
+        if fill_byte not in self.fill_crc_tables:
+            fill_crcs = [self.byte_table[fill_byte]]
+            for this_power in range(1, 32):
+                fill_crcs.append(self.combine_crc32(fill_crcs[this_power-1], fill_crcs[this_power-1], 1 << (this_power-1)))
+            self.fill_crc_tables[fill_byte] = fill_crcs
+        return self.fill_crc_tables[fill_byte]
+
+    # combine_crc32: get the crc of two concatenated blocks
+    # - receives: crc_value_first (crc of the first block, including the init value),
+    # -- crc_value_second (crc of the second block calculated with an init value of 0), length_second (bytes)
+    def combine_crc32(self, crc_value_first, crc_value_second, length_second):
+        return self.shift_crc32(crc_value_first, length_second) ^ crc_value_second
+    # ======= CRC Combine (GF(2) Shift Operators) ==END==
+
+    # ======= CRC Forcing =START=
+    # get_crc32_patch_value: u32 to xor in to a 4 byte patch so that a crc changes from crc_value_current to crc_value_target
+    # - receives: length_after_patch (bytes fed to the crc after the 4 patch bytes)
+    # - changing the patch by 'delta' changes the final crc by shift_crc32(delta, 4 + length_after_patch), and shifting is invertible
+    # -- word mode: the delta applies to the little-endian word at the patch address
+    # -- byte mode: the delta applies to the patch bytes read msb first (big-endian)
+    def get_crc32_patch_value(self, crc_value_current, crc_value_target, length_after_patch):
+        return self.unshift_crc32(crc_value_current ^ crc_value_target, self.WORD_SIZE_IN_BYTES + length_after_patch)
+    # ======= CRC Forcing ==END==
+
+
+# Properties Class Instances
+crc32_stm32 = Crc32_STM32()
@@ -0,0 +1,119 @@
+/*
+ * crc32_stm32_native.c
+ * - Optional compiled backend for the STM32 hardware CRC (polynomial 0x04C11DB7, non-reflected, no final xor)
+ * - Loaded with ctypes by crc32_stm32_native.py, build with: python build_crc32_native.py
+ * - Same results as the word/byte mode routines in crc32_stm32.py (slice-by-8 tables, built on first use)
+ */
+#include <stddef.h>
+#include <stdint.h>
+
+#if defined(_WIN32)
+#define CRC32_STM32_EXPORT __declspec(dllexport)
+#else
+#define CRC32_STM32_EXPORT
+#endif
+
+#define CRC32_STM32_POLYNOMIAL 0x04C11DB7u
+#define CRC32_STM32_SLICE_COUNT 8
+
+static uint32_t slice_tables[CRC32_STM32_SLICE_COUNT][256];
+static int slice_tables_ready = 0;
+
+/* init_tables: slice_tables[n][b] is the contribution of byte 'b' when it is followed by 'n' more bytes */
+static void init_tables(void)
+{
+    uint32_t this_byte;
+    int this_bit, this_slice;
+    for (this_byte = 0; this_byte < 256; this_byte++) {
+        uint32_t crc_value = this_byte << 24;
+        for (this_bit = 0; this_bit < 8; this_bit++) {
+            crc_value = (crc_value & 0x80000000u) ? (crc_value << 1) ^ CRC32_STM32_POLYNOMIAL : crc_value << 1;
+        }
+        slice_tables[0][this_byte] = crc_value;
+    }
+    for (this_slice = 1; this_slice < CRC32_STM32_SLICE_COUNT; this_slice++) {
+        for (this_byte = 0; this_byte < 256; this_byte++) {
+            uint32_t previous_value = slice_tables[this_slice - 1][this_byte];
+            slice_tables[this_slice][this_byte] = (previous_value << 8) ^ slice_tables[0][previous_value >> 24];
+        }
+    }
+    slice_tables_ready = 1;
+}
+
+/* update_crc32_word: fold one u32 (fed msb first) in to the crc */
+static uint32_t update_crc32_word(uint32_t crc_value, uint32_t word)
+{
+    crc_value ^= word;
+    return slice_tables[3][crc_value >> 24] ^ slice_tables[2][(crc_value >> 16) & 0xFF] ^
+           slice_tables[1][(crc_value >> 8) & 0xFF] ^ slice_tables[0][crc_value & 0xFF];
+}
+
+/* update_crc32_word_pair: fold two u32s (fed msb first) in to the crc */
+static uint32_t update_crc32_word_pair(uint32_t crc_value, uint32_t first_word, uint32_t second_word)
+{
+    first_word ^= crc_value;
+    return slice_tables[7][first_word >> 24] ^ slice_tables[6][(first_word >> 16) & 0xFF] ^
+           slice_tables[5][(first_word >> 8) & 0xFF] ^ slice_tables[4][first_word & 0xFF] ^
+           slice_tables[3][second_word >> 24] ^ slice_tables[2][(second_word >> 16) & 0xFF] ^
+           slice_tables[1][(second_word >> 8) & 0xFF] ^ slice_tables[0][second_word & 0xFF];
+}
+
+static uint32_t read_u32_little_endian(const uint8_t *data)
+{
+    return (uint32_t)data[0] | ((uint32_t)data[1] << 8) | ((uint32_t)data[2] << 16) | ((uint32_t)data[3] << 24);
+}
+
+static uint32_t read_u32_big_endian(const uint8_t *data)
+{
+    return ((uint32_t)data[0] << 24) | ((uint32_t)data[1] << 16) | ((uint32_t)data[2] << 8) | (uint32_t)data[3];
+}
+
+/* crc32_stm32_word_mode: data fed as little-endian u32 words (any trailing partial word is ignored) */
+CRC32_STM32_EXPORT uint32_t crc32_stm32_word_mode(const uint8_t *data, size_t length, uint32_t crc_value)
+{
+    size_t word_count = length / 4;
+    size_t this_word = 0;
+    if (!slice_tables_ready) {
+        init_tables();
+    }
+    for (; this_word + 1 < word_count; this_word += 2) {
+        crc_value = update_crc32_word_pair(crc_value, read_u32_little_endian(data + 4*this_word), read_u32_little_endian(data + 4*this_word + 4));
+    }
+    if (this_word < word_count) {
+        crc_value = update_crc32_word(crc_value, read_u32_little_endian(data + 4*this_word));
+    }
+    return crc_value;
+}
+
+/* crc32_stm32_byte_mode: data fed one byte at a time, msb first (big-endian words plus a byte tail) */
+CRC32_STM32_EXPORT uint32_t crc32_stm32_byte_mode(const uint8_t *data, size_t length, uint32_t crc_value)
+{
+    size_t word_count = length / 4;
+    size_t this_word = 0;
+    size_t this_index;
+    if (!slice_tables_ready) {
+        init_tables();
+    }
+    for (; this_word + 1 < word_count; this_word += 2) {
+        crc_value = update_crc32_word_pair(crc_value, read_u32_big_endian(data + 4*this_word), read_u32_big_endian(data + 4*this_word + 4));
+    }
+    if (this_word < word_count) {
+        crc_value = update_crc32_word(crc_value, read_u32_big_endian(data + 4*this_word));
+    }
+    for (this_index = 4*word_count; this_index < length; this_index++) {
+        crc_value = (crc_value << 8) ^ slice_tables[0][(crc_value >> 24) ^ data[this_index]];
+    }
+    return crc_value;
+}
+
+/* crc32_stm32_get_byte_table: copy the 256 entry byte table (for the self-test against ROM_CRC32_NIBBLE_TABLE) */
+CRC32_STM32_EXPORT void crc32_stm32_get_byte_table(uint32_t *byte_table)
+{
+    int this_byte;
+    if (!slice_tables_ready) {
+        init_tables();
+    }
+    for (this_byte = 0; this_byte < 256; this_byte++) {
+        byte_table[this_byte] = slice_tables[0][this_byte];
+    }
+}
@@ -0,0 +1,120 @@
+# crc32_stm32_native.py
+# - Optional compiled backend for the STM32 hardware CRC (see crc32_stm32.py), loaded with ctypes
+# - The library is built from crc32_stm32_native.c with: python build_crc32_native.py (it is not part of the repository)
+# - At import the library is self-tested on known vectors (including the IAR tech-note table next to ROM_CRC32_NIBBLE_TABLE)
+# -- and against the python engine. crc32_stm32_native is None if the library is missing or fails the self-test,
+# -- so callers fall back to the python engines.
+import ctypes
+import os
+import sys
+
+from crc32_stm32 import crc32_stm32
+
+NATIVE_LIBRARY_BASE_NAME = "crc32_stm32_native_lib" # not "crc32_stm32_native": python would import a .so of that name instead of this module
+
+# get_native_library_path: path of the compiled library (next to this file, extension of the platform)
+def get_native_library_path():
+    if sys.platform == "win32":
+        library_extension = ".dll"
+    elif sys.platform == "darwin":
+        library_extension = ".dylib"
+    else:
+        library_extension = ".so"
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), NATIVE_LIBRARY_BASE_NAME + library_extension)
+
+
+# Crc32_STM32_Native Class: same interface as the Crc32_STM32 word/byte mode routines
+class Crc32_STM32_Native():
+    def __init__(self, library, crc_tables=crc32_stm32, parent=None):
+        self.crc_tables = crc_tables
+        self.WORD_SIZE_IN_BYTES = self.crc_tables.WORD_SIZE_IN_BYTES
+        # Self-Test Vectors
+        # - IAR tech-note: the first 16 byte table entries are ROM_CRC32_NIBBLE_TABLE (memory_map_stm32.py)
+        self.IAR_NIBBLE_TABLE = [
+            0x00000000, 0x04C11DB7, 0x09823B6E, 0x0D4326D9, 0x130476DC, 0x17C56B6B, 0x1A864DB2, 0x1E475005,
+            0x2608EDB8, 0x22C9F00F, 0x2F8AD6D6, 0x2B4BCB61, 0x350C9B64, 0x31CD86D3, 0x3C8EA00A, 0x384FBDBD,
+        ]
+        self.TEST_VECTORS_WORD_MODE = [((0x12345678).to_bytes(4, "little"), 0xDF8A8A2B)] # STM32 peripheral fed the word 0x12345678
+        self.TEST_VECTORS_BYTE_MODE = [(b"123456789", 0x0376E6E7)] # CRC-32/MPEG-2 check value
+        # Library Functions
+        self.library = library
+        self.library.crc32_stm32_word_mode.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint32]
+        self.library.crc32_stm32_word_mode.restype = ctypes.c_uint32
+        self.library.crc32_stm32_byte_mode.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint32]
+        self.library.crc32_stm32_byte_mode.restype = ctypes.c_uint32
+        self.library.crc32_stm32_get_byte_table.argtypes = [ctypes.POINTER(ctypes.c_uint32)]
+        self.library.crc32_stm32_get_byte_table.restype = None
+
+    # get_buffer: returns an object ctypes can pass as a pointer to the data, without copying writable buffers (bytearray, memory maps)
+    # - read only views (like a mapped binary file) are copied once
+    def get_buffer(self, data):
+        if isinstance(data, bytes):
+            return data
+        data_view = memoryview(data).cast("B")
+        if data_view.readonly:
+            return data_view.tobytes()
+        return (ctypes.c_char * data_view.nbytes).from_buffer(data_view)
+
+    # get_crc32_word_mode: calculate the STM32 crc of a buffer fed as little-endian u32 words (any trailing partial word is ignored)
+    def get_crc32_word_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        if not len(data):
+            return crc_value
+        return self.library.crc32_stm32_word_mode(self.get_buffer(data), len(data), crc_value)
+
+    # get_crc32_byte_mode: calculate the STM32 crc of a buffer fed one byte at a time
+    def get_crc32_byte_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        if not len(data):
+            return crc_value
+        return self.library.crc32_stm32_byte_mode(self.get_buffer(data), len(data), crc_value)
+
+    def get_byte_table(self):
+        byte_table = (ctypes.c_uint32 * 0x100)()
+        self.library.crc32_stm32_get_byte_table(byte_table)
+        return list(byte_table)
+
+    # self_test: True if the library agrees with the known vectors and with the python engine
+    def self_test(self):
+        byte_table = self.get_byte_table()
+        if byte_table[:len(self.IAR_NIBBLE_TABLE)] != self.IAR_NIBBLE_TABLE or byte_table != self.crc_tables.byte_table:
+            return False
+        for test_data, test_crc_value in self.TEST_VECTORS_WORD_MODE:
+            if self.get_crc32_word_mode(test_data) != test_crc_value:
+                return False
+        for test_data, test_crc_value in self.TEST_VECTORS_BYTE_MODE:
+            if self.get_crc32_byte_mode(test_data) != test_crc_value:
+                return False
+        # - every slice table entry and the odd word/byte tail paths, with a start value that is not the init value
+        test_data = bytearray(((this_index*0x9E) ^ (this_index >> 3)) & 0xFF for this_index in range(0x803))
+        for test_length in (len(test_data), len(test_data) - 3, 4, 3):
+            if self.get_crc32_byte_mode(test_data[:test_length], 0x1234ABCD) != self.crc_tables.get_crc32_byte_mode(bytes(test_data[:test_length]), 0x1234ABCD):
+                return False
+            word_length = test_length & ~0x03
+            if self.get_crc32_word_mode(test_data[:test_length], 0x1234ABCD) != self.crc_tables.get_crc32_word_mode(bytes(test_data[:word_length]), 0x1234ABCD):
+                return False
+        return True
+
+
+# load_native_crc32_engine: load and self-test the compiled library
+# - returns: Crc32_STM32_Native, or None if the library is not built or fails the self-test
+def load_native_crc32_engine(library_path=None):
+    if library_path is None:
+        library_path = get_native_library_path()
+    if not os.path.isfile(library_path):
+        return None
+    try:
+        native_engine = Crc32_STM32_Native(ctypes.CDLL(library_path))
+    except (OSError, AttributeError):
+        print("could not load native crc library: " + str(library_path))
+        return None
+    if not native_engine.self_test():
+        print("native crc library failed its self-test, using the python crc engines: " + str(library_path))
+        return None
+    return native_engine
+
+
+# Properties Class Instances (None if the library is not available)
+crc32_stm32_native = load_native_crc32_engine()
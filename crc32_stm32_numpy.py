@@ -0,0 +1,91 @@
+# crc32_stm32_numpy.py
+# - NumPy backend for the STM32 hardware CRC (see crc32_stm32.py)
+# - The buffer is split in to blocks, all blocks are run through the slice-by-4 tables in parallel (one numpy operation per word),
+# -- and the block crcs are then merged pairwise with GF(2) shift operator tables (one numpy operation per tree level)
+import numpy
+
+from crc32_stm32 import crc32_stm32
+
+# Crc32_STM32_Numpy Class: vectorized version of the Crc32_STM32 word/byte mode routines
+class Crc32_STM32_Numpy():
+    def __init__(self, crc_tables=crc32_stm32, parent=None):
+        self.crc_tables = crc_tables
+        self.WORD_SIZE_IN_BYTES = self.crc_tables.WORD_SIZE_IN_BYTES
+        self.WORD_DTYPE_LITTLE_ENDIAN = numpy.dtype("<u4")
+        self.WORD_DTYPE_BIG_ENDIAN = numpy.dtype(">u4")
+        # - below this many words the python table loop is faster than the numpy setup cost
+        self.MIN_VECTORIZED_WORDS = 64
+        # Lookup Tables (slice_tables[0:4] from the python engine)
+        self.slice_tables = [numpy.array(this_table, dtype=numpy.uint32) for this_table in self.crc_tables.slice_tables[:self.WORD_SIZE_IN_BYTES]]
+        self.shift_operator_tables = {} # block length in bytes -> four numpy tables (built on first use)
+
+    # get_shift_operator_tables: returns (and caches) the table form of the operator that advances a crc over 'length_bytes' bytes
+    def get_shift_operator_tables(self, length_bytes):
+        if length_bytes not in self.shift_operator_tables:
+            operator = self.crc_tables.get_shift_operator(length_bytes)
+            operator_tables = self.crc_tables.get_operator_tables(operator)
+            self.shift_operator_tables[length_bytes] = [numpy.array(this_table, dtype=numpy.uint32) for this_table in operator_tables]
+        return self.shift_operator_tables[length_bytes]
+
+    # apply_tables: applies four 256 entry tables to every u32 in an array
+    def apply_tables(self, tables, values):
+        t0, t1, t2, t3 = tables
+        return t3[values >> 24] ^ t2[(values >> 16) & 0xFF] ^ t1[(values >> 8) & 0xFF] ^ t0[values & 0xFF]
+
+    # update_crc32_word_array: feed an array of u32 words in to a running crc
+    def update_crc32_word_array(self, crc_value, words):
+        word_count = len(words)
+        if word_count < self.MIN_VECTORIZED_WORDS:
+            return self.crc_tables.update_crc32_words(crc_value, words.astype(self.WORD_DTYPE_LITTLE_ENDIAN).tobytes(), self.crc_tables.WORD_ORDER_LITTLE_ENDIAN)
+        # Split the words in to a power of 2 number of blocks (about sqrt(word_count) blocks of about sqrt(word_count) words)
+        block_count = 1
+        while block_count*block_count < word_count:
+            block_count <<= 1
+        block_words = -(-word_count // block_count)
+        # - leading zero words do not change a crc calculated with an init value of 0, so pad at the front
+        padded_words = numpy.zeros(block_count*block_words, dtype=numpy.uint32)
+        padded_words[-word_count:] = words
+        word_columns = numpy.ascontiguousarray(padded_words.reshape(block_count, block_words).T) # word_columns[n] = word 'n' of every block
+        # Calculate the crc of every block in parallel (init value 0)
+        block_crcs = numpy.zeros(block_count, dtype=numpy.uint32)
+        for this_word_index in range(block_words):
+            block_crcs = self.apply_tables(self.slice_tables, block_crcs ^ word_columns[this_word_index])
+        # Combine neighbouring blocks: crc(A+B) = shift(crc(A), len(B)) ^ crc(B)
+        block_bytes = block_words*self.WORD_SIZE_IN_BYTES
+        while len(block_crcs) > 1:
+            shift_tables = self.get_shift_operator_tables(block_bytes)
+            block_crcs = self.apply_tables(shift_tables, block_crcs[0::2]) ^ block_crcs[1::2]
+            block_bytes <<= 1
+        # Add the init value, advanced over the whole buffer
+        return self.crc_tables.shift_crc32(crc_value, word_count*self.WORD_SIZE_IN_BYTES) ^ int(block_crcs[0])
+
+    # get_crc32_word_mode: calculate the STM32 crc of a buffer fed as little-endian u32 words
+    # - data can be bytes, bytearray, memoryview or a numpy uint8/uint32 array (any trailing partial word is ignored)
+    def get_crc32_word_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        words = self.get_word_array(data, self.WORD_DTYPE_LITTLE_ENDIAN)
+        return self.update_crc32_word_array(crc_value, words)
+
+    # get_crc32_byte_mode: calculate the STM32 crc of a buffer fed one byte at a time (big-endian words plus a byte tail)
+    def get_crc32_byte_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        data_bytes = numpy.frombuffer(data, dtype=numpy.uint8) if not isinstance(data, numpy.ndarray) else data.view(numpy.uint8)
+        aligned_length = len(data_bytes) - (len(data_bytes) % self.WORD_SIZE_IN_BYTES)
+        words = self.get_word_array(data_bytes[:aligned_length], self.WORD_DTYPE_BIG_ENDIAN)
+        crc_value = self.update_crc32_word_array(crc_value, words)
+        return self.crc_tables.update_crc32_bytes(crc_value, data_bytes[aligned_length:].tolist())
+
+    # get_word_array: reinterpret a buffer as u32 words (zero-copy view), returned in native byte order for the table lookups
+    def get_word_array(self, data, word_dtype):
+        if isinstance(data, numpy.ndarray) and data.dtype.itemsize == self.WORD_SIZE_IN_BYTES:
+            return data.astype(numpy.uint32, copy=False) # already u32 words
+        data_bytes = numpy.frombuffer(data, dtype=numpy.uint8) if not isinstance(data, numpy.ndarray) else data.view(numpy.uint8)
+        word_count = len(data_bytes) // self.WORD_SIZE_IN_BYTES
+        words = data_bytes[:word_count*self.WORD_SIZE_IN_BYTES].view(word_dtype)
+        return words.astype(numpy.uint32, copy=False)
+
+
+# Properties Class Instances
+crc32_stm32_numpy = Crc32_STM32_Numpy()
@@ -0,0 +1,53 @@
+# crc32_stm32_zlib.py
+# - zlib backend for the STM32 hardware CRC (see crc32_stm32.py), runs at the speed of the C crc in zlib.crc32
+# - zlib.crc32 is the reflected form of the same polynomial (0x04C11DB7, lsb first, init/xorout 0xFFFFFFFF)
+# -- feeding a byte msb first to the STM32 crc is the same as feeding the bit-reversed byte lsb first to the reflected crc,
+# -- with the crc register bit-reversed as well. So the data is bit-reversed in bulk (bytes.translate) and the
+# -- register is reflected once on the way in and once on the way out.
+# - word mode: a little-endian word fed msb first is its four bytes in reverse order, so the words are byte-swapped first (array.byteswap)
+import array
+import zlib
+
+from crc32_stm32 import crc32_stm32
+
+# Crc32_STM32_Zlib Class: same interface as the Crc32_STM32 word/byte mode routines
+class Crc32_STM32_Zlib():
+    def __init__(self, crc_tables=crc32_stm32, parent=None):
+        self.crc_tables = crc_tables
+        self.WORD_SIZE_IN_BYTES = self.crc_tables.WORD_SIZE_IN_BYTES
+        self.MASK_U32 = 0xFFFFFFFF
+        # bit reversal table for bytes.translate (entry 'b' is 'b' with its bit order reversed)
+        self.BIT_REVERSE_TABLE = bytes(int("{:08b}".format(this_byte)[::-1], 2) for this_byte in range(0x100))
+        # array type code of a 4 byte unsigned integer (used for swapping the byte order of every word)
+        self.WORD_TYPE_CODE = "I" if array.array("I").itemsize == self.WORD_SIZE_IN_BYTES else "L"
+
+    # reflect_u32: reverse the bit order of a u32
+    def reflect_u32(self, value):
+        return int("{:032b}".format(value)[::-1], 2)
+
+    # update_crc32_reflected_data: feed bit-reversed data to a running STM32 crc through zlib.crc32
+    # - zlib.crc32 inverts its start value and its result, and keeps its register reflected
+    def update_crc32_reflected_data(self, crc_value, reflected_data):
+        zlib_crc_value = zlib.crc32(reflected_data, self.reflect_u32(crc_value) ^ self.MASK_U32)
+        return self.reflect_u32(zlib_crc_value ^ self.MASK_U32)
+
+    # get_crc32_word_mode: calculate the STM32 crc of a buffer fed as little-endian u32 words
+    # - data is expected to be a multiple of 4 bytes long (any trailing bytes are ignored)
+    def get_crc32_word_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        aligned_length = len(data) - (len(data) % self.WORD_SIZE_IN_BYTES)
+        words = array.array(self.WORD_TYPE_CODE)
+        words.frombytes(data[:aligned_length])
+        words.byteswap()
+        return self.update_crc32_reflected_data(crc_value, words.tobytes().translate(self.BIT_REVERSE_TABLE))
+
+    # get_crc32_byte_mode: calculate the STM32 crc of a buffer fed one byte at a time
+    def get_crc32_byte_mode(self, data, crc_value=None):
+        if crc_value is None:
+            crc_value = self.crc_tables.INIT_VALUE
+        return self.update_crc32_reflected_data(crc_value, bytes(data).translate(self.BIT_REVERSE_TABLE))
+
+
+# Properties Class Instances
+crc32_stm32_zlib = Crc32_STM32_Zlib()
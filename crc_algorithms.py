@@ -0,0 +1,147 @@
+# crc_algorithms.py
+# - Registry of parameterized crc algorithms (width, polynomial, init value, reflection, final xor, byte/word feed)
+# - Used for crc regions that don't use the STM32 hardware crc of the memory map (see Product_P21Odp_MemoryMap.CRC_ALGORITHM_*)
+# - Lookup tables are built once per (width, polynomial, reflection) and shared by every algorithm that uses them
+import struct # For swapping the byte order of whole buffers of u32 "words" in a single call
+
+from crc32_stm32 import crc32_stm32
+
+# crc_table_cache: (width, polynomial, reflect_in) -> 256 entry byte table
+crc_table_cache = {}
+
+# CrcAlgorithm Class: one crc algorithm, in the usual parameter model (like the "catalogue of parametrised crc algorithms")
+# - feed: FEED_BYTE (bytes in memory order), or FEED_WORD (u32 words read from memory in word_order,
+# -- and fed msb first for non-reflected algorithms/ lsb first for reflected algorithms, like a crc peripheral fed with words)
+# - word_order: "little" (STM32 word reads, get_u32_value_at_address) or "big" (inverted word order, get_u32_value_at_address_inverted)
+# - word feed only consumes whole words (a partial last word is ignored)
+# - check_value: crc of b"123456789" (for self tests, None if there is no published value)
+class CrcAlgorithm():
+    def __init__(self, name, width, polynomial, init_value, reflect_in=False, reflect_out=False, xor_out=0, feed="byte", word_order="little", check_value=None, parent=None):
+        self.FEED_BYTE = "byte"
+        self.FEED_WORD = "word"
+        self.WORD_SIZE_IN_BYTES = 4
+        self.CHECK_DATA = b"123456789"
+        # Algorithm Parameters
+        self.NAME = name
+        self.WIDTH = width
+        self.POLYNOMIAL = polynomial
+        self.INIT_VALUE = init_value
+        self.REFLECT_IN = reflect_in
+        self.REFLECT_OUT = reflect_out
+        self.XOR_OUT = xor_out
+        self.FEED = feed
+        self.WORD_ORDER = word_order
+        self.CHECK_VALUE = check_value
+        self.MASK = (1 << self.WIDTH) - 1
+        self.WIDTH_IN_BYTES = (self.WIDTH + 7) // 8
+        # Feed Transform: a word fed msb first is its big-endian bytes, a word fed lsb first is its little-endian bytes
+        # - so word feed is byte feed with the bytes of every word reversed when the word order doesn't match
+        self.reverse_word_bytes = self.FEED == self.FEED_WORD and ((self.WORD_ORDER == "little") != self.REFLECT_IN)
+        # - non-reflected CRC-32 with the STM32 polynomial runs on the slice-by-8 tables of crc32_stm32
+        self.use_crc32_stm32 = (self.WIDTH == 32 and self.POLYNOMIAL == crc32_stm32.POLYNOMIAL and not self.REFLECT_IN)
+        self.byte_table = None # built on first use (see get_byte_table)
+
+    # ======= Lookup Tables =START=
+    # get_byte_table: returns the 256 entry table for this algorithm (built once, then shared through crc_table_cache)
+    def get_byte_table(self):
+        if self.byte_table is None:
+            table_key = (self.WIDTH, self.POLYNOMIAL, self.REFLECT_IN)
+            if table_key not in crc_table_cache:
+                crc_table_cache[table_key] = self.build_byte_table()
+            self.byte_table = crc_table_cache[table_key]
+        return self.byte_table
+
+    def build_byte_table(self):
+        byte_table = []
+        if self.REFLECT_IN:
+            reflected_polynomial = reflect_bits(self.POLYNOMIAL, self.WIDTH)
+            for this_byte in range(0x100):
+                crc_value = this_byte
+                for this_bit in range(8):
+                    crc_value = (crc_value >> 1) ^ reflected_polynomial if crc_value & 0x01 else crc_value >> 1
+                byte_table.append(crc_value)
+        else:
+            top_bit = 1 << (self.WIDTH - 1)
+            for this_byte in range(0x100):
+                crc_value = this_byte << (self.WIDTH - 8)
+                for this_bit in range(8):
+                    crc_value = ((crc_value << 1) ^ self.POLYNOMIAL) & self.MASK if crc_value & top_bit else (crc_value << 1) & self.MASK
+                byte_table.append(crc_value)
+        return byte_table
+    # ======= Lookup Tables ==END==
+
+    # ======= CRC Calculation =START=
+    # get_crc: crc of a buffer (init value, feed, output reflection and final xor applied)
+    def get_crc(self, data):
+        return self.finalize_crc(self.update_crc(self.INIT_VALUE, data))
+
+    # update_crc: feed a buffer in to a running crc register (no output reflection or final xor, see finalize_crc)
+    # - receives: crc_register (INIT_VALUE to start), data (bytes, bytearray or memoryview)
+    def update_crc(self, crc_register, data):
+        if self.FEED == self.FEED_WORD:
+            word_count = len(data) // self.WORD_SIZE_IN_BYTES
+            data = data[:word_count*self.WORD_SIZE_IN_BYTES]
+            if self.reverse_word_bytes:
+                data = struct.pack(">" + str(word_count) + "I", *struct.unpack("<" + str(word_count) + "I", data))
+        if self.use_crc32_stm32:
+            return crc32_stm32.get_crc32_byte_mode(data, crc_register)
+        byte_table = self.get_byte_table()
+        if self.REFLECT_IN:
+            for this_byte in data:
+                crc_register = (crc_register >> 8) ^ byte_table[(crc_register ^ this_byte) & 0xFF]
+        else:
+            top_byte_shift = self.WIDTH - 8
+            mask = self.MASK
+            for this_byte in data:
+                crc_register = ((crc_register << 8) & mask) ^ byte_table[((crc_register >> top_byte_shift) ^ this_byte) & 0xFF]
+        return crc_register
+
+    # finalize_crc: output reflection (relative to the register direction) and final xor
+    def finalize_crc(self, crc_register):
+        if self.REFLECT_OUT != self.REFLECT_IN:
+            crc_register = reflect_bits(crc_register, self.WIDTH)
+        return crc_register ^ self.XOR_OUT
+
+    # passes_check: True if the algorithm gives CHECK_VALUE for CHECK_DATA (always True without a check value)
+    def passes_check(self):
+        if self.CHECK_VALUE is None:
+            return True
+        return self.get_crc(self.CHECK_DATA) == self.CHECK_VALUE
+    # ======= CRC Calculation ==END==
+
+
+# reflect_bits: reverse the order of the lowest 'width' bits of a value
+def reflect_bits(value, width):
+    reflected_value = 0
+    for this_bit in range(width):
+        if value >> this_bit & 0x01:
+            reflected_value |= 1 << (width - 1 - this_bit)
+    return reflected_value
+
+
+# ======= Registry =START=
+CRC_ALGORITHMS = {} # name -> CrcAlgorithm
+
+def register_crc_algorithm(crc_algorithm):
+    CRC_ALGORITHMS[crc_algorithm.NAME] = crc_algorithm
+    return crc_algorithm
+
+# get_crc_algorithm: returns the registered algorithm, or None if the name is unknown
+def get_crc_algorithm(name):
+    return CRC_ALGORITHMS.get(name)
+
+# verify_crc_algorithms: returns the names of registered algorithms that don't produce their check value
+def verify_crc_algorithms():
+    return [this_name for this_name, this_algorithm in CRC_ALGORITHMS.items() if not this_algorithm.passes_check()]
+
+# - STM32 hardware crc: word feed is the peripheral/ MemoryMap_STM32 word mode, byte feed is the use_8bit_chunks_on_settings mode
+register_crc_algorithm(CrcAlgorithm("CRC-32/STM32", 32, 0x04C11DB7, 0xFFFFFFFF, feed="word", word_order="little"))
+register_crc_algorithm(CrcAlgorithm("CRC-32/STM32-INVERTED", 32, 0x04C11DB7, 0xFFFFFFFF, feed="word", word_order="big"))
+register_crc_algorithm(CrcAlgorithm("CRC-32/MPEG-2", 32, 0x04C11DB7, 0xFFFFFFFF, check_value=0x0376E6E7))
+# - zlib/ ethernet crc
+register_crc_algorithm(CrcAlgorithm("CRC-32/ISO-HDLC", 32, 0x04C11DB7, 0xFFFFFFFF, reflect_in=True, reflect_out=True, xor_out=0xFFFFFFFF, check_value=0xCBF43926))
+# - CRC-16/CCITT family
+register_crc_algorithm(CrcAlgorithm("CRC-16/CCITT-FALSE", 16, 0x1021, 0xFFFF, check_value=0x29B1))
+register_crc_algorithm(CrcAlgorithm("CRC-16/XMODEM", 16, 0x1021, 0x0000, check_value=0x31C3))
+register_crc_algorithm(CrcAlgorithm("CRC-16/KERMIT", 16, 0x1021, 0x0000, reflect_in=True, reflect_out=True, check_value=0x2189))
+# ======= Registry ==END==
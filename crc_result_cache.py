@@ -0,0 +1,139 @@
+# crc_result_cache.py
+# - Persistent on-disk cache of crc results for firmware files that have already been imported
+# - Entries are keyed by a hash of the file contents plus a fingerprint of the product layout (page ranges, crc addresses),
+# -- so a renamed/copied file still hits, and a layout change never returns stale results.
+
+# Module Imports
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+# CrcResultCache Class: stores one result file (*.json) and optionally one memory map snapshot (*.snapshot) per entry
+# - The total size of the cache directory is bounded, least recently used entries are removed first
+# -- (the modification time of the result file is the 'last used' time, it is updated on every hit)
+class CrcResultCache():
+    def __init__(self, cache_directory, max_size_bytes=64*1024*1024, store_memory_snapshots=True, parent=None):
+        self.cache_directory = cache_directory
+        self.max_size_bytes = max_size_bytes
+        self.store_memory_snapshots = store_memory_snapshots
+        # File Properties
+        self.RESULT_FILE_EXTENSION = ".json"
+        self.SNAPSHOT_FILE_EXTENSION = ".snapshot"
+        self.TEMPORARY_FILE_EXTENSION = ".tmp"
+        self.HASH_READ_CHUNK_SIZE = 0x100000
+        self.CACHE_FORMAT_VERSION = 1 # change this if the entry format changes, old entries will simply miss
+
+    # ======= Keys =START=
+    # get_file_content_hash: sha256 of the file contents (returns empty string if the file can't be read)
+    def get_file_content_hash(self, file_path):
+        content_hash = hashlib.sha256()
+        try:
+            with open(file_path, "rb") as file_target:
+                file_chunk = file_target.read(self.HASH_READ_CHUNK_SIZE)
+                while file_chunk:
+                    content_hash.update(file_chunk)
+                    file_chunk = file_target.read(self.HASH_READ_CHUNK_SIZE)
+        except (IOError, OSError):
+            return ""
+        return content_hash.hexdigest()
+
+    # get_key: cache key for a file and product layout (returns empty string if the file can't be read)
+    # - the file extension is part of the key, because .bin files are placed at a different offset than hex files
+    def get_key(self, file_path, layout_fingerprint):
+        content_hash = self.get_file_content_hash(file_path)
+        if not content_hash:
+            return ""
+        file_extension = os.path.splitext(file_path)[1].lower()
+        key_source = "{}|{}|{}|{}".format(self.CACHE_FORMAT_VERSION, layout_fingerprint, file_extension, content_hash)
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def get_result_file_path(self, key):
+        return os.path.join(self.cache_directory, key + self.RESULT_FILE_EXTENSION)
+
+    def get_snapshot_file_path(self, key):
+        return os.path.join(self.cache_directory, key + self.SNAPSHOT_FILE_EXTENSION)
+    # ======= Keys ==END==
+
+    # ======= Load/ Store =START=
+    # load: returns (result dictionary, memory snapshot bytes or None) for a key, or (None, None) on a miss
+    def load(self, key):
+        if not key:
+            return None, None
+        result_file_path = self.get_result_file_path(key)
+        try:
+            with open(result_file_path, "r") as file_target:
+                result = json.load(file_target)
+        except (IOError, OSError, ValueError):
+            return None, None
+        memory_snapshot = None
+        if result.get("has_memory_snapshot"):
+            try:
+                with open(self.get_snapshot_file_path(key), "rb") as file_target:
+                    memory_snapshot = zlib.decompress(file_target.read())
+            except (IOError, OSError, zlib.error):
+                return None, None # snapshot is missing or corrupt, treat as a miss so the file is parsed again
+        # - mark entry as recently used
+        try:
+            os.utime(result_file_path, None)
+        except OSError:
+            pass
+        return result, memory_snapshot
+
+    # store: save a result dictionary (and an optional memory snapshot) for a key, then enforce the size limit
+    # - files are written to a temporary name and renamed, so parallel processes never read half written entries
+    def store(self, key, result, memory_snapshot=None):
+        if not key:
+            return
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            result = dict(result)
+            result["has_memory_snapshot"] = bool(self.store_memory_snapshots and memory_snapshot is not None)
+            if result["has_memory_snapshot"]:
+                self.write_file_atomic(self.get_snapshot_file_path(key), zlib.compress(bytes(memory_snapshot)))
+            self.write_file_atomic(self.get_result_file_path(key), json.dumps(result).encode("utf-8"))
+        except (IOError, OSError):
+            return # a cache that can't be written is just a cache that misses
+        self.evict_entries()
+
+    def write_file_atomic(self, file_path, file_data):
+        # - the temporary file is unique per process and thread (gui import workers share one cache)
+        temporary_file_path = file_path + "." + str(os.getpid()) + "_" + str(threading.get_ident()) + self.TEMPORARY_FILE_EXTENSION
+        with open(temporary_file_path, "wb") as file_target:
+            file_target.write(file_data)
+        os.replace(temporary_file_path, file_path)
+
+    # evict_entries: remove least recently used entries until the cache fits in max_size_bytes
+    def evict_entries(self):
+        entries = {} # key -> [last used time, size in bytes]
+        try:
+            file_names = os.listdir(self.cache_directory)
+        except OSError:
+            return
+        for this_file_name in file_names:
+            key, file_extension = os.path.splitext(this_file_name)
+            if file_extension not in (self.RESULT_FILE_EXTENSION, self.SNAPSHOT_FILE_EXTENSION):
+                continue
+            try:
+                file_status = os.stat(os.path.join(self.cache_directory, this_file_name))
+            except OSError:
+                continue
+            entry = entries.setdefault(key, [0, 0])
+            entry[1] += file_status.st_size
+            if file_extension == self.RESULT_FILE_EXTENSION:
+                entry[0] = file_status.st_mtime
+        total_size_bytes = sum(this_entry[1] for this_entry in entries.values())
+        for key in sorted(entries, key=lambda this_key: entries[this_key][0]):
+            if total_size_bytes <= self.max_size_bytes:
+                break
+            self.remove_entry(key)
+            total_size_bytes -= entries[key][1]
+
+    def remove_entry(self, key):
+        for this_file_path in (self.get_result_file_path(key), self.get_snapshot_file_path(key)):
+            try:
+                os.remove(this_file_path)
+            except OSError:
+                pass
+    # ======= Load/ Store ==END==
@@ -0,0 +1,128 @@
+# crc_stream_verifier.py
+# - Calculates the crcs of a firmware image while it is being read, without building a memory map of the whole rom
+# - Implements the part of the MemoryMap_STM32_64kB interface that HexFileInClass uses (init_memory_map, write_data_to_rom),
+# -- so it can be assigned as memory_map_out of a HexFileInClass and fed by the existing hex/bin parsers
+from crc32_stm32_zlib import crc32_stm32_zlib
+from crc32_stm32_native import crc32_stm32_native
+
+# default crc engine: the compiled library when it is built, otherwise zlib (same results)
+crc32_stream_engine = crc32_stm32_native if crc32_stm32_native is not None else crc32_stm32_zlib
+
+# CrcStreamVerifier Class: one running crc per configured region
+# - data must arrive in address order, addresses that are skipped are filled with the erase value (0xFF)
+# - the stored crc words (4 bytes, little-endian) are captured as the data passes their address
+# - if data arrives out of order (lower address than data already seen), the stream stops and records_in_order is cleared,
+# -- the caller then has to use the memory map path instead (see Product_P21Odp_MemoryMap.import_firmware_file_streaming)
+class CrcStreamVerifier():
+    # crc_regions: list of (calc start address, calc end address (exclusive), stored crc address) in offset addressing (0x0000)
+    def __init__(self, crc_regions, processor_rom_size=0x10000, use_8bit_chunks_on_settings=False, crc_tables=crc32_stream_engine, parent=None):
+        self.crc_regions = list(crc_regions)
+        self.use_8bit_chunks_on_settings = use_8bit_chunks_on_settings
+        self.crc_tables = crc_tables
+        # Processor Properties (same names as MemoryMap_STM32_64kB, HexFileInClass uses them to translate linear addresses)
+        self.PROCESSOR_ROM_SIZE = processor_rom_size
+        self.BASE_ROM_START_ADDRESS_DATASHEET = 0x08000000
+        self.BASE_ROM_END_ADDRESS_DATASHEET = self.BASE_ROM_START_ADDRESS_DATASHEET + self.PROCESSOR_ROM_SIZE
+        self.BASE_ROM_ADDRESS = 0x00000000
+        self.ROM_END_ADDRESS = self.BASE_ROM_ADDRESS + self.PROCESSOR_ROM_SIZE
+        self.SUPPORTS_ABSOLUTE_ADDRESSES = False
+        # Checksum Properties
+        self.ROM_CRC32_INIT_VALUE = 0xFFFFFFFF
+        self.ERASED_VALUE = 0xFF
+        self.CHECKSUM_LENGTH_BYTES = 4
+        self.ERASED_BLOCK_SIZE = 0x800 # gaps are filled from one preallocated block of erased bytes
+        self.erased_block = bytes([self.ERASED_VALUE])*self.ERASED_BLOCK_SIZE
+        # - word mode always consumes whole words (a partial last word is read past the region end, like the memory map)
+        if not self.use_8bit_chunks_on_settings:
+            self.crc_regions = [(start_address, start_address + ((end_address - start_address + 3) & ~0x03), stored_crc_address) for start_address, end_address, stored_crc_address in self.crc_regions]
+        self.stream_end_address = max([this_region[1] for this_region in self.crc_regions] + [this_region[2] + self.CHECKSUM_LENGTH_BYTES for this_region in self.crc_regions])
+
+        self.init_memory_map()
+
+    # init_memory_map: reset all running crcs (called by HexFileInClass before every import)
+    def init_memory_map(self):
+        self.next_address = self.BASE_ROM_ADDRESS # every address below next_address has been fed to the crcs
+        self.records_in_order = True
+        self.region_crc_values = [self.ROM_CRC32_INIT_VALUE]*len(self.crc_regions)
+        self.region_pending_bytes = [b""]*len(self.crc_regions) # word mode: bytes of an incomplete word
+        self.region_stored_crc_bytes = [bytearray([self.ERASED_VALUE])*self.CHECKSUM_LENGTH_BYTES for this_region in self.crc_regions]
+        self.stream_finished = False
+
+    # ======= Data Stream =START=
+    # write_data_to_rom: feeds a block of data (same interface and return value as MemoryMap_STM32_64kB.write_data_to_rom)
+    # - returns: list of failed (out of rom) address spans [(min_address, max_address), ...]
+    def write_data_to_rom(self, rom_address_offset, data):
+        start_address = rom_address_offset
+        end_address = rom_address_offset + len(data) # Exclusive
+        write_start_address = max(start_address, self.BASE_ROM_ADDRESS)
+        write_end_address = min(end_address, self.ROM_END_ADDRESS)
+        failed_address_spans = []
+        if write_start_address >= write_end_address:
+            if end_address > start_address:
+                failed_address_spans.append((start_address, end_address - 1))
+            return failed_address_spans
+        if start_address < write_start_address:
+            failed_address_spans.append((start_address, write_start_address - 1))
+        if end_address > write_end_address:
+            failed_address_spans.append((write_end_address, end_address - 1))
+        # Feed the stream
+        if write_start_address < self.next_address or self.stream_finished:
+            self.records_in_order = False
+        if self.records_in_order:
+            self.fill_erased_addresses(write_start_address)
+            self.feed_data(write_start_address, data[write_start_address - start_address:write_end_address - start_address])
+        return failed_address_spans
+
+    # fill_erased_addresses: feed the erase value from next_address up to (not including) end_address
+    def fill_erased_addresses(self, end_address):
+        while self.next_address < end_address:
+            fill_length = min(end_address - self.next_address, self.ERASED_BLOCK_SIZE)
+            self.feed_data(self.next_address, memoryview(self.erased_block)[:fill_length])
+
+    # feed_data: pass the part of a block that overlaps each region to that region's crc, and capture stored crc bytes
+    def feed_data(self, start_address, data):
+        end_address = start_address + len(data)
+        for this_region_index, (region_start_address, region_end_address, stored_crc_address) in enumerate(self.crc_regions):
+            # - crc calculation range
+            overlap_start_address = max(start_address, region_start_address)
+            overlap_end_address = min(end_address, region_end_address)
+            if overlap_start_address < overlap_end_address:
+                self.update_region_crc(this_region_index, data[overlap_start_address - start_address:overlap_end_address - start_address])
+            # - stored crc
+            overlap_start_address = max(start_address, stored_crc_address)
+            overlap_end_address = min(end_address, stored_crc_address + self.CHECKSUM_LENGTH_BYTES)
+            if overlap_start_address < overlap_end_address:
+                self.region_stored_crc_bytes[this_region_index][overlap_start_address - stored_crc_address:overlap_end_address - stored_crc_address] = data[overlap_start_address - start_address:overlap_end_address - start_address]
+        self.next_address = end_address
+
+    def update_region_crc(self, region_index, data):
+        if self.use_8bit_chunks_on_settings:
+            self.region_crc_values[region_index] = self.crc_tables.get_crc32_byte_mode(data, self.region_crc_values[region_index])
+            return
+        # word mode: only whole words are fed, the remainder waits for the next block
+        pending_bytes = self.region_pending_bytes[region_index]
+        if pending_bytes:
+            data = pending_bytes + bytes(data)
+        word_length = len(data) & ~0x03
+        self.region_crc_values[region_index] = self.crc_tables.get_crc32_word_mode(data[:word_length], self.region_crc_values[region_index])
+        self.region_pending_bytes[region_index] = bytes(data[word_length:])
+
+    # finish_stream: fill the rest of every region with the erase value (call once, after the last block)
+    def finish_stream(self):
+        if self.records_in_order and not self.stream_finished:
+            self.fill_erased_addresses(self.stream_end_address)
+        self.stream_finished = True
+    # ======= Data Stream ==END==
+
+    # ======= Results =START=
+    # get_crc_values: returns a list of (stored crc, calculated crc) per region, or None if the stream could not be used
+    def get_crc_values(self):
+        if not self.records_in_order:
+            return None
+        self.finish_stream()
+        crc_values = []
+        for this_region_index in range(len(self.crc_regions)):
+            stored_crc_value = int.from_bytes(self.region_stored_crc_bytes[this_region_index], "little")
+            crc_values.append((stored_crc_value, self.region_crc_values[this_region_index]))
+        return crc_values
+    # ======= Results ==END==
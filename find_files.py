@@ -92,6 +92,18 @@ def get_hex_directory():
         HEX_DIR = DIR + "hex/"
     return HEX_DIR
 
+def get_cache_directory():
+    # ========== Project Configuration Constants =================
+    if 'darwin' in sys.platform.lower():
+        CACHE_DIR_BASE = get_mac_working_directory()
+        CACHE_DIR = CACHE_DIR_BASE + "cache/"
+    else:
+        DIR = get_main_dir()
+        if DIR:
+            DIR += '/'
+        CACHE_DIR = DIR + "cache/"
+    return CACHE_DIR
+
 def get_icon_path():
     icon_name = "r_icon.png"
     dir_path = get_images_directory()
@@ -0,0 +1,51 @@
+# firmware_files.py
+# - Firmware file helpers shared by the GUI (central_widget.py) and the command line tool (p21_checksum.py)
+# - No GUI or argparse imports, so both front ends can use it
+import os
+
+FIRMWARE_FILE_EXTENSIONS = (".hex", ".hxf", ".bin")
+
+
+# is_firmware_file_path: True if the file name has one of the FIRMWARE_FILE_EXTENSIONS
+def is_firmware_file_path(file_path):
+    return file_path.lower().endswith(FIRMWARE_FILE_EXTENSIONS)
+
+# find_firmware_files: walks a directory tree and returns all firmware files (sorted, so output order is repeatable)
+def find_firmware_files(directory):
+    firmware_file_paths = []
+    for this_directory, directory_names, file_names in os.walk(directory):
+        directory_names.sort()
+        for this_file_name in sorted(file_names):
+            if is_firmware_file_path(this_file_name):
+                firmware_file_paths.append(os.path.join(this_directory, this_file_name))
+    return firmware_file_paths
+
+# get_fixed_output_path: path of the corrected file for file_path
+# - output_directory: directory for the corrected files (default: next to the original)
+# - output_format: "same" keeps the extension, "hex"/"bin" converts
+# - search_directory: directory file_path was found in (fix command), its sub directories are mirrored under output_directory
+# -- so files with the same name in different sub directories don't get the same output path
+def get_fixed_output_path(file_path, output_directory=None, suffix="_fixed", output_format="same", search_directory=None):
+    file_root, file_extension = os.path.splitext(os.path.basename(file_path))
+    if output_format != "same":
+        file_extension = "." + output_format
+    if not output_directory:
+        output_directory = os.path.dirname(file_path)
+    elif search_directory:
+        relative_directory = os.path.relpath(os.path.dirname(file_path), search_directory)
+        if relative_directory != os.curdir:
+            output_directory = os.path.join(output_directory, relative_directory)
+    return os.path.join(output_directory, file_root + suffix + file_extension)
+
+# is_same_file_path: True if two paths name the same file (compared as absolute paths, so the file doesn't have to exist)
+def is_same_file_path(file_path, other_file_path):
+    return os.path.normcase(os.path.abspath(file_path)) == os.path.normcase(os.path.abspath(other_file_path))
+
+# get_duplicate_output_paths: output paths that more than one input file would be written to
+# - returns: dictionary of output path -> input paths (empty if every output path is unique)
+def get_duplicate_output_paths(file_paths, output_paths):
+    input_paths_by_output_path = {}
+    for this_file_path, this_output_path in zip(file_paths, output_paths):
+        output_key = os.path.normcase(os.path.abspath(this_output_path))
+        input_paths_by_output_path.setdefault(output_key, []).append(this_file_path)
+    return {this_output_path: these_file_paths for this_output_path, these_file_paths in input_paths_by_output_path.items() if len(these_file_paths) > 1}
@@ -0,0 +1,99 @@
+# firmware_import_worker.py
+# - Runs firmware file imports (parse + crc calculation) on a QThreadPool thread, so the GUI stays responsive
+# - Progress and results are posted back to the GUI thread through Qt signals (queued connections)
+# - Workers are threads, parsing holds the GIL: several workers keep the GUI responsive but don't parse files in parallel
+
+# Module Imports
+try:
+    import PySide2
+    from pyqtgraph.Qt import QtCore
+except:
+    try:
+        import PyQt5
+        from pyqtgraph.Qt import QtCore
+    except:
+        import PyQt4 # Force pyqtgraph to use PyQt4 (and not PySide)
+        from pyqtgraph.Qt import QtCore
+import time
+import traceback
+
+
+# FirmwareImportSignals Class: signals of a FirmwareImportWorker (QRunnable is not a QObject, so it can't own signals)
+# - progress(file_path, stage): stage is one of the product IMPORT_STAGE_* strings
+# - finished(file_path, status_code, crc_results): crc_results is the product get_crc_results() dictionary, or None if the import failed/was cancelled
+# -- (status_code: IMPORT_* code of HexFileInClass, or a FIX_ERROR_* code of the product for fix jobs)
+class FirmwareImportSignals(QtCore.QObject):
+    progress = QtCore.Signal(str, str)
+    finished = QtCore.Signal(str, int, object)
+
+
+# FirmwareImportWorker Class: imports one firmware file in to a product (Product_P21Odp_MemoryMap) on a worker thread
+# - the product must not be used by another thread until 'finished' has been emitted
+# - the outcome is also kept on the worker (is_finished, status_code, crc_results, elapsed_time_s),
+# -- so a receiver that runs many workers for the same path can tell them apart
+class FirmwareImportWorker(QtCore.QRunnable):
+    # - fix_output_path: if set, the crcs are fixed and the corrected file is written to this path (see fix_firmware_file)
+    def __init__(self, product, file_path, use_streaming_import=False, fix_output_path=None):
+        super(FirmwareImportWorker, self).__init__()
+        self.product = product
+        self.file_path = file_path
+        self.use_streaming_import = use_streaming_import
+        self.fix_output_path = fix_output_path
+        self.signals = FirmwareImportSignals()
+        self.cancel_requested = False
+        self.is_finished = False
+        self.status_code = self.product.hex_file_in.IMPORT_CANCELLED
+        self.crc_results = None
+        self.write_errors_detected = False
+        self.elapsed_time_s = 0.0
+        # - a cancel of an earlier job must not stop this one, a cancel of this job stops it at any point (even before parsing starts)
+        self.product.clear_import_cancel()
+
+    # cancel: stop the import as soon as possible (called from the GUI thread)
+    def cancel(self):
+        self.cancel_requested = True
+        self.product.request_import_cancel()
+
+    def run(self):
+        status_code = self.product.hex_file_in.IMPORT_CANCELLED
+        crc_results = None
+        start_time = time.perf_counter()
+        try:
+            if not self.cancel_requested:
+                self.product.assign_progress_callback(self.report_progress)
+                if self.fix_output_path:
+                    status_code = self.product.fix_firmware_file(self.file_path, self.fix_output_path)
+                elif self.use_streaming_import:
+                    status_code = self.product.import_firmware_file_streaming(self.file_path)
+                else:
+                    status_code = self.product.import_firmware_file(self.file_path)
+                if self.cancel_requested:
+                    status_code = self.product.hex_file_in.IMPORT_CANCELLED
+                if status_code == self.product.hex_file_in.IMPORT_SUCCESS:
+                    crc_results = self.product.get_crc_results()
+                    self.write_errors_detected = self.product.hex_file_in.write_errors_detected()
+        except Exception:
+            traceback.print_exc()
+            status_code = self.product.hex_file_in.IMPORT_ERROR_FILE_READ
+        finally:
+            self.product.assign_progress_callback(None)
+            self.elapsed_time_s = time.perf_counter() - start_time
+            self.status_code = status_code
+            self.crc_results = crc_results
+            self.is_finished = True
+            self.signals.finished.emit(self.file_path, status_code, crc_results)
+
+    def report_progress(self, stage):
+        self.signals.progress.emit(self.file_path, stage)
+
+
+# start_firmware_import: queue an import on the global thread pool
+# - returns: the worker (connect to worker.signals before the worker can finish, cancel with worker.cancel())
+def start_firmware_import(product, file_path, progress_cb=None, finished_cb=None, use_streaming_import=False, fix_output_path=None):
+    worker = FirmwareImportWorker(product, file_path, use_streaming_import=use_streaming_import, fix_output_path=fix_output_path)
+    if progress_cb:
+        worker.signals.progress.connect(progress_cb)
+    if finished_cb:
+        worker.signals.finished.connect(finished_cb)
+    QtCore.QThreadPool.globalInstance().start(worker)
+    return worker
@@ -1,15 +1,11 @@
 # hex_files.py: this file contains operations to read/write/analyze hex files
 
 # Module Imports
-import time
-# - time: python 3.8 clock patch
-try:
-    time.clock() # python 3.7 and below
-except:
-    time.clock = time.perf_counter # python 3.8+
+import mmap # binary files are mapped and copied straight in to the memory map
+# - timing of the import/export stages: see benchmark_checksum.py
 
 # Local Backend Imports
-from app_configuration import app_config
+# - note: this module is used by the headless command line tool (p21_checksum.py), keep it free of GUI imports
 
 # IntelHexFileProperties: Class containing basic functions and properties for interpreting Intel Hex Files.
 class IntelHexFileProperties():
@@ -38,6 +34,19 @@ class IntelHexFileProperties():
                 string_buffer = ""
         return return_list
 
+    # convert_line_string_to_bytes: faster version of convert_line_string_to_list_of_integers, decodes a whole line in one call
+    # - receives: one line of hex file (as string, with or without the colon and line ending)
+    # - returns: bytes object (empty if the line contains characters that are not hexadecimal)
+    def convert_line_string_to_bytes(self, line_string):
+        try:
+            return bytes.fromhex(line_string.replace(":", ""))
+        except ValueError:
+            return b""
+
+    # line_checksum_is_valid: the sum of all bytes in a record (including the checksum byte) must be 0 (mod 256)
+    def line_checksum_is_valid(self, line_bytes):
+        return (sum(line_bytes) & 0xFF) == 0
+
     def convert_u32_to_list_of_u8s(self, value_u32):
         return_list = []
         # Big Endian
@@ -63,6 +72,18 @@ class HexFileInClass():
         self.START_VALUE_WRITE_FAIL_ADDRESS_MAX = -1
 
         self.MIN_LINE_LENGTH = 8
+        # Import Status Codes
+        self.IMPORT_SUCCESS = 0
+        self.IMPORT_ERROR_FILE_OPEN = 1
+        self.IMPORT_ERROR_FILE_READ = 2
+        self.IMPORT_CANCELLED = 3
+        # - cancellation: set from another thread (request_import_cancel), checked before parsing starts and between hex file lines
+        # -- cleared by clear_import_cancel when a new import job is set up (not by import_firmware_file, so an early cancel is not lost)
+        self.import_cancel_requested = False
+        # - line decoder: fast decoder (bytes.fromhex) by default, legacy decoder kept for differential testing
+        self.use_fast_line_decoder = True
+        # - binary files: mapped in to memory (mmap) by default, read in one piece if mapping is not possible (empty file, pipes)
+        self.use_mapped_binary_import = True
         self.init_base_address()
 
     # assign_memory_map_out: allows a parent class to assign a virtual memory map to place hex file interpreted data into
@@ -72,6 +93,7 @@ class HexFileInClass():
     # init_base_address: initialize any memory properties specific to the processor being used
     def init_base_address(self): # Base Address is used to allow hex files to address 32-bit address space (while only putting 16-bit address in each file line)
         self.base_address = 0x0000
+        self.base_address_outside_of_rom = False # set by extended linear address records outside of the flash window (data records then fail)
         self.write_failure_address_min = self.START_VALUE_WRITE_FAIL_ADDRESS_MIN # less than 0
         self.write_failure_address_max = self.START_VALUE_WRITE_FAIL_ADDRESS_MAX # max value that is still an s32 (not 'long')
         if self.MEMORY_MAP_OUT_MODE == self.MEMORY_MAP_OUT_MODE_CLEAR_FIRST:
@@ -84,29 +106,41 @@ class HexFileInClass():
 
     # ======= File Operations =START=
     # import_firmware_file: main routine that opens, and triggers the interpretation of a hex file
+    # - returns: IMPORT_SUCCESS, IMPORT_ERROR_* if the file could not be opened/read, or IMPORT_CANCELLED (request_import_cancel)
     def import_firmware_file(self, file_path, binary_start_address=0): # parse the file, return the sound data and the constant
         self.file_path = file_path
+        if self.import_cancel_requested:
+            self.display_message("firmware file import cancelled.")
+            return self.IMPORT_CANCELLED
+        status_code = self.IMPORT_SUCCESS
 
         # parse the file
-        file_extension = self.file_path[-4:]
+        file_extension = self.file_path[-4:].lower()
         # - binary files
         if file_extension == ".bin":
             self.target = self.open_binary_file_for_load()
             if not self.target: # if file did not open properly exit the routine
                 print("no target...")
-                return
-            # print("parsing binary file: " + str(time.clock()))
-            self.parse_binary_file(binary_start_address=binary_start_address)
+                return self.IMPORT_ERROR_FILE_OPEN
+            status_code = self.parse_binary_file(binary_start_address=binary_start_address)
         # - hex/text based files
         else:
             self.target = self.open_file_for_load()
             if not self.target: # if file did not open properly exit the routine
                 # print("no target...")
-                return
-            # print("parsing hex file: " + str(time.clock()))
-            self.parse_hex_file() # hex files define address specifically, and do not need an offset parameter
-        # print("done parsing: " + str(time.clock()))
+                return self.IMPORT_ERROR_FILE_OPEN
+            status_code = self.parse_hex_file() # hex files define address specifically, and do not need an offset parameter
         self.close_file(self.target)
+        return status_code
+
+    # request_import_cancel: stops a running import after the current hex file line (safe to call from another thread)
+    # - the memory map is left partially filled, the import returns IMPORT_CANCELLED
+    def request_import_cancel(self):
+        self.import_cancel_requested = True
+
+    # clear_import_cancel: called when a new import job is set up (before it is started), so the next import runs to completion
+    def clear_import_cancel(self):
+        self.import_cancel_requested = False
 
     # close_file: closes file target objects for use by other applications
     def close_file(self, file_target):
@@ -155,21 +189,38 @@ class HexFileInClass():
         except IOError:
             return False
 
+    # map_binary_file: maps the open binary file in to memory (read only), contents are paged in as they are copied
+    # - returns: mmap object, or None if the file can't be mapped (mmap refuses empty files)
+    def map_binary_file(self):
+        try:
+            return mmap.mmap(self.target.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return None
+
     def parse_binary_file(self, binary_start_address = 0):
         # Clear local variables used in calculations
         self.init_base_address() 
+        # Copy Contents of file directly from the mapped file in to the memory map (no intermediate copy of the file)
+        if self.use_mapped_binary_import:
+            binary_file_map = self.map_binary_file()
+            if binary_file_map is not None:
+                with binary_file_map, memoryview(binary_file_map) as binary_data:
+                    self.parse_binary_file_data(binary_data, start_address=binary_start_address)
+                return self.IMPORT_SUCCESS
         # Read Contents of file in to local variables
         binary_data = self.get_binary_data_from_target()
         if not binary_data:
             print("could not read binary data... cancelling import...")
-            return
+            return self.IMPORT_ERROR_FILE_READ
         # 
         self.parse_binary_file_data(binary_data, start_address=binary_start_address)
+        return self.IMPORT_SUCCESS
     # ======= Binary Files ==END==
 
 
     # ======= Hex Files =START=
     # parse_hex_file: reads in each line of a hex file and triggers interpretation of the contents.
+    # - returns: IMPORT_SUCCESS, or IMPORT_CANCELLED if request_import_cancel was called during the import
     def parse_hex_file(self):
         # Clear local variables used in calculations
         self.init_base_address()
@@ -177,35 +228,85 @@ class HexFileInClass():
         # Read Contents of file in to local variables
         line_buffer = self.read_line()
         while len(line_buffer):
+            if self.import_cancel_requested:
+                self.display_message("hex file import cancelled.")
+                return self.IMPORT_CANCELLED
             self.parse_hex_file_line(line_buffer)
             line_buffer = self.read_line()
         # Validate
         self.display_message("hex file import complete.")
         if self.write_errors_detected():
             self.display_message("write failures detected in address range:\n0x{:08x} - 0x{:08x}".format(self.write_failure_address_min, self.write_failure_address_max)) 
+        return self.IMPORT_SUCCESS
 
     def parse_binary_file_data(self, binary_data, start_address=0):
-        list_of_ints_data = list(binary_data)
-        self.put_data_in_memory_map(start_address, list_of_ints_data)
+        failed_write_address_spans = self.put_data_in_memory_map(start_address, binary_data)
+        self.update_write_failure_addresses(failed_write_address_spans)
 
 
     # parse_hex_file_line: interprets a single line of a hex file
     # - triggers conversion of line from string into a list of bytes
     # -- then interprets line and places in virtual memory (if virtual memory map is assigned to this instance)
     def parse_hex_file_line(self, unfiltered_line):
+        if self.use_fast_line_decoder:
+            hex_record = self.decode_hex_file_line(unfiltered_line)
+        else:
+            hex_record = self.decode_hex_file_line_legacy(unfiltered_line)
+        if hex_record:
+            record_type, address_16, line_data = hex_record
+            self.handle_hex_file_record(record_type, address_16, line_data)
+
+    # decode_hex_file_line: validates one line of a hex file and splits it in to its component parts
+    # - the whole line is converted with one bytes.fromhex call, and the checksum is validated on the bytes object
+    # - returns: (record_type, address_16, line_data) or None if the line is invalid
+    def decode_hex_file_line(self, unfiltered_line):
+        # Validate Line
+        colon_index = unfiltered_line.find(":")
+        if colon_index < 0:
+            self.display_message("invalid line: no colon. line skipped.")
+            return None
+        line_buffer = unfiltered_line[colon_index+1:].strip() # Remove new line character
+        if len( line_buffer ) < self.MIN_LINE_LENGTH:
+            self.display_message("line too short. line skipped.")
+            return None
+        line_bytes = intel_hex_properties.convert_line_string_to_bytes(line_buffer)
+        if not line_bytes:
+            self.display_message("invalid line: not hexadecimal. line skipped.")
+            return None
+        # else -> valid line
+
+        # Caclulate the expected line checksum and validate it with the line_checksum
+        if not intel_hex_properties.line_checksum_is_valid(line_bytes):
+            expected_checksum = (256 - (sum(line_bytes[:-1]) & 0xFF)) & 0xFF
+            self.display_message("WARNING: line checksum failure! " + line_buffer + " - expected " + str(expected_checksum))
+
+        # Split the Line up to to Component Parts
+        # -    :0AFDF6005301000A0048014A5EC4F0
+        byte_count = line_bytes[0]
+        address_16 = line_bytes[1]*256 + line_bytes[2]
+        record_type = line_bytes[3]
+        line_data = line_bytes[4:-1]
+        # - truncated/ padded lines are not written (their data would land at the wrong addresses, or be incomplete)
+        if byte_count != len(line_data):
+            self.display_message("invalid line: byte count " + str(byte_count) + " does not match " + str(len(line_data)) + " data bytes. line skipped. " + line_buffer)
+            return None
+        return record_type, address_16, line_data
+
+    # decode_hex_file_line_legacy: original line decoder (two characters at a time), see decode_hex_file_line
+    def decode_hex_file_line_legacy(self, unfiltered_line):
         # Validate Line
         if not ":" in unfiltered_line:
             self.display_message("invalid line: no colon. line skipped.")
-            return
+            return None
         split_line = unfiltered_line.split(":")
         if len(split_line) < 2:
             self.display_message("invalid line: no data after colon. line skipped")
-            return
+            return None
         line_buffer = split_line[1] # Get Data for line buffer
         line_buffer = line_buffer.replace('\n', '') # Remove new line character
         if len( line_buffer ) < self.MIN_LINE_LENGTH: 
             self.display_message("line too short. line skipped.")
-            return
+            return None
         # else -> valid line
 
         # Split the Line up to to Component Parts
@@ -222,54 +323,82 @@ class HexFileInClass():
         expected_checksum = (256 - (sum(line_buffer_list[:-1]) & 0xFF)) & 0xFF
         if line_checksum != expected_checksum:
             self.display_message("WARNING: line checksum failure! " + line_buffer + " - expected " + str(expected_checksum))
+        if byte_count != len(line_data):
+            self.display_message("invalid line: byte count " + str(byte_count) + " does not match " + str(len(line_data)) + " data bytes. line skipped. " + line_buffer)
+            return None
+        return record_type, address_16, line_data
 
+    # handle_hex_file_record: responds to one decoded hex file record
+    def handle_hex_file_record(self, record_type, address_16, line_data):
         # Message is fully validated: Respond to the incoming record based on record_type
         if record_type == intel_hex_properties.RECORD_TYPE_END_OF_FILE:
             self.display_message("end of file...")
             pass
         elif record_type == intel_hex_properties.RECORD_TYPE_START_SEGMENT_ADDRESS:
-            self.display_message("program execution start address: " + str(line_data))
+            self.display_message("program execution start address: " + str(list(line_data)))
         elif record_type == intel_hex_properties.RECORD_TYPE_EXTENDED_SEGMENT_ADDRESS:
             # print("data address (extended): " + str(line_data))
             self.base_address = 16 * (line_data[0]*256 + line_data[1])
+            self.base_address_outside_of_rom = False
                 # "This is multiplied by 16 and added to each subsequent data record address to form the starting address for the data."
                 # " This allows addressing up to one megabyte of address space."" 
         elif record_type == intel_hex_properties.RECORD_TYPE_START_LINEAR_ADDRESS:
-            self.display_message("program linear address" + str(line_data))
+            self.display_message("program linear address" + str(list(line_data)))
         elif record_type == intel_hex_properties.RECORD_TYPE_EXTENDED_LINEAR_ADDRESS:
-            self.display_message("program linear address (extended)" + str(line_data))
+            # "upper 16 bits of the 32 bit absolute address for all subsequent type 00 records"
+            # - translated once here (not per data record), so data records only add their 16-bit address
+            linear_base_address = (line_data[0]*256 + line_data[1]) << 16
+            memory_map_base_address = self.get_memory_map_address_from_linear_address(linear_base_address)
+            self.base_address_outside_of_rom = memory_map_base_address is None
+            self.base_address = linear_base_address if self.base_address_outside_of_rom else memory_map_base_address
         elif record_type == intel_hex_properties.RECORD_TYPE_DATA:
             # print("data address: " + hex(self.base_address + address_16) + " (" + str(address_16) + ")")
-            failed_write_addresses = self.put_data_in_memory_map(address_16, line_data)
-            if failed_write_addresses:
-                min_fail_address = min(failed_write_addresses)
-                max_fail_address = max(failed_write_addresses)
-                if min_fail_address < self.write_failure_address_min or self.write_failure_address_min < 0:
-                    self.write_failure_address_min = int(min_fail_address) # cast to int to force copy (not pointer)
-                elif max_fail_address > self.write_failure_address_max:
-                    self.write_failure_address_max = int(max_fail_address) # cast to int to force copy (not pointer)
+            failed_write_address_spans = self.put_data_in_memory_map(address_16, line_data)
+            self.update_write_failure_addresses(failed_write_address_spans)
     # ======= Hex Files ==END==
 
 
 
     # ======= Data and Virtual Memory =START=
     # put_data_in_memory_map
-    # - Puts a series of data into the virtual memory space
-    # -- returns a list of failed write addresses (empty list if none failed) 
+    # - Puts a series of data into the virtual memory space (one bulk write per call)
+    # -- returns a list of failed write address spans [(min_address, max_address), ...] (empty list if none failed)
     def put_data_in_memory_map(self, start_address_u16, data_list):
         # print("put " + hex(start_address_u16) + " " + str(data_list))
-        # note: incoming start_address is expected to not be adjusted to RECORD_TYPE_EXTENDED_SEGMENT_ADDRESS yet.
+        # note: incoming start_address is expected to not be adjusted to RECORD_TYPE_EXTENDED_SEGMENT_ADDRESS/ RECORD_TYPE_EXTENDED_LINEAR_ADDRESS yet.
         adjusted_start_address_u16 = start_address_u16 + self.base_address
-        write_failure_addresses = []
-        for this_data_index in range(len(data_list)):
-            # - Add data point to memory map
-            write_address = adjusted_start_address_u16 + this_data_index
-            this_data_byte = data_list[this_data_index]
-            if self.memory_map_out:
-                error_code = self.memory_map_out.write_to_rom(write_address, int(this_data_byte)) # Force a copy by casting to int
-                if error_code:
-                    write_failure_addresses.append(write_address)
-        return write_failure_addresses
+        if not self.memory_map_out:
+            return []
+        if self.base_address_outside_of_rom:
+            # - data outside of the flash window is not written to a rom only memory map, it is a write failure
+            if len(data_list):
+                return [(adjusted_start_address_u16, adjusted_start_address_u16 + len(data_list) - 1)]
+            return []
+        return self.memory_map_out.write_data_to_rom(adjusted_start_address_u16, data_list)
+
+    # get_memory_map_address_from_linear_address: translates a 32-bit address from a hex file to memory map addressing
+    # - addresses in the STM32 flash range (0x0800_0000 based) are moved to offset addressing (0x0000 based)
+    # - addresses in the offset range (0x0000 based, files that don't use ST addresses) are kept as they are
+    # - any other address (ram, option bytes) is kept as it is for memory maps with SUPPORTS_ABSOLUTE_ADDRESSES (MemoryMap_STM32_Sparse)
+    # - returns: None for other addresses on the rom only memory maps, data records at those addresses are reported as write failures
+    def get_memory_map_address_from_linear_address(self, linear_address):
+        if not self.memory_map_out:
+            return linear_address
+        if self.memory_map_out.BASE_ROM_START_ADDRESS_DATASHEET <= linear_address < self.memory_map_out.BASE_ROM_END_ADDRESS_DATASHEET:
+            return linear_address - self.memory_map_out.BASE_ROM_START_ADDRESS_DATASHEET
+        if self.memory_map_out.BASE_ROM_ADDRESS <= linear_address < self.memory_map_out.ROM_END_ADDRESS:
+            return linear_address
+        if self.memory_map_out.SUPPORTS_ABSOLUTE_ADDRESSES:
+            return linear_address
+        return None
+
+    # update_write_failure_addresses: widen the reported write failure range to include a list of failed address spans
+    def update_write_failure_addresses(self, failed_write_address_spans):
+        for min_fail_address, max_fail_address in failed_write_address_spans:
+            if min_fail_address < self.write_failure_address_min or self.write_failure_address_min < 0:
+                self.write_failure_address_min = int(min_fail_address) # cast to int to force copy (not pointer)
+            if max_fail_address > self.write_failure_address_max:
+                self.write_failure_address_max = int(max_fail_address) # cast to int to force copy (not pointer)
 
     # write_errors_detected: returns True if any memory contents read from the hex file could not be placed in the virtual memory map
     def write_errors_detected(self):
@@ -308,6 +437,11 @@ class HexFileOutClass():
         self.LINE_FILE_HEADER = ":0400000300000000F9\n" # TODO: REVIEW
         self.LINE_FILE_TAIL = ":00000001FF\n"
         self.CHARACTER_LINE_START = ":"
+        self.LINEAR_ADDRESS_SEGMENT_SIZE = 0x10000 # one extended linear address record covers 64 kB
+        # Export Modes
+        self.EXPORT_MODE_ALL_PAGES = 0 # every byte of every page in the range, 16-bit addresses (original format)
+        self.EXPORT_MODE_SKIP_EMPTY_PAGES = 1 # erased pages are left out, 32-bit addresses through extended linear address records
+        self.EXPORT_MODE = self.EXPORT_MODE_ALL_PAGES
         pass
     # ======= Initialization ==END==
 
@@ -362,14 +496,27 @@ class HexFileOutClass():
     def write_data_to_file(self, file_path, memory_map, start_address, end_address):
         pass
 
-    def write_data_pages_to_file(self, file_path, memory_map, start_page, end_page):
-        all_data = memory_map.get_data_from_page_range(start_page, end_page)
+    # write_binary_data_to_file: saves an address range of the memory map (offset addressing, end_address is exclusive) as a raw binary file
+    # - returns: 0 on success, 1 if the file could not be written
+    def write_binary_data_to_file(self, file_path, memory_map, start_address, end_address):
+        try:
+            with open(file_path, 'wb') as file_target:
+                file_target.write(memory_map.get_memoryview_for_address_range(start_address, end_address))
+        except IOError:
+            return 1
+        return 0
+
+    # write_data_pages_to_file: saves a range of pages (end_page is included) as an Intel Hex file
+    # - all records are formatted in memory and written with a single write call
+    # - export_mode: EXPORT_MODE_ALL_PAGES or EXPORT_MODE_SKIP_EMPTY_PAGES (default: self.EXPORT_MODE)
+    def write_data_pages_to_file(self, file_path, memory_map, start_page, end_page, export_mode=None):
+        if export_mode is None:
+            export_mode = self.EXPORT_MODE
+        all_data = memory_map.get_memoryview_for_page_range(start_page, end_page)
         if not all_data:
             # print("no data")
             return 2 # Memory object didn't return data
         start_offset_address = memory_map.get_offset_address_from_page_id(start_page)
-        current_offset_address = int(start_offset_address)
-        end_offset_address = memory_map.get_offset_address_from_page_id(end_page+1) # Exclusive, this value is not included
 
         # - open the file
         self.file_path = file_path
@@ -378,60 +525,70 @@ class HexFileOutClass():
             # print("no file target")
             return 1 # File didn't open return error code
 
-        # - write header line to file
-        error_code = self.write_line_to_file(file_target, self.LINE_FILE_HEADER)
-        if error_code:
-            pass
-            # print("couldn't write header")
-        # - write data lines to file
-        while current_offset_address < end_offset_address:
-            this_line_str = ""
-            this_line_list = []
-            
-            # -- add start character
-            this_line_str += self.CHARACTER_LINE_START
-            # -- add line data length
-            bytes_left = end_offset_address - current_offset_address
-            if bytes_left >= self.MAX_BYTES_PER_LINE:
-                packet_len = self.MAX_BYTES_PER_LINE
-            else:
-                packet_len = bytes_left
-            this_line_str += "{:02X}".format(packet_len)
-            this_line_list.append(packet_len)
-            # -- add line start address
-            this_line_str += "{:04X}".format(current_offset_address)
-            this_line_list.append(current_offset_address >> 8 & 0xFF)
-            this_line_list.append(current_offset_address & 0xFF)
-            # -- add record type
-            this_line_str += "{:02X}".format(intel_hex_properties.RECORD_TYPE_DATA)
-            this_line_list.append(intel_hex_properties.RECORD_TYPE_DATA)
-            # -- add line data
-            data_packet = all_data[(current_offset_address-start_offset_address):(current_offset_address-start_offset_address + packet_len)]
-            for this_index in range(len(data_packet)):
-                this_line_str += "{:02X}".format(data_packet[this_index])
-                this_line_list.append(data_packet[this_index])
-            # -- add line checksum
-            line_checksum = (256 - (sum(this_line_list) & 0xFF)) & 0xFF
-            this_line_str += "{:02X}".format(line_checksum)
-            this_line_list.append(line_checksum)
-            # -- actually write the line to the file
-            this_line_str += '\n'
-            error_code = self.write_line_to_file(file_target, this_line_str)
-
-            # - increment address in prep for the next line
-            current_offset_address += packet_len
-        # if current_offset_address != end_offset_address:
-        #     print("WARNING: current_offset_address should match end_offset_address after data write")
-
-
-        # - write tail line to file
-        error_code = self.write_line_to_file(file_target, self.LINE_FILE_TAIL)
+        # - write header, data lines and tail to file
+        if export_mode == self.EXPORT_MODE_SKIP_EMPTY_PAGES:
+            data_records = self.format_populated_page_records(memory_map, start_page, end_page)
+        else:
+            # -- 16-bit addresses, larger parts get extended linear address records above the first 64 kB
+            data_records, linear_address_upper_16 = self.format_segmented_data_records(all_data, start_offset_address, 0)
+        file_data = self.LINE_FILE_HEADER + data_records + self.LINE_FILE_TAIL
+        error_code = self.write_line_to_file(file_target, file_data)
         if error_code:
             pass
-            # print("couldn't write tail")
+            # print("couldn't write file data")
 
         self.close_file(file_target)
         return 0 # All things worked properly, return 0, for no-errors
+
+    # format_data_records: converts a block of data to data records (MAX_BYTES_PER_LINE bytes per line)
+    # - receives: data (bytes/memoryview), start_offset_address (16-bit address of the first byte)
+    # - returns: string of records, each terminated with a newline
+    def format_data_records(self, data, start_offset_address):
+        records = []
+        for this_index in range(0, len(data), self.MAX_BYTES_PER_LINE):
+            data_packet = data[this_index:this_index + self.MAX_BYTES_PER_LINE]
+            line_address = start_offset_address + this_index
+            line_header = bytes((len(data_packet), line_address >> 8 & 0xFF, line_address & 0xFF, intel_hex_properties.RECORD_TYPE_DATA))
+            line_checksum = (256 - ((sum(line_header) + sum(data_packet)) & 0xFF)) & 0xFF
+            records.append("{}{}{}{:02X}\n".format(self.CHARACTER_LINE_START, line_header.hex(), data_packet.hex(), line_checksum))
+        return "".join(records).upper()
+
+    # format_extended_linear_address_record: type 04 record, sets the upper 16 bits of the addresses of the following data records
+    def format_extended_linear_address_record(self, linear_address_upper_16):
+        line_bytes = bytes((0x02, 0x00, 0x00, intel_hex_properties.RECORD_TYPE_EXTENDED_LINEAR_ADDRESS, linear_address_upper_16 >> 8 & 0xFF, linear_address_upper_16 & 0xFF))
+        line_checksum = (256 - (sum(line_bytes) & 0xFF)) & 0xFF
+        return "{}{}{:02X}\n".format(self.CHARACTER_LINE_START, line_bytes.hex().upper(), line_checksum)
+
+    # format_populated_page_records: data records for the pages that are not empty, at their ST addresses (0x0800_0000 based)
+    # - every run of populated pages starts a new block of records, an extended linear address record is emitted
+    # -- before the first block and whenever a block crosses into the next 64 kB segment
+    def format_populated_page_records(self, memory_map, start_page, end_page):
+        records = []
+        linear_address_upper_16 = None
+        for this_start_page, this_end_page in memory_map.get_populated_page_ranges(start_page, end_page):
+            block_data = memory_map.get_memoryview_for_page_range(this_start_page, this_end_page)
+            block_address = memory_map.BASE_ROM_START_ADDRESS_DATASHEET + memory_map.get_offset_address_from_page_id(this_start_page)
+            block_records, linear_address_upper_16 = self.format_segmented_data_records(block_data, block_address, linear_address_upper_16)
+            records.append(block_records)
+        return "".join(records)
+
+    # format_segmented_data_records: data records for a block of data that may cross 64 kB segment boundaries
+    # - an extended linear address record is added whenever the upper 16 bits of the address change
+    # -- (linear_address_upper_16: upper address bits already in effect, None if no address has been set yet)
+    # - the block is split at the segment boundary (pages are aligned, so records never straddle it)
+    # - returns: (string of records, upper 16 bits in effect after the block)
+    def format_segmented_data_records(self, data, start_address, linear_address_upper_16):
+        records = []
+        data_index = 0
+        while data_index < len(data):
+            this_address = start_address + data_index
+            if this_address >> 16 != linear_address_upper_16:
+                linear_address_upper_16 = this_address >> 16
+                records.append(self.format_extended_linear_address_record(linear_address_upper_16))
+            segment_length = min(len(data) - data_index, self.LINEAR_ADDRESS_SEGMENT_SIZE - (this_address & 0xFFFF))
+            records.append(self.format_data_records(data[data_index:data_index + segment_length], this_address & 0xFFFF))
+            data_index += segment_length
+        return "".join(records), linear_address_upper_16
     # ======= File Operations - Write Data ==END==
 
 # Properties Class Instances
@@ -443,7 +600,5 @@ intel_hex_properties = IntelHexFileProperties()
 if __name__ == '__main__':
     print("hex_files.py is main application. For Testing Purposes Only!")
     # file_path = "test_hex.hex"
-    # print("start import")
-    # print(time.clock())
     # hex_file_in.import_firmware_file(file_path)
-    # print(time.clock())
+    # - for timing use: python benchmark_checksum.py
@@ -0,0 +1,294 @@
+# memory_map_sparse.py
+# - Alternative image store for large or mostly empty address spaces: only the addresses that were written are stored
+# - Implements the memory map interface used by HexFileInClass, HexFileOutClass and Product_P21Odp_MemoryMap,
+# -- so it can be used wherever a MemoryMap_STM32 is used (unwritten addresses read as the erase value 0xFF)
+# - Any 32-bit address can be written, so records outside of flash (like ram at BASE_RAM_ADDRESS) are kept instead of failing
+# -- (SUPPORTS_ABSOLUTE_ADDRESSES: HexFileInClass passes linear addresses outside of the flash window through unchanged)
+# -- the rom queries (crcs, pages, data getters) only look at the rom range, data outside of it is read with get_populated_spans
+import bisect # segment lookup by start address
+from crc32_stm32 import crc32_stm32
+from crc32_stm32_zlib import crc32_stm32_zlib
+from crc32_stm32_native import crc32_stm32_native
+from page_status import PageStatus
+from type_conversions import type_converter
+
+# crc engine for the data spans: the compiled library when it is built, otherwise zlib (same results)
+crc32_span_engine = crc32_stm32_native if crc32_stm32_native is not None else crc32_stm32_zlib
+
+# MemoryMap_STM32_Sparse Class: holds the image as sorted, coalesced segments of data
+# - segment_start_addresses[n] is the address of the first byte of segments[n] (a bytearray)
+# - segments never overlap or touch (neighbouring writes are merged in to one segment)
+# - rom_size/page_size describe the flash of the part (see STM32_DEVICES in memory_map_stm32.py), they are used for page queries
+class MemoryMap_STM32_Sparse():
+    def __init__(self, rom_size=0x10000, page_size=0x800, use_8bit_chunks_on_settings=False, parent=None):
+        # Processor Quantities
+        self.use_8bit_chunks_on_settings = use_8bit_chunks_on_settings
+        self.PROCESSOR_ROM_SIZE = rom_size
+        self.ROM_PAGE_SIZE = page_size
+        self.ROM_PAGES = self.PROCESSOR_ROM_SIZE // self.ROM_PAGE_SIZE
+        # Processor Properties
+        self.BASE_ROM_START_ADDRESS_DATASHEET = 0x08000000
+        self.BASE_ROM_END_ADDRESS_DATASHEET = self.BASE_ROM_START_ADDRESS_DATASHEET + self.PROCESSOR_ROM_SIZE
+        self.BASE_ROM_ADDRESS = 0x00000000
+        self.ROM_END_ADDRESS = self.BASE_ROM_ADDRESS + self.PROCESSOR_ROM_SIZE
+        self.BASE_RAM_ADDRESS = 0x20000000
+        self.ADDRESS_SPACE_END_ADDRESS = 0x100000000 # 32-bit address space
+        self.SUPPORTS_ABSOLUTE_ADDRESSES = True # addresses outside of rom are stored at their linear address (see HexFileInClass)
+        # ROM Checksum Parameters
+        self.ROM_CRC32_INIT_VALUE = 0xFFFFFFFF
+        self.ERASED_VALUE = 0xFF
+        # Error Codes
+        self.SUCCESS_CODE = 0
+        self.ERROR_CODE_WRITE_OUT_OF_RANGE = 1
+        self.ERROR_CODE_WRITE_VALUE = 2
+
+        self.init_memory_map()
+
+    # init_memory_map: erase the image (no segments)
+    def init_memory_map(self):
+        self.segment_start_addresses = []
+        self.segments = []
+        self.page_status = PageStatus(self.ROM_PAGES) # modified/erased page bit sets
+
+    # restore_memory_map: replace the whole rom contents (for example with a snapshot taken after an earlier import)
+    # - receives: memory_contents (PROCESSOR_ROM_SIZE bytes), modified_page_ids (list of pages to flag as 'modified')
+    def restore_memory_map(self, memory_contents, modified_page_ids):
+        self.init_memory_map()
+        for this_page_id in modified_page_ids:
+            page_start_address = this_page_id*self.ROM_PAGE_SIZE
+            self.write_data_to_rom(page_start_address, memory_contents[page_start_address:page_start_address + self.ROM_PAGE_SIZE])
+
+    # ======= Write =START=
+    # write_to_rom: writes one byte (same return codes as MemoryMap_STM32.write_to_rom)
+    def write_to_rom(self, rom_address_offset, value_u8):
+        if rom_address_offset < 0 or rom_address_offset >= self.ADDRESS_SPACE_END_ADDRESS:
+            return self.ERROR_CODE_WRITE_OUT_OF_RANGE
+        elif value_u8 > 0xFF or value_u8 < 0:
+            return self.ERROR_CODE_WRITE_VALUE
+        self.write_segment_data(rom_address_offset, bytes((value_u8,)))
+        return self.SUCCESS_CODE
+
+    # write_data_to_rom: writes a whole buffer of data (same interface as MemoryMap_STM32.write_data_to_rom)
+    # - returns: list of failed address spans [(min_address, max_address), ...] (both inclusive, empty list if nothing failed)
+    def write_data_to_rom(self, rom_address_offset, data):
+        start_address = rom_address_offset
+        end_address = rom_address_offset + len(data) # Exclusive
+        failed_address_spans = []
+        # Clip addresses outside of the 32-bit address space
+        if start_address < 0:
+            failed_address_spans.append((start_address, min(end_address, 0) - 1))
+        write_start_address = max(start_address, 0)
+        write_end_address = min(end_address, self.ADDRESS_SPACE_END_ADDRESS)
+        # Write to Segments
+        if write_start_address < write_end_address:
+            data = data[write_start_address - start_address:write_end_address - start_address]
+            try:
+                self.write_segment_data(write_start_address, bytes(data))
+            except (ValueError, TypeError):
+                # - data contains values that are not u8s, write byte by byte so the valid values are still placed
+                for this_data_index in range(len(data)):
+                    write_address = write_start_address + this_data_index
+                    if self.write_to_rom(write_address, int(data[this_data_index])):
+                        if failed_address_spans and failed_address_spans[-1][1] == write_address - 1:
+                            failed_address_spans[-1] = (failed_address_spans[-1][0], write_address)
+                        else:
+                            failed_address_spans.append((write_address, write_address))
+        if end_address > self.ADDRESS_SPACE_END_ADDRESS:
+            failed_address_spans.append((max(start_address, self.ADDRESS_SPACE_END_ADDRESS), end_address - 1))
+        return failed_address_spans
+
+    # write_segment_data: place data in the segment list, extending/merging segments that it overlaps or touches
+    # - appending to the end of a segment (the usual case for files in address order) is done in place
+    def write_segment_data(self, start_address, data):
+        if not data:
+            return
+        end_address = start_address + len(data)
+        segment_index = bisect.bisect_right(self.segment_start_addresses, start_address) - 1
+        if segment_index >= 0 and self.segment_start_addresses[segment_index] + len(self.segments[segment_index]) >= start_address:
+            # - overlaps or touches the segment before it: write in place
+            segment = self.segments[segment_index]
+            segment_offset = start_address - self.segment_start_addresses[segment_index]
+            segment[segment_offset:segment_offset + len(data)] = data
+        else:
+            segment_index += 1
+            segment = bytearray(data)
+            self.segment_start_addresses.insert(segment_index, start_address)
+            self.segments.insert(segment_index, segment)
+        # - merge following segments that are now overlapped or touched
+        segment_end_address = self.segment_start_addresses[segment_index] + len(segment)
+        next_index = segment_index + 1
+        while next_index < len(self.segments) and self.segment_start_addresses[next_index] <= segment_end_address:
+            next_end_address = self.segment_start_addresses[next_index] + len(self.segments[next_index])
+            if next_end_address > segment_end_address:
+                segment += self.segments[next_index][segment_end_address - self.segment_start_addresses[next_index]:]
+                segment_end_address = next_end_address
+            del self.segment_start_addresses[next_index]
+            del self.segments[next_index]
+        self.update_modified_pages_for_address_range(start_address, end_address)
+
+    # update_modified_pages_for_address_range: flag every rom page touched by an address range (end_address is exclusive)
+    def update_modified_pages_for_address_range(self, start_address, end_address):
+        start_address = max(start_address, self.BASE_ROM_ADDRESS)
+        end_address = min(end_address, self.ROM_END_ADDRESS)
+        if end_address <= start_address:
+            return
+        self.page_status.set_pages_modified((start_address - self.BASE_ROM_ADDRESS) // self.ROM_PAGE_SIZE, (end_address - 1 - self.BASE_ROM_ADDRESS) // self.ROM_PAGE_SIZE)
+    # ======= Write ==END==
+
+    # ======= Read =START=
+    # get_populated_spans: the stored data that overlaps an address range, in address order
+    # - returns: list of (start address, memoryview of the data) (only the part inside the range)
+    def get_populated_spans(self, start_address, end_address):
+        populated_spans = []
+        segment_index = max(bisect.bisect_right(self.segment_start_addresses, start_address) - 1, 0)
+        while segment_index < len(self.segments) and self.segment_start_addresses[segment_index] < end_address:
+            segment_start_address = self.segment_start_addresses[segment_index]
+            span_start_address = max(start_address, segment_start_address)
+            span_end_address = min(end_address, segment_start_address + len(self.segments[segment_index]))
+            if span_start_address < span_end_address:
+                populated_spans.append((span_start_address, memoryview(self.segments[segment_index])[span_start_address - segment_start_address:span_end_address - segment_start_address]))
+            segment_index += 1
+        return populated_spans
+
+    # get_data_for_address_range: contents of an address range as bytes, unwritten addresses are filled with ERASED_VALUE
+    # - the range is clipped to rom (same as the MemoryMap_STM32 memoryview), reversed ranges return no data
+    def get_data_for_address_range(self, start_address, end_address):
+        start_address = max(start_address, self.BASE_ROM_ADDRESS)
+        end_address = min(end_address, self.ROM_END_ADDRESS)
+        if end_address <= start_address:
+            return b""
+        data = bytearray([self.ERASED_VALUE])*(end_address - start_address)
+        for span_start_address, span_data in self.get_populated_spans(start_address, end_address):
+            data[span_start_address - start_address:span_start_address - start_address + len(span_data)] = span_data
+        return bytes(data)
+
+    # get_memoryview_for_address_range: same as MemoryMap_STM32 (the view is of a copy, it does not reflect later writes)
+    def get_memoryview_for_address_range(self, start_address, end_address):
+        return memoryview(self.get_data_for_address_range(start_address, end_address))
+
+    def get_memoryview_for_page_range(self, start_page, end_page):
+        return self.get_memoryview_for_address_range(start_page*self.ROM_PAGE_SIZE, min((end_page+1)*self.ROM_PAGE_SIZE, self.ROM_END_ADDRESS))
+
+    # get_u8_value_at_address: raises IndexError outside of rom (like indexing the MemoryMap_STM32 bytearray)
+    def get_u8_value_at_address(self, current_address):
+        if current_address < self.BASE_ROM_ADDRESS or current_address >= self.ROM_END_ADDRESS:
+            raise IndexError("address outside of rom: 0x{:08x}".format(current_address))
+        return self.get_data_for_address_range(current_address, current_address+1)[0]
+
+    def get_u16_value_at_address(self, current_address):
+        return int.from_bytes(self.get_data_for_address_range(current_address, current_address+type_converter.SIZE_U16_IN_BYTES), "little")
+
+    def get_u32_value_at_address(self, current_address):
+        return int.from_bytes(self.get_data_for_address_range(current_address, current_address+type_converter.SIZE_U32_IN_BYTES), "little")
+    # ======= Read ==END==
+
+    # ======= Pages =START=
+    # update_erased_pages: recalculate the erased state of the pages written since the last query (same as MemoryMap_STM32)
+    def update_erased_pages(self):
+        for this_page_id in self.page_status.get_page_ids(self.page_status.unknown_page_mask):
+            page_start_address = this_page_id*self.ROM_PAGE_SIZE
+            page_is_erased = True
+            for span_start_address, span_data in self.get_populated_spans(page_start_address, page_start_address + self.ROM_PAGE_SIZE):
+                if bytes(span_data).count(self.ERASED_VALUE) != len(span_data):
+                    page_is_erased = False
+                    break
+            self.page_status.set_page_erased(this_page_id, page_is_erased)
+
+    def page_is_empty(self, page_id):
+        if page_id < 0 or page_id >= self.ROM_PAGES:
+            return False
+        self.update_erased_pages()
+        return self.page_status.page_is_erased(page_id)
+
+    def get_empty_pages(self):
+        self.update_erased_pages()
+        return self.page_status.get_page_ids(self.page_status.erased_page_mask)
+
+    # get_populated_page_ranges: runs of neighbouring pages that are not empty [(first page id, last page id), ...]
+    def get_populated_page_ranges(self, start_page=0, end_page=None):
+        if end_page is None:
+            end_page = self.ROM_PAGES - 1
+        self.update_erased_pages()
+        return self.page_status.get_page_ranges(self.page_status.get_populated_page_mask() & self.page_status.get_page_range_mask(start_page, end_page))
+
+    def get_first_populated_page(self):
+        self.update_erased_pages()
+        return self.page_status.get_first_page(self.page_status.get_populated_page_mask())
+
+    def get_last_populated_page(self):
+        self.update_erased_pages()
+        return self.page_status.get_last_page(self.page_status.get_populated_page_mask())
+
+    def page_is_modified(self, page_id):
+        return self.page_status.page_is_modified(page_id)
+
+    def get_modified_pages(self):
+        return self.page_status.get_page_flags(self.page_status.modified_page_mask)
+
+    def get_offset_address_from_page_id(self, page_id):
+        return page_id*self.ROM_PAGE_SIZE
+    # ======= Pages ==END==
+
+    # ======= CRC =START=
+    # get_crc32_for_address_range: STM32 crc of an address range (end_address is exclusive), same results as MemoryMap_STM32
+    # - only the populated spans are fed to the crc tables, the erased gaps between them are added in one step (update_crc32_fill)
+    # - word mode consumes whole words from start_address, so spans are widened to word boundaries first
+    # - invalid ranges return the same values as MemoryMap_STM32 (0xFFFFFFFF outside of rom, the init value for empty/ reversed ranges)
+    def get_crc32_for_address_range(self, start_address, end_address):
+        if start_address < self.BASE_ROM_ADDRESS:
+            return 0xFFFFFFFF # Return default checksum value in error case
+        elif end_address > self.ROM_END_ADDRESS:
+            return 0xFFFFFFFF # Return default checksum value in error case
+        elif end_address <= start_address:
+            return self.ROM_CRC32_INIT_VALUE
+        word_mode = not self.use_8bit_chunks_on_settings
+        if word_mode:
+            end_address = start_address + ((end_address - start_address + 3) & ~0x03)
+            if end_address > self.ROM_END_ADDRESS:
+                end_address -= 4 # a partial last word at the end of rom is not read (MemoryMap_STM32 ignores it too)
+        crc32_value = self.ROM_CRC32_INIT_VALUE
+        current_address = start_address
+        for span_start_address, span_end_address in self.get_crc_spans(start_address, end_address, word_mode):
+            crc32_value = crc32_stm32.update_crc32_fill(crc32_value, self.ERASED_VALUE, span_start_address - current_address)
+            span_data = self.get_data_for_address_range(span_start_address, span_end_address)
+            if word_mode:
+                crc32_value = crc32_span_engine.get_crc32_word_mode(span_data, crc32_value)
+            else:
+                crc32_value = crc32_span_engine.get_crc32_byte_mode(span_data, crc32_value)
+            current_address = span_end_address
+        return crc32_stm32.update_crc32_fill(crc32_value, self.ERASED_VALUE, end_address - current_address)
+
+    # get_crc_spans: populated (start, end) address ranges inside a crc range, merged after widening to whole words in word mode
+    def get_crc_spans(self, start_address, end_address, word_mode):
+        crc_spans = []
+        for span_start_address, span_data in self.get_populated_spans(start_address, end_address):
+            span_end_address = span_start_address + len(span_data)
+            if word_mode:
+                span_start_address -= (span_start_address - start_address) & 0x03
+                span_end_address += (start_address - span_end_address) & 0x03
+            if crc_spans and crc_spans[-1][1] >= span_start_address:
+                crc_spans[-1] = (crc_spans[-1][0], span_end_address)
+            else:
+                crc_spans.append((span_start_address, span_end_address))
+        return crc_spans
+
+    # get_crc_for_address_range_with_algorithm: same as MemoryMap_STM32 (the erased gaps are read as 0xFF bytes)
+    def get_crc_for_address_range_with_algorithm(self, start_address, end_address, crc_algorithm):
+        if end_address <= start_address:
+            return crc_algorithm.finalize_crc(crc_algorithm.INIT_VALUE)
+        if crc_algorithm.FEED == crc_algorithm.FEED_WORD:
+            end_address = start_address + ((end_address - start_address + 3) & ~0x03)
+        if start_address < self.BASE_ROM_ADDRESS or end_address > self.ROM_END_ADDRESS:
+            return 0xFFFFFFFF # Return default checksum value in error case
+        return crc_algorithm.get_crc(self.get_data_for_address_range(start_address, end_address))
+
+    # get_crc_u32_from_page_list: crc of the pages from the first to the last page in the list (same as MemoryMap_STM32)
+    def get_crc_u32_from_page_list(self, page_id_list, ignore_last_four_bytes=False, crc_algorithm=None):
+        start_address = min(page_id_list)*self.ROM_PAGE_SIZE # inclusive
+        end_address = (max(page_id_list)+1)*self.ROM_PAGE_SIZE # exclusive
+        if ignore_last_four_bytes:
+            end_address = end_address - 4
+        if crc_algorithm is not None:
+            return self.get_crc_for_address_range_with_algorithm(start_address, end_address, crc_algorithm)
+        return self.get_crc32_for_address_range(start_address, end_address)
+    # ======= CRC ==END==
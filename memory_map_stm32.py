@@ -0,0 +1,605 @@
+# memory_map_stm32.py
+from type_conversions import type_converter
+from crc32_stm32 import crc32_stm32
+from crc32_stm32_zlib import crc32_stm32_zlib
+from crc32_stm32_native import crc32_stm32_native # None unless the compiled library was built (see build_crc32_native.py)
+from page_status import PageStatus
+
+# STM32 Devices: flash geometry of the parts used in our drives (rom size and flash page size in bytes)
+# - memory maps for these parts can be created with create_memory_map_for_device, other parts can use MemoryMap_STM32 directly
+STM32_DEVICES = {
+    "STM32F301x8": {"rom_size": 0x10000, "page_size": 0x800}, # 64 kB, 2 kB pages (P21 ODP)
+    "STM32F302xB": {"rom_size": 0x20000, "page_size": 0x800}, # 128 kB, 2 kB pages
+    "STM32F302xC": {"rom_size": 0x40000, "page_size": 0x800}, # 256 kB, 2 kB pages
+    "STM32WB55xC": {"rom_size": 0x40000, "page_size": 0x1000}, # 256 kB, 4 kB pages
+}
+
+# MemoryMap_STM32 Class:  Simulates a Processor
+# - holds a memory storage location for each rom byte
+# - allows data to be placed at those storage locations
+# - keeps track of which pages have not had data added to them since last init
+# - can calculate whether or not a page is empty.
+# - rom_size and page_size describe the part (see STM32_DEVICES), rom_size must be a multiple of page_size
+class MemoryMap_STM32():
+    def __init__(self, rom_size=0x10000, page_size=0x800, use_8bit_chunks_on_settings=False, parent=None):
+        # Processor Quantities
+        self.use_8bit_chunks_on_settings = use_8bit_chunks_on_settings
+        self.PROCESSOR_ROM_SIZE = rom_size
+        self.ROM_PAGE_SIZE = page_size
+        self.ROM_PAGES = self.PROCESSOR_ROM_SIZE // self.ROM_PAGE_SIZE
+        # Processor Properties
+        self.BASE_ROM_START_ADDRESS_DATASHEET = 0x08000000 # hex files start at address 0, but ST documentation records this address as 0x08000000
+        self.BASE_ROM_END_ADDRESS_DATASHEET = self.BASE_ROM_START_ADDRESS_DATASHEET + self.PROCESSOR_ROM_SIZE  # hex files start at address 0, but ST documentation records this address as 0x08000000
+        self.BASE_ROM_ADDRESS = 0x00000000
+        self.ROM_END_ADDRESS = self.BASE_ROM_ADDRESS + self.PROCESSOR_ROM_SIZE
+        self.BASE_RAM_ADDRESS = 0x20000000
+        self.SUPPORTS_ABSOLUTE_ADDRESSES = False # only rom is stored, data at other linear addresses is a write failure (see HexFileInClass)
+        # ROM Checksum Parameters
+        self.ROM_CRC32_INIT_VALUE = 0xFFFFFFFF
+        self.ROM_CRC32_NIBBLE_TABLE = [
+            # - This is from https://www.iar.com/support/tech-notes/general/checksum-generation/
+            0x00000000, 0x04C11DB7, 0x09823B6E, 0x0D4326D9, 0x130476DC, 0x17C56B6B, 0x1A864DB2, 0x1E475005,
+            0x2608EDB8, 0x22C9F00F, 0x2F8AD6D6, 0x2B4BCB61, 0x350C9B64, 0x31CD86D3, 0x3C8EA00A, 0x384FBDBD,
+        ]
+        # ROM Checksum Engines
+        # - nibble: original IAR tech-note routine, one method call per word (kept for cross-checking)
+        # - table: byte/slice-by-8 tables from crc32_stm32 (bit-identical results, default)
+        # - numpy: blocks of the range are calculated in parallel with numpy, then combined (requires numpy)
+        # - zlib: zlib.crc32 on bit-reversed (and word-swapped) data, see crc32_stm32_zlib.py (standard library, default without native)
+        # - native: compiled slice-by-8 library loaded with ctypes, see crc32_stm32_native.py (default when it is built and passes its self-test)
+        self.CRC_ENGINE_NIBBLE = 0
+        self.CRC_ENGINE_TABLE = 1
+        self.CRC_ENGINE_NUMPY = 2
+        self.CRC_ENGINE_ZLIB = 3
+        self.CRC_ENGINE_NATIVE = 4
+        self.CRC_ENGINES = [self.CRC_ENGINE_NIBBLE, self.CRC_ENGINE_TABLE, self.CRC_ENGINE_NUMPY, self.CRC_ENGINE_ZLIB, self.CRC_ENGINE_NATIVE]
+        self.crc_engine = self.CRC_ENGINE_NATIVE if crc32_stm32_native is not None else self.CRC_ENGINE_ZLIB
+        # - page cache: crcs of page sized pieces are kept until the page is written, region crcs are combined from them
+        # -- only pays off with the python engines (table/nibble), the zlib/native engines recalculate a whole rom faster than the pages are combined
+        self.CRC_ENGINES_WITHOUT_PAGE_CACHE = [self.CRC_ENGINE_ZLIB, self.CRC_ENGINE_NATIVE]
+        self.use_crc_page_cache = self.crc_engine not in self.CRC_ENGINES_WITHOUT_PAGE_CACHE
+        # self.SIZE_U8_IN_BYTES = 1
+        # self.SIZE_U16_IN_BYTES = 2
+        # self.SIZE_U32_IN_BYTES = 4
+        # Error Codes
+        self.SUCCESS_CODE = 0
+        self.ERROR_CODE_WRITE_OUT_OF_RANGE = 1
+        self.ERROR_CODE_WRITE_VALUE = 2
+        self.ERROR_CODE_CRC_ENGINE_UNAVAILABLE = 3
+        self.ERROR_CODE_CRC_PATCH_ADDRESS = 4
+
+        self.init_memory_map()
+
+        self.drive_app_edit_select = 1 # ENABLE_APP_CONFIG_CRC_PATCH -> TODO: Magic Number drive is 1, app is 0, variable name is unclear to function though.
+
+    # init_memory_map: erase the virtual rom
+    # - memory_map is a bytearray (one byte per rom address), memory_view is a zero-copy view of it used for reads
+    def init_memory_map(self):
+        self.page_status = PageStatus(self.ROM_PAGES) # modified/erased page bit sets
+        self.empty_page = b"\xFF"*self.ROM_PAGE_SIZE
+        self.memory_map = bytearray(b"\xFF"*self.PROCESSOR_ROM_SIZE)
+        self.memory_view = memoryview(self.memory_map)
+        self.init_crc_page_cache()
+
+    # restore_memory_map: replace the whole memory contents (for example with a snapshot taken after an earlier import)
+    # - receives: memory_contents (PROCESSOR_ROM_SIZE bytes), modified_page_ids (list of pages to flag as 'modified')
+    def restore_memory_map(self, memory_contents, modified_page_ids):
+        self.init_memory_map()
+        self.memory_map[:] = memory_contents
+        self.page_status.set_pages_unknown(self.page_status.ALL_PAGES_MASK)
+        for this_page_id in modified_page_ids:
+            self.page_status.set_pages_modified(this_page_id, this_page_id)
+
+    # init_crc_page_cache: forget all cached page crcs
+    # - page_crc_cache[page_id] holds {(start_address, end_address, use_8bit_chunks_on_settings): crc calculated with an init value of 0}
+    def init_crc_page_cache(self):
+        self.page_crc_cache = {}
+
+    def init_crc32_calculation_parameters(self):
+        self.rom_crc32_value = self.ROM_CRC32_INIT_VALUE
+        pass
+
+
+    # write_to_rom: updates memory contents
+    # receives: rom_address_offset (this routine wants the offset address like 0x0000)
+    # - Writes one byte to one virtual memory address
+    # -- Returns 0, if write was successful
+    # -- Returns 1, if write failed (out of range)
+    # -- Returns 2, if write failed (invalid value)
+    def write_to_rom(self, rom_address_offset, value_u8):
+        # if rom_address not in range(self.BASE_ROM_ADDRESS, self.ROM_END_ADDRESS): # This takes to 1-2ms to generate the large range
+        if rom_address_offset < self.BASE_ROM_ADDRESS or rom_address_offset >= self.ROM_END_ADDRESS:
+            # Handle bad addresses
+            # print("address out of range, skipping! " + hex(rom_address))
+            return self.ERROR_CODE_WRITE_OUT_OF_RANGE
+        elif value_u8 > 0xFF or value_u8 < 0:
+            # Handle data overflow
+            # print("invalid value, skipping! " + str(value_u8))
+            return self.ERROR_CODE_WRITE_VALUE
+        else:
+            # Write to Memory Contents
+            adjusted_address = rom_address_offset - self.BASE_ROM_ADDRESS
+            self.memory_map[adjusted_address] = value_u8
+            # - update flags
+            self.update_modified_pages_for_address(rom_address_offset)
+            return self.SUCCESS_CODE # Return empty list to indicate no failures
+
+    # write_data_to_rom: updates memory contents with a whole buffer of data in one step
+    # receives: rom_address_offset (this routine wants the offset address like 0x0000), data (bytes, bytearray, memoryview or list of u8s)
+    # - The range is validated once, data that falls outside of rom is clipped off (the rest is still written)
+    # - returns: list of failed address spans [(min_address, max_address), ...] (both inclusive, empty list if nothing failed)
+    def write_data_to_rom(self, rom_address_offset, data):
+        start_address = rom_address_offset
+        end_address = rom_address_offset + len(data) # Exclusive
+        # Clip out of range head and tail
+        write_start_address = max(start_address, self.BASE_ROM_ADDRESS)
+        write_end_address = min(end_address, self.ROM_END_ADDRESS)
+        if write_start_address >= write_end_address:
+            # - nothing is in range
+            if end_address > start_address:
+                return [(start_address, end_address - 1)]
+            return []
+        failed_address_spans = []
+        if start_address < write_start_address:
+            failed_address_spans.append((start_address, write_start_address - 1))
+        # Write to Memory Contents
+        data_start_index = write_start_address - start_address
+        data_end_index = write_end_address - start_address
+        adjusted_start_address = write_start_address - self.BASE_ROM_ADDRESS
+        adjusted_end_address = write_end_address - self.BASE_ROM_ADDRESS
+        try:
+            self.memory_map[adjusted_start_address:adjusted_end_address] = data[data_start_index:data_end_index]
+            self.update_modified_pages_for_address_range(write_start_address, write_end_address)
+        except (ValueError, TypeError):
+            # - data contains values that are not u8s, write byte by byte so the valid values are still placed
+            failed_address_spans += self.write_data_to_rom_by_byte(write_start_address, data[data_start_index:data_end_index])
+        if end_address > write_end_address:
+            failed_address_spans.append((write_end_address, end_address - 1))
+        return failed_address_spans
+
+    # write_data_to_rom_by_byte: slow path of write_data_to_rom, used when data contains invalid values
+    # - returns: list of failed address spans [(min_address, max_address), ...]
+    def write_data_to_rom_by_byte(self, rom_address_offset, data):
+        failed_address_spans = []
+        for this_data_index in range(len(data)):
+            write_address = rom_address_offset + this_data_index
+            if self.write_to_rom(write_address, int(data[this_data_index])):
+                if failed_address_spans and failed_address_spans[-1][1] == write_address - 1:
+                    failed_address_spans[-1] = (failed_address_spans[-1][0], write_address)
+                else:
+                    failed_address_spans.append((write_address, write_address))
+        return failed_address_spans
+
+    # # write_to_rom: updates memory contents
+    # # receives: rom_address_offset (this routine wants the offset address like 0x0000)
+    # # - Writes one byte to one virtual memory address
+    # # -- Returns 0, if write was successful
+    # # -- Returns 1, if write failed (out of range)
+    # # -- Returns 2, if write failed (invalid value)
+    # def write_to_rom_st_addressing(self, rom_address, value_u8):
+    #     rom_address_offset = rom_address - self.BASE_ROM_ADDRESS
+
+
+    # bulk_write_to_rom_st_addressing: updates memory contents using a start address and a list of data bytes
+    # - receives: rom_start_address (this routine wants the processor address like 0x08000000)
+    # - returns: status of write
+    # -- Returns 0, if write was successful
+    # -- Returns 1, if write failed (out of range)
+    # -- Returns 2, if write failed (invalid value)
+    def bulk_write_to_rom_st_addressing(self, rom_start_address, data_list):
+        status_code = self.SUCCESS_CODE # set default value for code that will be returned
+        rom_end_address = rom_start_address + len(data_list)
+        if rom_start_address < self.BASE_ROM_START_ADDRESS_DATASHEET:
+            return self.ERROR_CODE_WRITE_OUT_OF_RANGE
+            # print("warning: attempted memory map write out of bounds (low), write cancelled.")
+            # return
+        elif rom_start_address >= self.BASE_ROM_END_ADDRESS_DATASHEET:
+            return self.ERROR_CODE_WRITE_OUT_OF_RANGE
+            # print("warning: attempted memory map write out of bounds (high), write cancelled.")
+            # return
+
+        if rom_end_address > self.BASE_ROM_END_ADDRESS_DATASHEET:
+            write_length = self.BASE_ROM_END_ADDRESS_DATASHEET - rom_start_address
+            # flag as an error, but do not return yet to allow writing of data to the end of ROM
+            status_code = self.ERROR_CODE_WRITE_OUT_OF_RANGE
+            # return self.ERROR_CODE_WRITE_OUT_OF_RANGE
+            # print("warning: attempted to write out of bounds, input data truncated.")
+        else:
+            write_length = len(data_list)
+
+        # if app_config.ENABLE_APP_CONFIG_CRC_PATCH: # This seems to NOT apply to this software, all configs work properly without it.
+        #     if self.drive_app_edit_select: # Drive edit option selected
+        #         adjusted_start_address = rom_start_address - self.BASE_ROM_START_ADDRESS_DATASHEET
+        #     else: # App edit option selected
+        #         adjusted_start_address = rom_start_address #- self.BASE_ROM_START_ADDRESS_DATASHEET
+        # else:
+        adjusted_start_address = rom_start_address - self.BASE_ROM_START_ADDRESS_DATASHEET
+
+
+        # adjusted_start_address = rom_start_address - self.BASE_ROM_START_ADDRESS_DATASHEET
+        self.memory_map[adjusted_start_address:adjusted_start_address+write_length] = data_list[:write_length] # slice must match, bytearray can't be resized while memory_view exists
+        self.update_modified_pages_for_address_range(adjusted_start_address, adjusted_start_address+write_length)
+        return status_code
+
+    # bulk_read_from_rom_st_addressing: updates memory contents using a start address and a list of data bytes
+    # - receives: rom_start_address (this routine wants the processor address like 0x08000000)
+    # - receives: rom_end_address (this routine wants the processor address like 0x08000000) (exclusive, this address' contents are not returned)
+    # - returns: list of memory contents
+    # -- Returns empty list, if rom_start_address or rom_end_address is invalid
+    def bulk_read_from_rom_st_addressing(self, rom_start_address, rom_end_address):
+        if rom_start_address < self.BASE_ROM_START_ADDRESS_DATASHEET or rom_start_address >= self.BASE_ROM_END_ADDRESS_DATASHEET:
+            return []
+        elif rom_end_address < self.BASE_ROM_START_ADDRESS_DATASHEET or rom_start_address >= self.BASE_ROM_END_ADDRESS_DATASHEET: 
+            return []
+        adjusted_start_address = rom_start_address - self.BASE_ROM_START_ADDRESS_DATASHEET
+        adjusted_end_address = rom_end_address - self.BASE_ROM_START_ADDRESS_DATASHEET
+        memory_contents = list(self.memory_view[adjusted_start_address:adjusted_end_address])
+        return memory_contents
+
+    # get_memoryview_for_address_range: zero-copy access to memory contents (offset addressing like 0x0000)
+    # - receives: start_address (inclusive), end_address (exclusive)
+    # - returns: memoryview of the virtual rom (it reflects later writes, copy it with bytes() to keep a snapshot)
+    def get_memoryview_for_address_range(self, start_address, end_address):
+        start_address = max(start_address, self.BASE_ROM_ADDRESS)
+        end_address = min(end_address, self.ROM_END_ADDRESS)
+        return self.memory_view[start_address:end_address]
+
+    # get_memoryview_for_page_range: zero-copy access to the memory contents of a range of pages (end_page is included)
+    def get_memoryview_for_page_range(self, start_page, end_page):
+        return self.get_memoryview_for_address_range(start_page*self.ROM_PAGE_SIZE, (end_page+1)*self.ROM_PAGE_SIZE)
+
+
+    def copy_from_page_to_page(self, from_page_id, to_page_id):
+        print("copy! TODO: Making overwriting default settings page an option!")
+        from_page_start_address = from_page_id*self.ROM_PAGE_SIZE
+        from_page_end_address = from_page_start_address + self.ROM_PAGE_SIZE # Exclusive, this address is not included in calculation
+        to_page_start_address = to_page_id*self.ROM_PAGE_SIZE
+        to_page_end_address = to_page_start_address + self.ROM_PAGE_SIZE # Exclusive, this address is not included in calculation
+
+        self.memory_map[to_page_start_address:to_page_end_address] = self.memory_view[from_page_start_address:from_page_end_address]
+        self.update_modified_pages_for_address_range(to_page_start_address, to_page_end_address)
+
+    # Page Status
+    # - page states are kept as bit sets in page_status (see page_status.py), writes update them once per write span
+    # -- note: writes that bypass the write routines (assigning to memory_map directly) are not tracked
+    # - update_erased_pages: recalculate the erased state of the pages written since the last query (one compare per page)
+    def update_erased_pages(self):
+        for this_page_id in self.page_status.get_page_ids(self.page_status.unknown_page_mask):
+            page_start_address = this_page_id*self.ROM_PAGE_SIZE
+            page_end_address = page_start_address + self.ROM_PAGE_SIZE # Exclusive, this address is not included in calculation
+            self.page_status.set_page_erased(this_page_id, self.memory_view[page_start_address:page_end_address] == self.empty_page)
+
+    # - page_is_empty: returns true if all bits in page are of 'erased' value
+    def page_is_empty(self, page_id):
+        if page_id < 0 or page_id >= self.ROM_PAGES:
+            return False
+        self.update_erased_pages()
+        return self.page_status.page_is_erased(page_id)
+
+    # - get_empty_pages: returns a list of integer ids of the flash pages that are 'empty'
+    def get_empty_pages(self):
+        self.update_erased_pages()
+        return self.page_status.get_page_ids(self.page_status.erased_page_mask)
+
+    # - get_populated_page_ranges: groups the pages that are not empty into runs of neighbouring pages
+    # -- returns: list of (first page id, last page id) tuples (last page id is included), used by exporters to skip erased pages
+    def get_populated_page_ranges(self, start_page=0, end_page=None):
+        if end_page is None:
+            end_page = self.ROM_PAGES - 1
+        self.update_erased_pages()
+        return self.page_status.get_page_ranges(self.page_status.get_populated_page_mask() & self.page_status.get_page_range_mask(start_page, end_page))
+
+    # - get_first_populated_page/ get_last_populated_page: lowest/highest id of a page that is not empty (None if all pages are empty)
+    def get_first_populated_page(self):
+        self.update_erased_pages()
+        return self.page_status.get_first_page(self.page_status.get_populated_page_mask())
+
+    def get_last_populated_page(self):
+        self.update_erased_pages()
+        return self.page_status.get_last_page(self.page_status.get_populated_page_mask())
+
+    # - page_is_modified: returns true if any incoming data has been written to this area (ie. write_to_rom, bulk_write_to_rom_st_addressing)
+    def page_is_modified(self, page_id):
+        return self.page_status.page_is_modified(page_id)
+
+    # - get_modified_pages: returns a list with one 'modified' flag per flash page
+    def get_modified_pages(self):
+        return self.page_status.get_page_flags(self.page_status.modified_page_mask)
+
+    # - update_modified_pages_for_address: updates the 'modified' flag for a given address. 
+    # -- This should be called when virtual rom is written to (like write_to_rom and bulk_write_to_rom_st_addressing do)
+    def update_modified_pages_for_address(self, address):
+        self.update_modified_pages_for_address_range(address, address + 1)
+
+    # - update_modified_pages_for_address_range: updates the 'modified' flag for every page touched by an address range
+    # -- end_address is exclusive. Same as calling update_modified_pages_for_address for every address, but once per page.
+    def update_modified_pages_for_address_range(self, start_address, end_address):
+        if end_address <= start_address:
+            return
+        start_page_id = (start_address - self.BASE_ROM_ADDRESS) // self.ROM_PAGE_SIZE
+        end_page_id = min((end_address - 1 - self.BASE_ROM_ADDRESS) // self.ROM_PAGE_SIZE, self.ROM_PAGES - 1) # Inclusive
+        self.page_status.set_pages_modified(start_page_id, end_page_id)
+        for this_page_id in range(start_page_id, end_page_id+1):
+            self.page_crc_cache.pop(this_page_id, None) # cached crcs of these pages are no longer valid
+
+    # - get_u32_value_at_address: read a whole "word" from memory, compose it in the proper manner for crc calculation
+    def get_u8_value_at_address(self, current_address):
+        return self.memory_map[current_address]
+
+    # - get_u16_value_at_address: read a half "word" from memory, compose it in the proper manner for crc calculation
+    def get_u16_value_at_address(self, current_address):
+        # Get Data Bytes and Convert to a single integer (little-endian, see get_u32_value_at_address)
+        return int.from_bytes(self.memory_view[current_address:current_address+type_converter.SIZE_U16_IN_BYTES], "little")
+
+    # - get_u16_value_at_address: read a half "word" from memory, compose it in the proper manner for crc calculation
+    def get_i16_value_at_address(self, current_address):
+        # Get Data Bytes and Convert to a single integer (little-endian, see get_u32_value_at_address)
+        data_value_u32 = int.from_bytes(self.memory_view[current_address:current_address+type_converter.SIZE_U16_IN_BYTES], "little")
+        # Now convert into a signed value
+
+        type_converter.get_i16_value_from_u16_value(data_value_u32)
+
+        return data_value_u32
+
+    # - get_u32_value_at_address: read a whole "word" from memory, compose it in the proper manner for crc calculation
+    def get_u32_value_at_address(self, current_address):
+        # Get Data Bytes and Convert to a single integer (little-endian)
+        # - Example:
+        # -- __root const uint32_t MeerkatConfig_ClockCheck_IdealLsiCounts_u32 @ (THIS_BLOCK_ADDR) = 3788;
+        # --- hex_value of 3788 = 0x00000ecc
+        # -- hex file value: CC0E0000
+        # -- memory value: [0xcc, 0x0e, 0x00, 0x00]
+        return int.from_bytes(self.memory_view[current_address:current_address+type_converter.SIZE_U32_IN_BYTES], "little")
+
+    # - get_u32_value_at_address: read a whole "word" from memory, compose it in the proper manner for crc calculation
+    def get_u32_value_at_address_inverted(self, current_address):
+        # Get Data Bytes and Convert to a single integer (big-endian, the reverse of get_u32_value_at_address)
+        return int.from_bytes(self.memory_view[current_address:current_address+type_converter.SIZE_U32_IN_BYTES], "big")
+
+    # - get_u32_value_at_address: read a whole "word" from memory, compose it in the proper manner for crc calculation
+    def get_i32_value_at_address(self, current_address):
+        # Get Data Bytes and Convert to a single integer (little-endian, see get_u32_value_at_address)
+        data_value_u32 = int.from_bytes(self.memory_view[current_address:current_address+type_converter.SIZE_U32_IN_BYTES], "little")
+        type_converter.get_i32_value_from_u32_value(data_value_u32)
+        return data_value_u32
+
+    # update_crc32_from_data_at_address: update firmware crc calculation using a single "word" of ROM
+    def update_crc32_from_data_at_address(self, current_address):
+        # Get all data for the current u32
+        data_value_u32 = self.get_u32_value_at_address(current_address)
+        # XOR the current u32 to the existing checksum
+        self.rom_crc32_value = (self.rom_crc32_value ^ data_value_u32) & 0xFFFFFFFF
+        # Perform the required bitflip operation on each four bits for the u32 based on the polynomial
+        for this_byte_index in range(type_converter.SIZE_U32_IN_BYTES * 2): # *2 because nibble table only handles Half bytes
+            self.rom_crc32_value = ((self.rom_crc32_value << 4) ^ self.ROM_CRC32_NIBBLE_TABLE[self.rom_crc32_value >> 28 & 0x0F]) & 0xFFFFFFFF
+        # print("post update: " + hex(current_address) + ": " + hex(data_value_u32) + " -> " + hex(self.rom_crc32_value) )
+        
+    # update_crc32_from_data_at_address: update firmware crc calculation using a single "word" of ROM
+    def update_crc32_from_data_at_address_8bit_chunks(self, current_address):
+        data_value_u8 = self.get_u8_value_at_address(current_address)
+        # high nibble
+        high_index = ((self.rom_crc32_value >> 28) ^ (data_value_u8 >> 4)) & 0x0F
+        sum_high_nibble = self.rom_crc32_value << 4
+        self.rom_crc32_value = self.ROM_CRC32_NIBBLE_TABLE[high_index] ^ sum_high_nibble
+        # low nibble
+        low_index = ((self.rom_crc32_value >> 28) ^ (data_value_u8 & 0x0F)) & 0x0F
+        sum_low_nibble = self.rom_crc32_value << 4
+        self.rom_crc32_value = self.ROM_CRC32_NIBBLE_TABLE[low_index] ^ sum_low_nibble
+
+
+        # # Get all data for the current u32
+        # data_value_u32 = self.get_u32_value_at_address_inverted(current_address)
+        # # XOR the current u32 to the existing checksum
+        # self.rom_crc32_value = (self.rom_crc32_value ^ data_value_u32) & 0xFFFFFFFF
+        # # Perform the required bitflip operation on each four bits for the u32 based on the polynomial
+        # for this_byte_index in range(type_converter.SIZE_U32_IN_BYTES * 2): # *2 because nibble table only handles Half bytes
+        #     self.rom_crc32_value = ((self.rom_crc32_value << 4) ^ self.ROM_CRC32_NIBBLE_TABLE[self.rom_crc32_value >> 28 & 0x0F]) & 0xFFFFFFFF
+
+
+    # set_crc_engine: select the routine used by get_crc32_for_address_range (one of CRC_ENGINES)
+    # - returns: ERROR_CODE_CRC_ENGINE_UNAVAILABLE (and keeps the current engine) if the engine's module can't be imported
+    def set_crc_engine(self, crc_engine):
+        if crc_engine not in self.CRC_ENGINES:
+            return self.ERROR_CODE_CRC_ENGINE_UNAVAILABLE
+        if self.get_crc_engine_module(crc_engine) is None:
+            return self.ERROR_CODE_CRC_ENGINE_UNAVAILABLE
+        self.crc_engine = crc_engine
+        self.use_crc_page_cache = self.crc_engine not in self.CRC_ENGINES_WITHOUT_PAGE_CACHE
+        return self.SUCCESS_CODE
+
+    # get_crc_engine_module: returns the object that implements get_crc32_word_mode/get_crc32_byte_mode for an engine
+    # - optional backends are only imported when they are selected
+    def get_crc_engine_module(self, crc_engine):
+        if crc_engine == self.CRC_ENGINE_NUMPY:
+            try:
+                from crc32_stm32_numpy import crc32_stm32_numpy
+            except ImportError:
+                return None
+            return crc32_stm32_numpy
+        if crc_engine == self.CRC_ENGINE_ZLIB:
+            return crc32_stm32_zlib
+        if crc_engine == self.CRC_ENGINE_NATIVE:
+            return crc32_stm32_native # None if the library is not built
+        return crc32_stm32
+
+    # verify_crc_engines_for_address_range: cross-check every available engine against the nibble routine
+    # - returns: True if all engines agree on the crc for the address range
+    def verify_crc_engines_for_address_range(self, start_address, end_address):
+        selected_engine = self.crc_engine
+        self.crc_engine = self.CRC_ENGINE_NIBBLE
+        reference_crc32_value = self.get_crc32_for_address_range(start_address, end_address)
+        engines_agree = True
+        for this_engine in self.CRC_ENGINES:
+            if self.get_crc_engine_module(this_engine) is None:
+                continue
+            self.crc_engine = this_engine
+            if self.get_crc32_for_address_range(start_address, end_address) != reference_crc32_value:
+                engines_agree = False
+        self.crc_engine = selected_engine
+        return engines_agree
+
+    # get_crc32_for_address_range
+    # - Calculate a CRC Value for a specified address range, using the selected crc engine.
+    # -- End address is 'exclusive', it will not be included if end_address&0x03=0
+    # - This algorithm looks at data in four byte chunks, so end_address-start_address should be a multiple of '4'
+    def get_crc32_for_address_range(self, start_address, end_address):
+        if self.crc_engine == self.CRC_ENGINE_NIBBLE:
+            return self.get_crc32_for_address_range_nibble(start_address, end_address)
+        # Detect invalid address ranges to avoid program errors
+        if start_address < self.BASE_ROM_ADDRESS:
+            return 0xFFFFFFFF # Return default checksum value in error case
+        elif end_address > self.ROM_END_ADDRESS: # we allow 'ROM_END_ADDRESS', though it won't be included in calculation
+            return 0xFFFFFFFF # Return default checksum value in error case
+        elif end_address <= start_address:
+            return self.ROM_CRC32_INIT_VALUE
+        # Calculate the Checksum
+        # - the page cache needs every piece to hold whole words in word mode
+        word_aligned = not (start_address & 0x03) and not (end_address & 0x03)
+        if self.use_crc_page_cache and (self.use_8bit_chunks_on_settings or word_aligned):
+            return self.get_crc32_for_address_range_from_page_cache(start_address, end_address)
+        return self.get_crc32_for_address_range_from_engine(start_address, end_address, self.ROM_CRC32_INIT_VALUE)
+
+    # get_crc32_for_address_range_from_engine: run the selected crc engine over the memory contents of an address range
+    # - crc_value: value the crc starts from (ROM_CRC32_INIT_VALUE for a complete crc, 0 for a piece that will be combined)
+    def get_crc32_for_address_range_from_engine(self, start_address, end_address, crc_value):
+        crc_engine_module = self.get_crc_engine_module(self.crc_engine)
+        if self.use_8bit_chunks_on_settings:
+            data_bytes = self.memory_view[start_address:end_address]
+            return crc_engine_module.get_crc32_byte_mode(data_bytes, crc_value)
+        else:
+            # word mode always consumes whole words (a partial last word is read past end_address, like the nibble routine)
+            word_end_address = start_address + ((end_address - start_address + 3) & ~0x03)
+            data_bytes = self.memory_view[start_address:word_end_address]
+            return crc_engine_module.get_crc32_word_mode(data_bytes, crc_value)
+
+    # get_crc32_for_address_range_from_page_cache: calculate a crc by combining the crcs of each page in the address range
+    # - pages that have not been written since their crc was cached are not read again
+    def get_crc32_for_address_range_from_page_cache(self, start_address, end_address):
+        crc32_value = self.ROM_CRC32_INIT_VALUE
+        current_address = int(start_address)
+        while current_address < end_address:
+            page_id = current_address // self.ROM_PAGE_SIZE
+            piece_end_address = min(end_address, (page_id+1)*self.ROM_PAGE_SIZE)
+            piece_key = (current_address, piece_end_address, self.use_8bit_chunks_on_settings)
+            page_cache = self.page_crc_cache.setdefault(page_id, {})
+            if piece_key not in page_cache:
+                page_cache[piece_key] = self.get_crc32_for_address_range_from_engine(current_address, piece_end_address, 0)
+            crc32_value = crc32_stm32.combine_crc32(crc32_value, page_cache[piece_key], piece_end_address - current_address)
+            current_address = piece_end_address
+        return crc32_value
+
+    # get_crc32_for_address_range_nibble
+    # - Calculate a CRC Value for a specified address range, using the nibble table (one word or byte per method call).
+    # -- End address is 'exclusive', it will not be included if end_address&0x03=0
+    # - This algorithm looks at data in four byte chunks, so end_address-start_address should be a multiple of '4'
+    def get_crc32_for_address_range_nibble(self, start_address, end_address):
+        # print("\naddress range: " + hex(start_address) + "-" + hex(end_address))
+        # Detect invalid address ranges to avoid program errors
+        if start_address < self.BASE_ROM_ADDRESS:
+            # print("rom crc32 calculation: invalid start address")
+            return 0xFFFFFFFF # Return default checksum value in error case
+        elif end_address > self.ROM_END_ADDRESS: # we allow 'ROM_END_ADDRESS', though it won't be included in calculation
+            # print("rom crc32 calculation: invalid end address")
+            return 0xFFFFFFFF # Return default checksum value in error case
+        # Calculate the Checksum
+        current_address = int(start_address) # cast to int to force copy and not pointer
+        self.init_crc32_calculation_parameters()
+        while current_address < end_address: # We don't allow use of 'ROM_END_ADDRESS' in calculation (not <=, but <)
+            if self.use_8bit_chunks_on_settings:
+                self.update_crc32_from_data_at_address_8bit_chunks(current_address)
+                current_address += 1 # Update the address pointer for the next iteration
+            else:
+                self.update_crc32_from_data_at_address(current_address)
+                current_address += 4 # Update the address pointer for the next iteration
+        return int(self.rom_crc32_value & 0xFFFFFFFF) # int casting is done to return to u32 (calculation innately pushes declaration to u64)
+
+
+    # ======= CRC Forcing =START=
+    # get_crc32_patch_for_address_range: 4 bytes to write at patch_address, so the crc of the address range becomes target_crc32_value
+    # - the crc is linear, so the patch is solved directly (one crc of the range, plus a few 32x32 bit matrix products)
+    # - word mode: patch_address must be word aligned relative to start_address, byte mode: any address
+    # -- the patch must be inside the range (in word mode the range ends on the next whole word, see get_crc32_for_address_range_from_engine)
+    # - returns: bytes (4), or None if the patch address can't be used for this range
+    def get_crc32_patch_for_address_range(self, start_address, end_address, patch_address, target_crc32_value):
+        if self.use_8bit_chunks_on_settings:
+            crc_end_address = end_address
+            patch_byte_order = "big"
+        else:
+            crc_end_address = start_address + ((end_address - start_address + 3) & ~0x03)
+            patch_byte_order = "little"
+            if (patch_address - start_address) & 0x03:
+                return None
+        patch_end_address = patch_address + crc32_stm32.WORD_SIZE_IN_BYTES
+        if start_address < self.BASE_ROM_ADDRESS or crc_end_address > self.ROM_END_ADDRESS or patch_address < start_address or patch_end_address > crc_end_address:
+            return None
+        crc32_value = self.get_crc32_for_address_range(start_address, end_address)
+        patch_delta = crc32_stm32.get_crc32_patch_value(crc32_value, target_crc32_value & 0xFFFFFFFF, crc_end_address - patch_end_address)
+        current_patch_value = int.from_bytes(self.get_memoryview_for_address_range(patch_address, patch_end_address), patch_byte_order)
+        return (current_patch_value ^ patch_delta).to_bytes(crc32_stm32.WORD_SIZE_IN_BYTES, patch_byte_order)
+
+    # write_crc32_patch_for_address_range: solve the patch (see get_crc32_patch_for_address_range) and write it to rom
+    # - returns: SUCCESS_CODE, or ERROR_CODE_CRC_PATCH_ADDRESS if the patch address can't be used for this range
+    def write_crc32_patch_for_address_range(self, start_address, end_address, patch_address, target_crc32_value):
+        patch_data = self.get_crc32_patch_for_address_range(start_address, end_address, patch_address, target_crc32_value)
+        if patch_data is None:
+            return self.ERROR_CODE_CRC_PATCH_ADDRESS
+        self.write_data_to_rom(patch_address, patch_data)
+        return self.SUCCESS_CODE
+    # ======= CRC Forcing ==END==
+
+    # get_crc_for_address_range_with_algorithm: crc of an address range with an algorithm from crc_algorithms.py (CrcAlgorithm)
+    # - for regions that don't use the STM32 crc (the page cache and crc engines only serve get_crc32_for_address_range)
+    # - word feed algorithms consume whole words (a partial last word is read past end_address, like the word mode engines)
+    def get_crc_for_address_range_with_algorithm(self, start_address, end_address, crc_algorithm):
+        if end_address <= start_address:
+            return crc_algorithm.finalize_crc(crc_algorithm.INIT_VALUE)
+        if crc_algorithm.FEED == crc_algorithm.FEED_WORD:
+            end_address = start_address + ((end_address - start_address + 3) & ~0x03)
+        if start_address < self.BASE_ROM_ADDRESS or end_address > self.ROM_END_ADDRESS:
+            return 0xFFFFFFFF # Return default checksum value in error case
+        return crc_algorithm.get_crc(self.memory_view[start_address:end_address])
+
+    # get_crc_u32_from_page_list
+    # - Calculate a CRC Value for a list of pages.
+    # -- if 'ignore_last_four_bytes' is enabled, the algorithm will presume the CRC is placed in the last four bytes of the page.
+    # --- and the last four bytes will not be included in the calculation.
+    # - crc_algorithm: CrcAlgorithm to use instead of the STM32 crc (None: get_crc32_for_address_range)
+    def get_crc_u32_from_page_list(self, page_id_list, ignore_last_four_bytes=False, crc_algorithm=None):
+        start_address = min(page_id_list)*self.ROM_PAGE_SIZE # inclusive
+        end_address = (max(page_id_list)+1)*self.ROM_PAGE_SIZE # exclusive (does not include last byte)
+        if ignore_last_four_bytes:
+            end_address = end_address - 4
+
+        # print("start: " + str(hex(start_address)))
+        # print("end: " + str(hex(end_address)))
+        if crc_algorithm is not None:
+            return self.get_crc_for_address_range_with_algorithm(start_address, end_address, crc_algorithm)
+        crc32_value = self.get_crc32_for_address_range(start_address, end_address)
+        return crc32_value
+
+
+    def get_data_from_page_range(self, start_page, end_page):
+        start_address = start_page*self.ROM_PAGE_SIZE # inclusive
+        end_address = (end_page+1)*self.ROM_PAGE_SIZE # exclusive (does not include last byte)
+
+        start_address_st_addressing = start_address + self.BASE_ROM_START_ADDRESS_DATASHEET
+        end_address_st_addressing = end_address + self.BASE_ROM_START_ADDRESS_DATASHEET
+        memory_contents = self.bulk_read_from_rom_st_addressing(start_address_st_addressing, end_address_st_addressing)
+        return memory_contents
+
+    def get_offset_address_from_page_id(self, page_id):
+        offset_address = page_id*self.ROM_PAGE_SIZE
+        return offset_address
+
+    def get_st_address_from_page_id(self, page_id):
+        st_address = page_id*self.ROM_PAGE_SIZE + self.BASE_ROM_START_ADDRESS_DATASHEET
+        return st_address
+
+
+# create_memory_map_for_device: memory map with the flash geometry of a part in STM32_DEVICES
+# - returns: MemoryMap_STM32, or None if the device name is unknown
+def create_memory_map_for_device(device_name, use_8bit_chunks_on_settings=False):
+    device_properties = STM32_DEVICES.get(device_name)
+    if not device_properties:
+        return None
+    return MemoryMap_STM32(rom_size=device_properties["rom_size"], page_size=device_properties["page_size"], use_8bit_chunks_on_settings=use_8bit_chunks_on_settings)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# p21_checksum.py
+# - Headless command line tool for checking the crcs of P21 ODP firmware files (hex/hxf/bin)
+# - This file must not import any GUI modules (Qt, pyqtgraph, style sheets), so it can run on build agents without a display
+# - Usage:
+# -- python -m p21_checksum verify firmware.hex [more files...] [--json] [--streaming]
+# -- python -m p21_checksum batch firmware_releases_directory [--jobs N] [--json] [--streaming]
+# -- python -m p21_checksum fix firmware.hex [more files/directories...] [--output-dir DIRECTORY] [--suffix _fixed] [--format same|hex|bin] [--in-place] [--jobs N] [--json]
+# - Exit Codes:
+# -- 0: all stored crcs match the calculated crcs
+# -- 1: at least one crc does not match
+# -- 2: at least one file could not be read (or contained data outside of rom), or a corrected file could not be written
+
+# Module Imports
+import argparse
+import concurrent.futures # process pool for batch verification
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Local Backend Imports
+from crc_result_cache import CrcResultCache
+from firmware_files import find_firmware_files, get_duplicate_output_paths, get_fixed_output_path, is_same_file_path
+from product_properties_p21odp import create_product_p21odp
+
+EXIT_CODE_PASS = 0
+EXIT_CODE_CRC_MISMATCH = 1
+EXIT_CODE_FILE_ERROR = 2
+
+# Batch Worker: each worker process gets its own product/memory map (the module instances in product_properties_p21odp are not shared)
+batch_worker_product = None
+batch_worker_streaming = False
+
+
+# verify_firmware_file: import one file and collect its stored and calculated crcs
+# - returns: dictionary of results (see Product_P21Odp_MemoryMap.get_crc_results), plus path/status fields
+# - streaming: calculate the crcs while the file is read, without filling the memory map (see import_firmware_file_streaming)
+def verify_firmware_file(product, file_path, verbose=False, streaming=False):
+    result = {"path": file_path}
+    # backend modules report progress with print, keep stdout clean for the results
+    log_target = sys.stderr if verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(log_target):
+        if not os.path.isfile(file_path):
+            status_code = product.hex_file_in.IMPORT_ERROR_FILE_OPEN
+        elif streaming:
+            status_code = product.import_firmware_file_streaming(file_path)
+        else:
+            status_code = product.import_firmware_file(file_path)
+    if log_target is not sys.stderr:
+        log_target.close()
+
+    if status_code != product.hex_file_in.IMPORT_SUCCESS:
+        result["status"] = "error"
+        result["error"] = "could not read file"
+        return result
+    result.update(product.get_crc_results())
+    if product.hex_file_in.write_errors_detected():
+        result["status"] = "error"
+        result["error"] = "write failures detected in address range: 0x{:08x} - 0x{:08x}".format(product.hex_file_in.write_failure_address_min, product.hex_file_in.write_failure_address_max)
+    elif result["bootloader_crc_match"] and result["firmware_crc_match"]:
+        result["status"] = "pass"
+    else:
+        result["status"] = "fail"
+    return result
+
+# fix_firmware_file: import one file, write the calculated crcs in to its crc slots and save the corrected file to output_path
+# - returns: dictionary with the crc results from before the fix, the corrected crcs and path/output/status fields
+def fix_firmware_file(product, file_path, output_path, verbose=False):
+    result = {"path": file_path, "output": output_path}
+    log_target = sys.stderr if verbose else open(os.devnull, "w")
+    with contextlib.redirect_stdout(log_target):
+        if not os.path.isfile(file_path):
+            status_code = product.hex_file_in.IMPORT_ERROR_FILE_OPEN
+        else:
+            status_code = product.fix_firmware_file(file_path, output_path)
+    if log_target is not sys.stderr:
+        log_target.close()
+
+    if status_code == product.FIX_ERROR_DATA_OUTSIDE_ROM:
+        result["status"] = "error"
+        result["error"] = "write failures detected in address range: 0x{:08x} - 0x{:08x} (not fixed)".format(product.hex_file_in.write_failure_address_min, product.hex_file_in.write_failure_address_max)
+        return result
+    if status_code == product.FIX_ERROR_BOOTLOADER_IN_BIN:
+        result["status"] = "error"
+        result["error"] = "bin files start at 0x{:04x}, the bootloader pages would be lost (not fixed, use hex output)".format(product.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE)
+        return result
+    if status_code == product.FIX_ERROR_FILE_WRITE:
+        result["status"] = "error"
+        result["error"] = "could not write file"
+        return result
+    if status_code != product.hex_file_in.IMPORT_SUCCESS:
+        result["status"] = "error"
+        result["error"] = "could not read file"
+        return result
+    crc_results_before_fix = product.crc_results_before_fix
+    result.update(product.get_crc_results())
+    result["bootloader_crc_stored_before_fix"] = crc_results_before_fix["bootloader_crc_stored"]
+    result["firmware_crc_stored_before_fix"] = crc_results_before_fix["firmware_crc_stored"]
+    if crc_results_before_fix["bootloader_crc_match"] and crc_results_before_fix["firmware_crc_match"]:
+        result["status"] = "unchanged" # crcs were already correct (the file is still written)
+    else:
+        result["status"] = "fixed"
+    return result
+
+# get_exit_code_for_results: the worst status in a list of results decides the exit code
+def get_exit_code_for_results(results):
+    exit_code = EXIT_CODE_PASS
+    for this_result in results:
+        if this_result["status"] == "error":
+            return EXIT_CODE_FILE_ERROR
+        elif this_result["status"] == "fail":
+            exit_code = EXIT_CODE_CRC_MISMATCH
+    return exit_code
+
+# format_result_text: human readable version of one result (same labels as the GUI)
+def format_result_text(result):
+    lines = ["file: " + result["path"]]
+    if "bootloader_crc_stored" in result:
+        lines.append("bootloader crc (read) - " + result["bootloader_crc_stored"])
+        lines.append("bootloader crc (calc) - " + result["bootloader_crc_calc"])
+        lines.append("firmware crc (read) - " + result["firmware_crc_stored"])
+        lines.append("firmware crc (calc) - " + result["firmware_crc_calc"])
+    if "error" in result:
+        lines.append("error: " + result["error"])
+    lines.append("status: " + result["status"])
+    return "\n".join(lines)
+
+
+# create_product: product with its own memory map, using a result cache if a cache directory is given
+def create_product(cache_directory=None, cache_size_mb=64):
+    product = create_product_p21odp()
+    if cache_directory:
+        product.assign_result_cache(CrcResultCache(cache_directory, max_size_bytes=cache_size_mb*1024*1024))
+    return product
+
+# init_batch_worker: called once in each worker process
+def init_batch_worker(cache_directory=None, cache_size_mb=64, streaming=False):
+    global batch_worker_product, batch_worker_streaming
+    batch_worker_product = create_product(cache_directory, cache_size_mb)
+    batch_worker_streaming = streaming
+
+# verify_firmware_file_in_batch_worker: verify one file with the worker's own product, adding size and timing to the result
+def verify_firmware_file_in_batch_worker(file_path):
+    if batch_worker_product is None:
+        init_batch_worker()
+    start_time = time.perf_counter()
+    result = verify_firmware_file(batch_worker_product, file_path, streaming=batch_worker_streaming)
+    result["time_s"] = round(time.perf_counter() - start_time, 6)
+    try:
+        result["size"] = os.path.getsize(file_path)
+    except OSError:
+        result["size"] = -1
+    return result
+
+# fix_firmware_file_in_batch_worker: fix one file with the worker's own product, adding timing to the result
+def fix_firmware_file_in_batch_worker(file_path, output_path):
+    if batch_worker_product is None:
+        init_batch_worker()
+    start_time = time.perf_counter()
+    result = fix_firmware_file(batch_worker_product, file_path, output_path)
+    result["time_s"] = round(time.perf_counter() - start_time, 6)
+    return result
+
+# format_fix_result_line: one line summary of a fix result
+def format_fix_result_line(result):
+    if "bootloader_crc_stored" in result:
+        crc_text = "bootloader {} -> {}  firmware {} -> {}".format(result["bootloader_crc_stored_before_fix"], result["bootloader_crc_stored"], result["firmware_crc_stored_before_fix"], result["firmware_crc_stored"])
+    else:
+        crc_text = result.get("error", "")
+    return "{:9s} {:8.3f}s  {}  {} -> {}".format(result["status"], result["time_s"], crc_text, result["path"], result["output"])
+
+# format_result_line: one line summary of a result (for streaming batch output)
+def format_result_line(result):
+    if "bootloader_crc_stored" in result:
+        crc_text = "bootloader {} / {}  firmware {} / {}".format(result["bootloader_crc_stored"], result["bootloader_crc_calc"], result["firmware_crc_stored"], result["firmware_crc_calc"])
+    else:
+        crc_text = result.get("error", "")
+    return "{:5s} {:8.3f}s {:9d}  {}  {}".format(result["status"], result["time_s"], result["size"], crc_text, result["path"])
+
+
+# ======= Commands =START=
+def verify_command(arguments):
+    product = create_product(arguments.cache, arguments.cache_size_mb)
+    results = []
+    for this_file_path in arguments.files:
+        results.append(verify_firmware_file(product, this_file_path, verbose=arguments.verbose, streaming=arguments.streaming))
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("\n\n".join(format_result_text(this_result) for this_result in results))
+    return get_exit_code_for_results(results)
+
+# batch_command: verify every firmware file below a directory on a process pool, printing each result as soon as it is ready
+def batch_command(arguments):
+    firmware_file_paths = find_firmware_files(arguments.directory)
+    results = []
+    if arguments.jobs == 1:
+        init_batch_worker(arguments.cache, arguments.cache_size_mb, arguments.streaming)
+        result_iterator = (verify_firmware_file_in_batch_worker(this_file_path) for this_file_path in firmware_file_paths)
+        results = stream_batch_results(result_iterator, arguments.json)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=arguments.jobs, initializer=init_batch_worker, initargs=(arguments.cache, arguments.cache_size_mb, arguments.streaming)) as executor:
+            futures = [executor.submit(verify_firmware_file_in_batch_worker, this_file_path) for this_file_path in firmware_file_paths]
+            results = stream_batch_results((this_future.result() for this_future in concurrent.futures.as_completed(futures)), arguments.json)
+    if not arguments.json:
+        print("{} files, {} pass".format(len(results), sum(1 for this_result in results if this_result["status"] == "pass")))
+    return get_exit_code_for_results(results)
+
+# fix_command: write corrected copies of firmware files (directories are searched recursively), on a process pool
+# - with --output-dir, the sub directories of a searched directory are mirrored in the output directory,
+# -- and the command stops (EXIT_CODE_FILE_ERROR, nothing written) if two files would still get the same output path
+# - files that already end with the suffix are skipped when searching directories, so the command can be run again
+def fix_command(arguments):
+    firmware_file_paths = []
+    search_directories = [] # directory each file was found in (None for files given directly)
+    for this_path in arguments.files:
+        if os.path.isdir(this_path):
+            found_file_paths = [this_file_path for this_file_path in find_firmware_files(this_path) if not (arguments.suffix and os.path.splitext(this_file_path)[0].endswith(arguments.suffix))]
+            firmware_file_paths.extend(found_file_paths)
+            search_directories.extend([this_path]*len(found_file_paths))
+        else:
+            firmware_file_paths.append(this_path)
+            search_directories.append(None)
+    output_paths = [get_fixed_output_path(this_file_path, arguments.output_dir, arguments.suffix, arguments.format, this_search_directory) for this_file_path, this_search_directory in zip(firmware_file_paths, search_directories)]
+    # - nothing is written if a corrected file would replace its original (unless --in-place is given)
+    if not arguments.in_place:
+        in_place_file_paths = [this_file_path for this_file_path, this_output_path in zip(firmware_file_paths, output_paths) if is_same_file_path(this_file_path, this_output_path)]
+        if in_place_file_paths:
+            for this_file_path in in_place_file_paths:
+                sys.stderr.write("error: the corrected file would overwrite {} (use --in-place to allow this)\n".format(this_file_path))
+            return EXIT_CODE_FILE_ERROR
+    # - nothing is written if two files would overwrite each other's corrected file
+    duplicate_output_paths = get_duplicate_output_paths(firmware_file_paths, output_paths)
+    if duplicate_output_paths:
+        for this_output_path, these_file_paths in sorted(duplicate_output_paths.items()):
+            sys.stderr.write("error: {} would all be written to {}\n".format(", ".join(these_file_paths), this_output_path))
+        return EXIT_CODE_FILE_ERROR
+    for this_output_directory in sorted(set(os.path.dirname(this_output_path) for this_output_path in output_paths)):
+        if this_output_directory:
+            os.makedirs(this_output_directory, exist_ok=True)
+    results = []
+    if arguments.jobs == 1:
+        init_batch_worker()
+        result_iterator = (fix_firmware_file_in_batch_worker(this_file_path, this_output_path) for this_file_path, this_output_path in zip(firmware_file_paths, output_paths))
+        results = stream_batch_results(result_iterator, arguments.json, format_fix_result_line)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=arguments.jobs, initializer=init_batch_worker) as executor:
+            futures = [executor.submit(fix_firmware_file_in_batch_worker, this_file_path, this_output_path) for this_file_path, this_output_path in zip(firmware_file_paths, output_paths)]
+            results = stream_batch_results((this_future.result() for this_future in concurrent.futures.as_completed(futures)), arguments.json, format_fix_result_line)
+    if not arguments.json:
+        print("{} files, {} fixed, {} unchanged".format(len(results), sum(1 for this_result in results if this_result["status"] == "fixed"), sum(1 for this_result in results if this_result["status"] == "unchanged")))
+    return get_exit_code_for_results(results)
+
+# stream_batch_results: print results as they arrive (json lines or text lines), and collect them for the exit code
+def stream_batch_results(result_iterator, json_output, format_line_function=format_result_line):
+    results = []
+    for this_result in result_iterator:
+        if json_output:
+            print(json.dumps(this_result))
+        else:
+            print(format_line_function(this_result))
+        sys.stdout.flush()
+        results.append(this_result)
+    return results
+# ======= Commands ==END==
+
+
+# add_cache_arguments: result cache (and import) options shared by all commands
+def add_cache_arguments(parser):
+    parser.add_argument("--streaming", action="store_true", help="calculate crcs while reading the file, without building a memory map (falls back automatically for unordered files)")
+    parser.add_argument("--cache", metavar="DIRECTORY", help="reuse crc results of files that were checked before (stored in DIRECTORY)")
+    parser.add_argument("--cache-size-mb", type=int, default=64, help="size limit of the result cache (default: 64)")
+
+# get_argument_parser: command line options for all commands
+def get_argument_parser():
+    parser = argparse.ArgumentParser(prog="p21_checksum", description="P21 ODP firmware checksum tool (no GUI)")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+    # - verify
+    verify_parser = subparsers.add_parser("verify", help="print stored and calculated bootloader/firmware crcs")
+    verify_parser.add_argument("files", nargs="+", help="firmware files (*.hex, *.hxf, *.bin)")
+    verify_parser.add_argument("--json", action="store_true", help="print results as json")
+    verify_parser.add_argument("--verbose", action="store_true", help="print import progress messages to stderr")
+    add_cache_arguments(verify_parser)
+    verify_parser.set_defaults(command_function=verify_command)
+    # - batch
+    batch_parser = subparsers.add_parser("batch", help="verify every *.hex/*.hxf/*.bin file in a directory tree")
+    batch_parser.add_argument("directory", help="directory to search (searched recursively)")
+    batch_parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: cpu count)")
+    batch_parser.add_argument("--json", action="store_true", help="print one json object per line")
+    add_cache_arguments(batch_parser)
+    batch_parser.set_defaults(command_function=batch_command)
+    # - fix
+    fix_parser = subparsers.add_parser("fix", help="write corrected copies of firmware files (calculated crcs stored in the crc slots)")
+    fix_parser.add_argument("files", nargs="+", help="firmware files (*.hex, *.hxf, *.bin) or directories (searched recursively)")
+    fix_parser.add_argument("--output-dir", metavar="DIRECTORY", help="directory for the corrected files (default: next to each original)")
+    fix_parser.add_argument("--suffix", default="_fixed", help="added to the file name of corrected files (default: _fixed)")
+    fix_parser.add_argument("--format", choices=["same", "hex", "bin"], default="same", help="file format of the corrected files (default: same as the original)")
+    fix_parser.add_argument("--in-place", action="store_true", help="allow a corrected file to replace its original (for example with --suffix \"\")")
+    fix_parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: cpu count)")
+    fix_parser.add_argument("--json", action="store_true", help="print one json object per line")
+    fix_parser.set_defaults(command_function=fix_command)
+    return parser
+
+# Main Function
+def main(argv=None):
+    arguments = get_argument_parser().parse_args(argv)
+    return arguments.command_function(arguments)
+
+
+# Code to Run if this File is run as the main application
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# page_status.py
+# - Bit set bookkeeping of flash page states for the memory maps, one bit per page in a python int:
+# -- modified: data has been written to the page since the memory map was initialized
+# -- erased: every byte of the page holds the erase value (0xFF)
+# - Whole-rom queries (erased pages, populated page ranges, first/last populated page) are integer bit operations,
+# -- and the erased state of a page is only recalculated by the memory map after the page has been written
+
+# PageStatus Class: page state bit sets for a rom of 'page_count' pages (bit n is page id n)
+class PageStatus():
+    def __init__(self, page_count, parent=None):
+        self.page_count = page_count
+        self.ALL_PAGES_MASK = (1 << self.page_count) - 1
+        self.init_page_status()
+
+    # init_page_status: state of a freshly initialized rom (not modified, every page erased)
+    def init_page_status(self):
+        self.modified_page_mask = 0
+        self.erased_page_mask = self.ALL_PAGES_MASK
+        self.unknown_page_mask = 0 # pages whose erased state has to be recalculated (see MemoryMap_STM32.update_erased_pages)
+
+    # ======= Updates =START=
+    # get_page_range_mask: bit mask for a range of pages (end_page is included, the range is clipped to the rom)
+    def get_page_range_mask(self, start_page, end_page):
+        start_page = max(start_page, 0)
+        end_page = min(end_page, self.page_count - 1)
+        if end_page < start_page:
+            return 0
+        return ((1 << (end_page - start_page + 1)) - 1) << start_page
+
+    # set_pages_modified: flag a range of pages as written (once per write span, end_page is included)
+    def set_pages_modified(self, start_page, end_page):
+        page_mask = self.get_page_range_mask(start_page, end_page)
+        self.modified_page_mask |= page_mask
+        self.unknown_page_mask |= page_mask
+
+    # set_pages_unknown: the contents of the pages changed without a write span (like a restored snapshot)
+    def set_pages_unknown(self, page_mask):
+        self.unknown_page_mask |= page_mask & self.ALL_PAGES_MASK
+
+    def set_page_erased(self, page_id, page_is_erased):
+        page_bit = 1 << page_id
+        self.unknown_page_mask &= ~page_bit
+        if page_is_erased:
+            self.erased_page_mask |= page_bit
+        else:
+            self.erased_page_mask &= ~page_bit
+    # ======= Updates ==END==
+
+    # ======= Queries =START=
+    def page_is_modified(self, page_id):
+        return bool(self.modified_page_mask >> page_id & 0x01)
+
+    # page_is_erased: erased state of a page (only valid when the page is not in unknown_page_mask)
+    def page_is_erased(self, page_id):
+        return bool(self.erased_page_mask >> page_id & 0x01)
+
+    def get_populated_page_mask(self):
+        return self.ALL_PAGES_MASK & ~self.erased_page_mask
+
+    # get_page_ids: list of the page ids in a mask (ascending)
+    def get_page_ids(self, page_mask):
+        page_ids = []
+        while page_mask:
+            lowest_page_bit = page_mask & -page_mask
+            page_ids.append(lowest_page_bit.bit_length() - 1)
+            page_mask ^= lowest_page_bit
+        return page_ids
+
+    # get_page_flags: one bool per page (the format of MemoryMap_STM32.get_modified_pages)
+    def get_page_flags(self, page_mask):
+        return [bool(page_mask >> this_page_id & 0x01) for this_page_id in range(self.page_count)]
+
+    # get_page_ranges: runs of neighbouring pages in a mask [(first page id, last page id), ...] (last page id is included)
+    def get_page_ranges(self, page_mask):
+        page_ranges = []
+        while page_mask:
+            first_page_id = (page_mask & -page_mask).bit_length() - 1
+            run_bits = page_mask >> first_page_id
+            run_length = (run_bits ^ (run_bits + 1)).bit_length() - 1 # number of trailing one bits
+            page_ranges.append((first_page_id, first_page_id + run_length - 1))
+            page_mask &= ~(((1 << run_length) - 1) << first_page_id)
+        return page_ranges
+
+    # get_first_page/ get_last_page: lowest/highest page id in a mask (None if the mask is empty)
+    def get_first_page(self, page_mask):
+        if not page_mask:
+            return None
+        return (page_mask & -page_mask).bit_length() - 1
+
+    def get_last_page(self, page_mask):
+        if not page_mask:
+            return None
+        return page_mask.bit_length() - 1
+    # ======= Queries ==END==
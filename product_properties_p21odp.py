@@ -1,6 +1,10 @@
 # product_properties_p21odp.py
+import os
+from memory_map_stm32 import STM32_DEVICES
 from memory_map_stm32_64kb import MemoryMap_STM32_64kB
-from hex_files import HexFileInClass, intel_hex_properties
+from hex_files import HexFileInClass, HexFileOutClass, intel_hex_properties
+from crc_stream_verifier import CrcStreamVerifier
+from crc_algorithms import get_crc_algorithm
 from type_conversions import type_converter
 
 # Product_P21Odp_MemoryMap Class: Stores Linker file properties of the P21Odp product
@@ -10,9 +14,10 @@ class Product_P21Odp_MemoryMap():
         self.assign_hex_file_in(hex_file_in)
         # CONSTANTS
         self.PROCESSOR_STRING = "STM32F301"
-        # - Processor Quantities
-        self.PROCESSOR_ROM_SIZE = 0x10000  
-        self.PROCESSOR_FLASH_PAGE_SIZE = 0x800
+        self.PROCESSOR_DEVICE_NAME = "STM32F301x8" # entry in STM32_DEVICES (memory_map_stm32.py)
+        # - Processor Quantities (from the device table, so they always match the memory map)
+        self.PROCESSOR_ROM_SIZE = STM32_DEVICES[self.PROCESSOR_DEVICE_NAME]["rom_size"]
+        self.PROCESSOR_FLASH_PAGE_SIZE = STM32_DEVICES[self.PROCESSOR_DEVICE_NAME]["page_size"]
         # - Processor Pages (Linking)
         self.FLASH_PAGE_BOOTLOADER_START = 0 
         self.FLASH_PAGE_BOOTLOADER_END = 3 # Exclusive 
@@ -48,6 +53,24 @@ class Product_P21Odp_MemoryMap():
         self.CHECKSUM_LENGTH_BYTES = 4
         self.CHECKSUM_CHUNK_SIZE_BYTES = 4
         self.calculated_checksum_list = [0]*self.CHECKSUM_LENGTH_BYTES
+        # - crc algorithm per region: name of an algorithm in crc_algorithms.py (like "CRC-32/ISO-HDLC" or "CRC-16/CCITT-FALSE"),
+        # -- or "" for the STM32 crc of the memory map (word mode, or byte mode if use_8bit_chunks_on_settings is set)
+        # -- the stored crc is read from the start of the crc slot, with the width of the algorithm
+        self.CRC_ALGORITHM_BOOTLOADER = ""
+        self.CRC_ALGORITHM_FIRMWARE = ""
+
+        # Import Progress Stages (passed to the progress callback, see assign_progress_callback)
+        self.IMPORT_STAGE_CACHE = "checking result cache"
+        self.IMPORT_STAGE_PARSE = "parsing file"
+        self.IMPORT_STAGE_BOOTLOADER_CRC = "calculating bootloader crc"
+        self.IMPORT_STAGE_FIRMWARE_CRC = "calculating firmware crc"
+        self.IMPORT_STAGE_EXPORT = "writing corrected file"
+        self.IMPORT_STAGE_COMPLETE = "import complete"
+
+        # Fix Checksum Status Codes (fix_firmware_file returns these, or an IMPORT_* code of HexFileInClass)
+        self.FIX_ERROR_FILE_WRITE = 0x10
+        self.FIX_ERROR_DATA_OUTSIDE_ROM = 0x11 # the file has data the memory map can't hold, a corrected file would lose it
+        self.FIX_ERROR_BOOTLOADER_IN_BIN = 0x12 # .bin output starts at DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE, the bootloader pages would be lost
 
         self.init_system()
 
@@ -56,6 +79,7 @@ class Product_P21Odp_MemoryMap():
         # VARIABLES
         # - crc storage
         self.init_crc_storage()
+        self.crc_results_before_fix = None
         self.bootloader_crc_stored_list = [0xFF, 0xFF, 0xFF, 0xFF] 
         self.bootloader_crc_calc_list = [0xFF, 0xFF, 0xFF, 0xFF] 
         self.firmware_crc_stored_list = [0xFF, 0xFF, 0xFF, 0xFF] 
@@ -65,35 +89,271 @@ class Product_P21Odp_MemoryMap():
 
     def assign_hex_file_in(self, hex_file_in):
         self.hex_file_in = hex_file_in
+        self.result_cache = None
+        self.progress_cb = None
+
+    # assign_result_cache: allows a parent to assign a CrcResultCache, so unchanged files don't need to be parsed again
+    def assign_result_cache(self, result_cache):
+        self.result_cache = result_cache
+
+    # assign_progress_callback: allows a parent to follow an import, callback(stage) is called with one of the IMPORT_STAGE_* strings
+    # - imports may run on a worker thread (see firmware_import_worker.py), the callback is called from that thread
+    def assign_progress_callback(self, callback):
+        self.progress_cb = callback
+
+    def report_progress(self, stage):
+        if self.progress_cb:
+            self.progress_cb(stage)
+
+    # request_import_cancel: stops a running import (safe to call from another thread), the import returns IMPORT_CANCELLED
+    def request_import_cancel(self):
+        self.hex_file_in.request_import_cancel()
+
+    # clear_import_cancel: forget an earlier cancel request, call when a new import job is set up (see FirmwareImportWorker)
+    def clear_import_cancel(self):
+        self.hex_file_in.clear_import_cancel()
+
+    # get_layout_fingerprint: string describing everything that the crc results depend on (besides file contents)
+    def get_layout_fingerprint(self):
+        memory_map = self.hex_file_in.memory_map_out
+        layout_values = [
+            self.PROCESSOR_STRING, self.PROCESSOR_ROM_SIZE, self.PROCESSOR_FLASH_PAGE_SIZE,
+            self.FLASH_PAGE_BOOTLOADER_START, self.FLASH_PAGE_BOOTLOADER_END, self.FLASH_PAGE_FIRMWARE_START, self.FLASH_PAGE_FIRMWARE_END,
+            self.BOOTLOADER_CRC_ADDRESS_BINFILE, self.CHECKSUM_CALC_END_ADDRESS_BINFILE, self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE,
+            memory_map.use_8bit_chunks_on_settings, self.CRC_ALGORITHM_BOOTLOADER, self.CRC_ALGORITHM_FIRMWARE,
+        ]
+        return ",".join(str(this_value) for this_value in layout_values)
 
     # ======= API Functions =START=
     # = API Functions are designed to be called outside of this class (typically by GUI or Serial Port Callbacks)
 
     # import_firmware_file: open a file from path and load it's contents in to the file_read memory object for this device
-    def import_firmware_file(self, firmware_file_path):
+    # - returns: import status code from HexFileInClass (IMPORT_SUCCESS if the file was read)
+    # - if a result cache is assigned, files that were imported before are not parsed again
+    # -- (the memory map is only restored if the cache entry holds a memory snapshot, otherwise it is left erased like after a streaming import)
+    # - use_result_cache: False to always parse the file (when the memory map must hold the file contents, see fix_firmware_file)
+    def import_firmware_file(self, firmware_file_path, use_result_cache=True):
         print("import firmware file to p21 odp emulator")
-        self.hex_file_in.import_firmware_file(firmware_file_path, binary_start_address=self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE)
+        cache_key = ""
+        if self.result_cache and use_result_cache:
+            self.report_progress(self.IMPORT_STAGE_CACHE)
+            cache_key = self.result_cache.get_key(firmware_file_path, self.get_layout_fingerprint())
+            if self.load_crc_data_from_result_cache(cache_key):
+                print("crc results loaded from cache")
+                self.report_progress(self.IMPORT_STAGE_COMPLETE)
+                return self.hex_file_in.IMPORT_SUCCESS
+        self.report_progress(self.IMPORT_STAGE_PARSE)
+        status_code = self.hex_file_in.import_firmware_file(firmware_file_path, binary_start_address=self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE)
+        if status_code == self.hex_file_in.IMPORT_CANCELLED:
+            return status_code
         self.update_all_crc_data()
+        if cache_key and status_code == self.hex_file_in.IMPORT_SUCCESS:
+            self.store_crc_data_in_result_cache(cache_key)
+        self.report_progress(self.IMPORT_STAGE_COMPLETE)
+        return status_code
+
+    # import_firmware_file_streaming: like import_firmware_file, but the crcs are calculated while the file is read
+    # - the memory map is not filled (it is left erased), use this when only the crc results are needed (pipeline checks)
+    # - files with records that are not in address order are imported again through the memory map (import_firmware_file)
+    def import_firmware_file_streaming(self, firmware_file_path):
+        print("stream firmware file crcs")
+        memory_map = self.hex_file_in.memory_map_out
+        if self.CRC_ALGORITHM_BOOTLOADER or self.CRC_ALGORITHM_FIRMWARE:
+            print("streaming only supports the STM32 crc, importing through the memory map")
+            return self.import_firmware_file(firmware_file_path)
+        cache_key = ""
+        if self.result_cache:
+            self.report_progress(self.IMPORT_STAGE_CACHE)
+            cache_key = self.result_cache.get_key(firmware_file_path, self.get_layout_fingerprint())
+            if self.load_crc_data_from_result_cache(cache_key):
+                print("crc results loaded from cache")
+                self.report_progress(self.IMPORT_STAGE_COMPLETE)
+                return self.hex_file_in.IMPORT_SUCCESS
+        self.report_progress(self.IMPORT_STAGE_PARSE)
+        crc_stream_verifier = CrcStreamVerifier(self.get_crc_regions(), processor_rom_size=memory_map.PROCESSOR_ROM_SIZE, use_8bit_chunks_on_settings=memory_map.use_8bit_chunks_on_settings)
+        self.hex_file_in.assign_memory_map_out(crc_stream_verifier)
+        try:
+            status_code = self.hex_file_in.import_firmware_file(firmware_file_path, binary_start_address=self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE)
+        finally:
+            self.hex_file_in.assign_memory_map_out(memory_map)
+        if status_code == self.hex_file_in.IMPORT_CANCELLED:
+            return status_code
+        crc_values = crc_stream_verifier.get_crc_values()
+        if crc_values is None:
+            print("records are not in address order, importing through the memory map")
+            return self.import_firmware_file(firmware_file_path)
+        memory_map.init_memory_map() # don't leave the contents of a previous file behind
+        (stored_bootloader_crc32_value, bootloader_crc32_value), (stored_firmware_crc32_value, firmware_crc32_value) = crc_values
+        self.set_all_crc_data(stored_bootloader_crc32_value, bootloader_crc32_value, stored_firmware_crc32_value, firmware_crc32_value)
+        if cache_key and status_code == self.hex_file_in.IMPORT_SUCCESS:
+            self.store_crc_data_in_result_cache(cache_key, include_memory_snapshot=False)
+        self.report_progress(self.IMPORT_STAGE_COMPLETE)
+        return status_code
+
+    # fix_firmware_file: import a file, write the calculated crcs in to the stored crc slots and save the corrected image
+    # - the output format follows the extension of output_file_path (.bin: raw image starting at DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE,
+    # -- anything else: intel hex of the populated pages at their ST addresses)
+    # - the file is always parsed (result cache entries may not hold the file contents)
+    # - files with bootloader data can't be fixed to .bin (the bootloader and its crc would be dropped), FIX_ERROR_BOOTLOADER_IN_BIN
+    # - returns: IMPORT_SUCCESS, an IMPORT_* error code of HexFileInClass, or FIX_ERROR_*
+    def fix_firmware_file(self, firmware_file_path, output_file_path):
+        status_code = self.import_firmware_file(firmware_file_path, use_result_cache=False)
+        if status_code != self.hex_file_in.IMPORT_SUCCESS:
+            return status_code
+        if self.hex_file_in.write_errors_detected():
+            return self.FIX_ERROR_DATA_OUTSIDE_ROM
+        if output_file_path[-4:].lower() == ".bin" and self.bootloader_pages_populated():
+            return self.FIX_ERROR_BOOTLOADER_IN_BIN
+        self.fix_all_crc_data()
+        self.report_progress(self.IMPORT_STAGE_EXPORT)
+        if self.export_firmware_file(output_file_path, firmware_file_path):
+            return self.FIX_ERROR_FILE_WRITE
+        self.report_progress(self.IMPORT_STAGE_COMPLETE)
+        return self.hex_file_in.IMPORT_SUCCESS
+
+    # bootloader_pages_populated: True if the memory map has data below DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE (not part of .bin files)
+    def bootloader_pages_populated(self):
+        memory_map = self.hex_file_in.memory_map_out
+        first_populated_page = memory_map.get_first_populated_page()
+        return first_populated_page is not None and memory_map.get_offset_address_from_page_id(first_populated_page) < self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE
+
+    # export_firmware_file: save the memory map as a hex or bin file (format from the extension of output_file_path)
+    # - source_file_path: bin files keep at least the length of a source bin file (trailing erased bytes are not dropped)
+    # - returns: 0 on success, error code of HexFileOutClass otherwise
+    def export_firmware_file(self, output_file_path, source_file_path=""):
+        memory_map = self.hex_file_in.memory_map_out
+        hex_file_out = HexFileOutClass()
+        if output_file_path[-4:].lower() == ".bin":
+            start_address = self.DEFAULT_MEMORY_OFFSET_FIRMWARE_BINFILE
+            last_populated_page = memory_map.get_last_populated_page()
+            end_address = start_address
+            if last_populated_page is not None:
+                end_address = memory_map.get_offset_address_from_page_id(last_populated_page + 1)
+            if source_file_path[-4:].lower() == ".bin" and os.path.isfile(source_file_path):
+                end_address = max(start_address + os.path.getsize(source_file_path), self.CHECKSUM_CALC_END_ADDRESS_BINFILE + self.CHECKSUM_LENGTH_BYTES)
+            end_address = max(min(end_address, memory_map.ROM_END_ADDRESS), start_address)
+            return hex_file_out.write_binary_data_to_file(output_file_path, memory_map, start_address, end_address)
+        return hex_file_out.write_data_pages_to_file(output_file_path, memory_map, 0, memory_map.ROM_PAGES - 1, export_mode=hex_file_out.EXPORT_MODE_SKIP_EMPTY_PAGES)
+
+    # get_crc_regions: (calc start address, calc end address (exclusive), stored crc address) of the bootloader and firmware crcs
+    # - same ranges as update_all_crc_data (the stored crc is the last word of the last page of each region)
+    def get_crc_regions(self):
+        page_size = self.PROCESSOR_FLASH_PAGE_SIZE
+        return [
+            (self.FLASH_PAGE_BOOTLOADER_START*page_size, self.FLASH_PAGE_BOOTLOADER_END*page_size - self.CHECKSUM_LENGTH_BYTES, self.BOOTLOADER_CRC_ADDRESS_BINFILE),
+            (self.FLASH_PAGE_FIRMWARE_START*page_size, self.FLASH_PAGE_FIRMWARE_END*page_size - self.CHECKSUM_LENGTH_BYTES, self.CHECKSUM_CALC_END_ADDRESS_BINFILE),
+        ]
+
+    # get_crc_results: returns the crcs from the last update_all_crc_data call as a dictionary (for reports and scripts)
+    def get_crc_results(self):
+        return {
+            "bootloader_crc_stored": self.stored_bootloader_crc32_value_str,
+            "bootloader_crc_calc": self.bootloader_crc32_value_str,
+            "bootloader_crc_match": self.stored_bootloader_crc32_value == self.bootloader_crc32_value,
+            "firmware_crc_stored": self.stored_firmware_crc32_value_str,
+            "firmware_crc_calc": self.firmware_crc32_value_str,
+            "firmware_crc_match": self.stored_firmware_crc32_value == self.firmware_crc32_value,
+        }
     # ======= API Functions ==END=
 
+    # ======= Result Cache =START=
+    # load_crc_data_from_result_cache: restore crc values (and the memory map, if a snapshot was stored) from a cache entry
+    # - entries without a snapshot (streaming imports, caches created with store_memory_snapshots=False) erase the memory map,
+    # -- so the contents of a previous file are not left behind next to the restored crc values
+    # - returns: True on a cache hit
+    def load_crc_data_from_result_cache(self, cache_key):
+        cached_result, memory_snapshot = self.result_cache.load(cache_key)
+        if cached_result is None:
+            return False
+        memory_map = self.hex_file_in.memory_map_out
+        if memory_snapshot is not None and len(memory_snapshot) == memory_map.PROCESSOR_ROM_SIZE:
+            memory_map.restore_memory_map(memory_snapshot, cached_result["modified_pages"])
+        else:
+            memory_map.init_memory_map()
+        self.hex_file_in.write_failure_address_min = cached_result["write_failure_address_min"]
+        self.hex_file_in.write_failure_address_max = cached_result["write_failure_address_max"]
+        self.set_all_crc_data(cached_result["stored_bootloader_crc32_value"], cached_result["bootloader_crc32_value"], cached_result["stored_firmware_crc32_value"], cached_result["firmware_crc32_value"])
+        return True
+
+    # store_crc_data_in_result_cache: save the current crc values (and a snapshot of the memory map) in the result cache
+    # - include_memory_snapshot: False if the memory map does not hold the file contents (streaming import)
+    def store_crc_data_in_result_cache(self, cache_key, include_memory_snapshot=True):
+        memory_map = self.hex_file_in.memory_map_out
+        cached_result = {
+            "stored_bootloader_crc32_value": self.stored_bootloader_crc32_value,
+            "bootloader_crc32_value": self.bootloader_crc32_value,
+            "stored_firmware_crc32_value": self.stored_firmware_crc32_value,
+            "firmware_crc32_value": self.firmware_crc32_value,
+            "write_failure_address_min": self.hex_file_in.write_failure_address_min,
+            "write_failure_address_max": self.hex_file_in.write_failure_address_max,
+            "modified_pages": [this_page_id for this_page_id in range(memory_map.ROM_PAGES) if memory_map.page_is_modified(this_page_id)],
+        }
+        memory_snapshot = memory_map.get_memoryview_for_address_range(memory_map.BASE_ROM_ADDRESS, memory_map.ROM_END_ADDRESS) if include_memory_snapshot else None
+        self.result_cache.store(cache_key, cached_result, memory_snapshot)
+    # ======= Result Cache ==END=
+
 
     # ======= CRC Data =START=
+    # get_region_crc_algorithm: CrcAlgorithm for one of the CRC_ALGORITHM_* names (None for the STM32 crc of the memory map)
+    def get_region_crc_algorithm(self, crc_algorithm_name):
+        if not crc_algorithm_name:
+            return None
+        crc_algorithm = get_crc_algorithm(crc_algorithm_name)
+        if crc_algorithm is None:
+            print("unknown crc algorithm: " + str(crc_algorithm_name) + " (using the STM32 crc)")
+        return crc_algorithm
+
+    # get_stored_crc_length_bytes: number of bytes of the crc slot that hold the stored crc
+    def get_stored_crc_length_bytes(self, crc_algorithm):
+        if crc_algorithm is None:
+            return self.CHECKSUM_LENGTH_BYTES
+        return crc_algorithm.WIDTH_IN_BYTES
+
     def update_all_crc_data(self):
+        bootloader_crc_algorithm = self.get_region_crc_algorithm(self.CRC_ALGORITHM_BOOTLOADER)
+        firmware_crc_algorithm = self.get_region_crc_algorithm(self.CRC_ALGORITHM_FIRMWARE)
         print("updating stored bootloader crc")
-        stored_bootloader_crc32_list = self.hex_file_in.memory_map_out.memory_map[self.BOOTLOADER_CRC_ADDRESS_BINFILE: self.BOOTLOADER_CRC_ADDRESS_BINFILE + self.CHECKSUM_LENGTH_BYTES]
+        stored_bootloader_crc32_list = self.hex_file_in.memory_map_out.get_memoryview_for_address_range(self.BOOTLOADER_CRC_ADDRESS_BINFILE, self.BOOTLOADER_CRC_ADDRESS_BINFILE + self.get_stored_crc_length_bytes(bootloader_crc_algorithm))
         self.stored_bootloader_crc32_value = type_converter.get_u32_value_from_u8_list(stored_bootloader_crc32_list)
         self.stored_bootloader_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.stored_bootloader_crc32_value)
         print("updating calculated bootloader crc")
-        self.bootloader_crc32_value = self.hex_file_in.memory_map_out.get_crc_u32_from_page_list(list(range(self.FLASH_PAGE_BOOTLOADER_START,self.FLASH_PAGE_BOOTLOADER_END)), ignore_last_four_bytes=True)
+        self.report_progress(self.IMPORT_STAGE_BOOTLOADER_CRC)
+        self.bootloader_crc32_value = self.hex_file_in.memory_map_out.get_crc_u32_from_page_list(list(range(self.FLASH_PAGE_BOOTLOADER_START,self.FLASH_PAGE_BOOTLOADER_END)), ignore_last_four_bytes=True, crc_algorithm=bootloader_crc_algorithm)
         self.bootloader_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.bootloader_crc32_value)
         print("updating stored firmware crc")
-        stored_firmware_crc32_list = self.hex_file_in.memory_map_out.memory_map[self.CHECKSUM_CALC_END_ADDRESS_BINFILE: self.CHECKSUM_CALC_END_ADDRESS_BINFILE + self.CHECKSUM_LENGTH_BYTES]
+        stored_firmware_crc32_list = self.hex_file_in.memory_map_out.get_memoryview_for_address_range(self.CHECKSUM_CALC_END_ADDRESS_BINFILE, self.CHECKSUM_CALC_END_ADDRESS_BINFILE + self.get_stored_crc_length_bytes(firmware_crc_algorithm))
         self.stored_firmware_crc32_value = type_converter.get_u32_value_from_u8_list(stored_firmware_crc32_list)
         self.stored_firmware_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.stored_firmware_crc32_value)
         print("updating calculated firmware crc")
-        self.firmware_crc32_value = self.hex_file_in.memory_map_out.get_crc_u32_from_page_list(list(range(self.FLASH_PAGE_FIRMWARE_START,self.FLASH_PAGE_FIRMWARE_END)), ignore_last_four_bytes=True)
+        self.report_progress(self.IMPORT_STAGE_FIRMWARE_CRC)
+        self.firmware_crc32_value = self.hex_file_in.memory_map_out.get_crc_u32_from_page_list(list(range(self.FLASH_PAGE_FIRMWARE_START,self.FLASH_PAGE_FIRMWARE_END)), ignore_last_four_bytes=True, crc_algorithm=firmware_crc_algorithm)
+        self.firmware_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.firmware_crc32_value)
+
+    # set_all_crc_data: set stored/calculated crc values (and their display strings) without reading the memory map
+    def set_all_crc_data(self, stored_bootloader_crc32_value, bootloader_crc32_value, stored_firmware_crc32_value, firmware_crc32_value):
+        self.stored_bootloader_crc32_value = stored_bootloader_crc32_value
+        self.stored_bootloader_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.stored_bootloader_crc32_value)
+        self.bootloader_crc32_value = bootloader_crc32_value
+        self.bootloader_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.bootloader_crc32_value)
+        self.stored_firmware_crc32_value = stored_firmware_crc32_value
+        self.stored_firmware_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.stored_firmware_crc32_value)
+        self.firmware_crc32_value = firmware_crc32_value
         self.firmware_crc32_value_str = type_converter.convert_u32_crc_value_to_hex_string(self.firmware_crc32_value)
 
+    # fix_all_crc_data: write the calculated crcs in to the stored crc slots of the memory map (little-endian, like update_all_crc_data reads them)
+    # - a region without any data (like the bootloader pages of a firmware-only file) is left erased
+    # - the crc slots are not part of their own calculation, so the calculated crcs don't change
+    # - the results from before the fix are kept in crc_results_before_fix (for reports)
+    def fix_all_crc_data(self):
+        memory_map = self.hex_file_in.memory_map_out
+        self.update_all_crc_data()
+        self.crc_results_before_fix = self.get_crc_results()
+        if memory_map.get_populated_page_ranges(self.FLASH_PAGE_BOOTLOADER_START, self.FLASH_PAGE_BOOTLOADER_END - 1):
+            memory_map.write_data_to_rom(self.BOOTLOADER_CRC_ADDRESS_BINFILE, self.bootloader_crc32_value.to_bytes(self.get_stored_crc_length_bytes(self.get_region_crc_algorithm(self.CRC_ALGORITHM_BOOTLOADER)), "little"))
+        if memory_map.get_populated_page_ranges(self.FLASH_PAGE_FIRMWARE_START, self.FLASH_PAGE_FIRMWARE_END - 1):
+            memory_map.write_data_to_rom(self.CHECKSUM_CALC_END_ADDRESS_BINFILE, self.firmware_crc32_value.to_bytes(self.get_stored_crc_length_bytes(self.get_region_crc_algorithm(self.CRC_ALGORITHM_FIRMWARE)), "little"))
+        self.update_all_crc_data()
+
     def get_stored_bootloader_crc_u32(self):
         return 0
 
@@ -130,6 +390,15 @@ class Product_P21Odp_MemoryMap():
     # ======= CRC Data ==END==
 
 
+# create_product_p21odp: builds a product object with its own memory map and hex file reader
+# - used by scripts that need an import pipeline that is independent of the module instances below
+# - memory_map: MemoryMap_STM32_64kB by default, any object with the same interface can be used (like MemoryMap_STM32_Sparse)
+def create_product_p21odp(memory_map=None):
+    if memory_map is None:
+        memory_map = MemoryMap_STM32_64kB()
+    return Product_P21Odp_MemoryMap(hex_file_in=HexFileInClass(memory_map_out=memory_map))
+
+
 # Virtual Memory Instances
 drive_fw_memory_map_file = MemoryMap_STM32_64kB() # for holding a firmware file to flash to a device
 hex_file_in = HexFileInClass(memory_map_out=drive_fw_memory_map_file)
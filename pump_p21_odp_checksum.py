@@ -35,7 +35,8 @@ from init_file import init_settings
 from serial_monitor_gui import SerialMonitorWindow
 
 # Local Backend Imports
-from find_files import get_init_file_directory, get_icon_path, get_splash_image_path
+from find_files import get_init_file_directory, get_icon_path, get_splash_image_path, get_cache_directory
+from crc_result_cache import CrcResultCache
 # from hex_files import hex_file_in 
 from product_properties_p21odp import product_p21odp
 # from style_sheets import app_config.app_style
@@ -119,6 +120,8 @@ class MainAppWidget(QtWidgets.QMainWindow): # Declare a class that we've named '
         # self.win_port_select.start_system() # Port Selection Display
         # - local timer instances
         self.start_timers()
+        # - crc result cache (files that were already imported are not parsed again)
+        product_p21odp.assign_result_cache(CrcResultCache(get_cache_directory()))
 
         # Restore Settings from file
         self.init_dir = get_init_file_directory()
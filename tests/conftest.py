@@ -0,0 +1,51 @@
+# conftest.py
+# - The modules of this project are flat files in the repository root (no package), make them importable from the tests
+# - Shared fixtures: factories for the firmware files used by the tests
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# get_intel_hex_record: one intel hex record line (with checksum), also available as the get_hex_record fixture
+def get_intel_hex_record(record_type, address_16, data):
+    record = bytes((len(data), address_16 >> 8 & 0xFF, address_16 & 0xFF, record_type)) + bytes(data)
+    return ":" + (record + bytes(((-sum(record)) & 0xFF,))).hex().upper()
+
+@pytest.fixture
+def get_hex_record():
+    return get_intel_hex_record
+
+# write_hex_file: intel hex file with 16 byte data records from start_address (offset addressing, no extended address records)
+@pytest.fixture
+def write_hex_file():
+    def write_hex_file_function(file_path, data, start_address=0x0000):
+        assert start_address + len(data) <= 0x10000 # 16-bit record addresses only
+        lines = []
+        for this_index in range(0, len(data), 0x10):
+            lines.append(get_intel_hex_record(0x00, start_address + this_index, data[this_index:this_index + 0x10]))
+        lines.append(get_intel_hex_record(0x01, 0, []))
+        with open(file_path, "w") as file_target:
+            file_target.write("\n".join(lines) + "\n")
+    return write_hex_file_function
+
+# get_random_data: repeatable random bytes
+@pytest.fixture
+def get_random_data():
+    def get_random_data_function(length, seed):
+        random_generator = random.Random(seed)
+        return bytes(random_generator.getrandbits(8) for this_index in range(length))
+    return get_random_data_function
+
+# write_random_binary_file: firmware sized binary file (rom offset 0x1800 up to the end of the firmware crc slot)
+@pytest.fixture
+def write_random_binary_file(get_random_data):
+    def write_random_binary_file_function(file_path, seed):
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as file_target:
+            file_target.write(get_random_data(0x8000, seed))
+    return write_random_binary_file_function
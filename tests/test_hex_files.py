@@ -0,0 +1,57 @@
+# test_hex_files.py
+# - Hex file import tests
+from hex_files import HexFileInClass
+from memory_map_sparse import MemoryMap_STM32_Sparse
+from memory_map_stm32_64kb import MemoryMap_STM32_64kB
+
+
+def test_cancel_before_import_stops_the_import_before_parsing(tmp_path, write_hex_file):
+    file_path = str(tmp_path / "firmware.hex")
+    write_hex_file(file_path, bytes(range(0x100))*0x10)
+    memory_map = MemoryMap_STM32_64kB()
+    hex_file_in = HexFileInClass(memory_map_out=memory_map)
+
+    hex_file_in.request_import_cancel()
+    assert hex_file_in.import_firmware_file(file_path) == hex_file_in.IMPORT_CANCELLED
+    assert memory_map.get_last_populated_page() is None
+
+    # - the cancel is kept until the next job is set up
+    assert hex_file_in.import_firmware_file(file_path) == hex_file_in.IMPORT_CANCELLED
+    hex_file_in.clear_import_cancel()
+    assert hex_file_in.import_firmware_file(file_path) == hex_file_in.IMPORT_SUCCESS
+    assert bytes(memory_map.get_memoryview_for_address_range(0, 0x1000)) == bytes(range(0x100))*0x10
+
+
+def test_ram_records_are_kept_by_the_sparse_memory_map_and_fail_on_the_dense_memory_map(tmp_path, get_hex_record):
+    file_path = str(tmp_path / "firmware.hex")
+    lines = [
+        get_hex_record(0x04, 0, [0x08, 0x00]), get_hex_record(0x00, 0x0010, [1, 2, 3, 4]), # flash (ST addressing)
+        get_hex_record(0x04, 0, [0x20, 0x00]), get_hex_record(0x00, 0x0000, [5, 6, 7, 8]), # ram
+        get_hex_record(0x04, 0, [0x00, 0x00]), get_hex_record(0x00, 0x0020, [9, 9]), # flash (offset addressing)
+        get_hex_record(0x01, 0, []),
+    ]
+    with open(file_path, "w") as file_target:
+        file_target.write("\n".join(lines) + "\n")
+
+    for memory_map in (MemoryMap_STM32_64kB(), MemoryMap_STM32_Sparse()):
+        hex_file_in = HexFileInClass(memory_map_out=memory_map)
+        assert hex_file_in.import_firmware_file(file_path) == hex_file_in.IMPORT_SUCCESS
+        assert bytes(memory_map.get_memoryview_for_address_range(0x10, 0x22)) == bytes([1, 2, 3, 4]) + b"\xff"*12 + bytes([9, 9])
+        assert memory_map.get_last_populated_page() == 0
+        if memory_map.SUPPORTS_ABSOLUTE_ADDRESSES:
+            assert not hex_file_in.write_errors_detected()
+            assert [(span_start_address, bytes(span_data)) for span_start_address, span_data in memory_map.get_populated_spans(0x20000000, 0x20000004)] == [(0x20000000, bytes([5, 6, 7, 8]))]
+        else:
+            assert (hex_file_in.write_failure_address_min, hex_file_in.write_failure_address_max) == (0x20000000, 0x20000003)
+
+
+def test_lines_with_a_wrong_byte_count_are_skipped_by_both_line_decoders(get_hex_record):
+    hex_file_in = HexFileInClass(memory_map_out=MemoryMap_STM32_64kB())
+    valid_line = get_hex_record(0x00, 0x0010, [1, 2, 3, 4])
+    truncated_line = ":04001000010203E6" # byte count 4, 3 data bytes (checksum of the truncated record is valid)
+    padded_line = ":04001000010203040500DD" # byte count 4, 5 data bytes (checksum valid)
+    for decode_hex_file_line in (hex_file_in.decode_hex_file_line, hex_file_in.decode_hex_file_line_legacy):
+        record_type, address_16, line_data = decode_hex_file_line(valid_line)
+        assert (record_type, address_16, list(line_data)) == (0x00, 0x0010, [1, 2, 3, 4])
+        assert decode_hex_file_line(truncated_line) is None
+        assert decode_hex_file_line(padded_line) is None
@@ -0,0 +1,38 @@
+# test_memory_map_sparse.py
+# - Sparse memory map tests (results must match MemoryMap_STM32 for the same contents)
+import random
+
+import pytest
+
+from memory_map_sparse import MemoryMap_STM32_Sparse
+from memory_map_stm32 import MemoryMap_STM32
+
+
+# get_memory_maps: dense and sparse memory map with the same (partly written) contents
+def get_memory_maps(use_8bit_chunks_on_settings):
+    random_generator = random.Random(0)
+    memory_maps = (MemoryMap_STM32(use_8bit_chunks_on_settings=use_8bit_chunks_on_settings), MemoryMap_STM32_Sparse(use_8bit_chunks_on_settings=use_8bit_chunks_on_settings))
+    for this_start_address in (0x0000, 0x1802, 0x7FF0, 0xFFF0):
+        data = bytes(random_generator.getrandbits(8) for this_index in range(0x10))
+        for this_memory_map in memory_maps:
+            this_memory_map.write_data_to_rom(this_start_address, data)
+    return memory_maps
+
+
+@pytest.mark.parametrize("use_8bit_chunks_on_settings", [False, True])
+def test_invalid_ranges_give_the_same_results_as_the_dense_memory_map(use_8bit_chunks_on_settings):
+    memory_map, sparse_memory_map = get_memory_maps(use_8bit_chunks_on_settings)
+    rom_end_address = memory_map.ROM_END_ADDRESS
+    address_ranges = [
+        (-4, 0x100), (0x100, rom_end_address + 4), (rom_end_address, rom_end_address + 0x100), (0x200, 0x100), (0x100, 0x100),
+        (0x1, rom_end_address), (0x0, rom_end_address), (0x1800, 0x1811),
+    ]
+    for start_address, end_address in address_ranges:
+        assert sparse_memory_map.get_crc32_for_address_range(start_address, end_address) == memory_map.get_crc32_for_address_range(start_address, end_address)
+        assert bytes(sparse_memory_map.get_memoryview_for_address_range(start_address, end_address)) == bytes(memory_map.get_memoryview_for_address_range(start_address, end_address))
+    for this_address in (rom_end_address - 2, rom_end_address):
+        assert sparse_memory_map.get_u32_value_at_address(this_address) == memory_map.get_u32_value_at_address(this_address)
+    with pytest.raises(IndexError):
+        sparse_memory_map.get_u8_value_at_address(rom_end_address)
+    with pytest.raises(IndexError):
+        memory_map.get_u8_value_at_address(rom_end_address)
@@ -0,0 +1,62 @@
+# test_memory_map_stm32.py
+# - CRC engine regression tests: every engine (table/slice-by-8, numpy, zlib, native - when available) and the page cache
+# -- must match the original nibble routine (update_crc32_from_data_at_address) bit for bit, and crc forcing must hit its target
+import random
+
+import pytest
+
+from memory_map_stm32 import MemoryMap_STM32
+
+
+# get_random_memory_map: memory map with random data on a random half of the pages (the other pages stay erased)
+def get_random_memory_map(seed, use_8bit_chunks_on_settings):
+    random_generator = random.Random(seed)
+    memory_map = MemoryMap_STM32(use_8bit_chunks_on_settings=use_8bit_chunks_on_settings)
+    for this_page_id in range(memory_map.ROM_PAGES):
+        if random_generator.random() < 0.5:
+            page_data = bytes(random_generator.getrandbits(8) for this_index in range(memory_map.ROM_PAGE_SIZE))
+            memory_map.write_data_to_rom(memory_map.get_offset_address_from_page_id(this_page_id), page_data)
+    return memory_map, random_generator
+
+# get_random_address_range: word aligned start, up to a few pages long (unaligned ends are only valid in 8-bit mode)
+# - short ranges keep the nibble reference (slow in 8-bit mode) quick, the whole rom is checked once per mode
+def get_random_address_range(memory_map, random_generator):
+    start_address = random_generator.randrange(0, memory_map.PROCESSOR_ROM_SIZE // 2) & ~0x03
+    end_address = start_address + 4 + (random_generator.randrange(0, 4*memory_map.ROM_PAGE_SIZE) & ~0x03)
+    if memory_map.use_8bit_chunks_on_settings:
+        end_address += random_generator.randrange(4)
+    return start_address, end_address
+
+
+@pytest.mark.parametrize("use_8bit_chunks_on_settings", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_crc_engines_match_the_nibble_routine(seed, use_8bit_chunks_on_settings):
+    memory_map, random_generator = get_random_memory_map(seed, use_8bit_chunks_on_settings)
+    address_ranges = [get_random_address_range(memory_map, random_generator) for this_range in range(4)]
+    for use_crc_page_cache in (False, True):
+        memory_map.use_crc_page_cache = use_crc_page_cache
+        # - whole rom once (with the page cache, which combines per page crcs)
+        if seed == 0 and use_crc_page_cache:
+            address_ranges.append((0, memory_map.ROM_END_ADDRESS - 4))
+        for start_address, end_address in address_ranges:
+            assert memory_map.verify_crc_engines_for_address_range(start_address, end_address), (hex(start_address), hex(end_address), use_crc_page_cache)
+
+
+@pytest.mark.parametrize("use_8bit_chunks_on_settings", [False, True])
+def test_crc_patch_gives_the_target_crc(use_8bit_chunks_on_settings):
+    memory_map, random_generator = get_random_memory_map(3, use_8bit_chunks_on_settings)
+    for this_case in range(12):
+        start_address, end_address = get_random_address_range(memory_map, random_generator)
+        patch_address = start_address + (random_generator.randrange(0, end_address - start_address - 3) & ~0x03)
+        target_crc32_value = random_generator.getrandbits(32)
+        assert memory_map.write_crc32_patch_for_address_range(start_address, end_address, patch_address, target_crc32_value) == memory_map.SUCCESS_CODE
+        assert memory_map.get_crc32_for_address_range(start_address, end_address) == target_crc32_value
+        # - the nibble routine (reference) agrees with the patched image
+        assert memory_map.verify_crc_engines_for_address_range(start_address, end_address)
+
+
+def test_crc_patch_rejects_unusable_patch_addresses():
+    memory_map, random_generator = get_random_memory_map(4, use_8bit_chunks_on_settings=False)
+    assert memory_map.get_crc32_patch_for_address_range(0x100, 0x200, 0x102, 0x12345678) is None # not word aligned
+    assert memory_map.get_crc32_patch_for_address_range(0x100, 0x200, 0x200, 0x12345678) is None # outside of the range
+    assert memory_map.write_crc32_patch_for_address_range(0x100, 0x200, 0x0FC, 0x12345678) == memory_map.ERROR_CODE_CRC_PATCH_ADDRESS
@@ -0,0 +1,63 @@
+# test_p21_checksum.py
+# - Command line tool (p21_checksum.py) tests
+import os
+
+import p21_checksum
+
+
+def test_fix_mirrors_sub_directories_for_files_with_the_same_name(tmp_path, write_random_binary_file):
+    search_directory = str(tmp_path / "tree")
+    output_directory = str(tmp_path / "out")
+    write_random_binary_file(os.path.join(search_directory, "a", "fw.bin"), seed=1)
+    write_random_binary_file(os.path.join(search_directory, "b", "fw.bin"), seed=2)
+
+    exit_code = p21_checksum.main(["fix", search_directory, "--output-dir", output_directory, "--jobs", "1"])
+
+    assert exit_code == p21_checksum.EXIT_CODE_PASS
+    output_path_a = os.path.join(output_directory, "a", "fw_fixed.bin")
+    output_path_b = os.path.join(output_directory, "b", "fw_fixed.bin")
+    assert os.path.isfile(output_path_a) and os.path.isfile(output_path_b)
+    with open(output_path_a, "rb") as file_a, open(output_path_b, "rb") as file_b:
+        assert file_a.read() != file_b.read()
+    assert not os.path.exists(os.path.join(output_directory, "fw_fixed.bin"))
+
+
+def test_fix_refuses_files_that_would_share_an_output_path(tmp_path, write_random_binary_file):
+    file_path_a = str(tmp_path / "a" / "fw.bin")
+    file_path_b = str(tmp_path / "b" / "fw.bin")
+    output_directory = str(tmp_path / "out")
+    write_random_binary_file(file_path_a, seed=1)
+    write_random_binary_file(file_path_b, seed=2)
+
+    exit_code = p21_checksum.main(["fix", file_path_a, file_path_b, "--output-dir", output_directory, "--jobs", "1"])
+
+    assert exit_code == p21_checksum.EXIT_CODE_FILE_ERROR
+    assert not os.path.exists(output_directory)
+
+
+def test_fix_refuses_to_overwrite_the_original_without_in_place(tmp_path, write_random_binary_file):
+    file_path = str(tmp_path / "fw.bin")
+    write_random_binary_file(file_path, seed=1)
+    with open(file_path, "rb") as file_target:
+        original_data = file_target.read()
+
+    assert p21_checksum.main(["fix", file_path, "--suffix", "", "--jobs", "1"]) == p21_checksum.EXIT_CODE_FILE_ERROR
+    with open(file_path, "rb") as file_target:
+        assert file_target.read() == original_data
+
+    assert p21_checksum.main(["fix", file_path, "--suffix", "", "--in-place", "--jobs", "1"]) == p21_checksum.EXIT_CODE_PASS
+    with open(file_path, "rb") as file_target:
+        assert file_target.read() != original_data
+
+
+def test_fix_refuses_bin_output_for_files_with_a_bootloader(tmp_path, write_hex_file, get_random_data):
+    file_path = str(tmp_path / "full_image.hex")
+    write_hex_file(file_path, get_random_data(0x9800, seed=3)) # bootloader (0x0000-0x17FF) and firmware (0x1800-0x97FF)
+    output_directory = str(tmp_path / "out")
+
+    assert p21_checksum.main(["fix", file_path, "--format", "bin", "--output-dir", output_directory, "--jobs", "1"]) == p21_checksum.EXIT_CODE_FILE_ERROR
+    assert not os.path.exists(os.path.join(output_directory, "full_image_fixed.bin"))
+
+    # - hex output keeps the bootloader, both crcs pass afterwards
+    assert p21_checksum.main(["fix", file_path, "--output-dir", output_directory, "--jobs", "1"]) == p21_checksum.EXIT_CODE_PASS
+    assert p21_checksum.main(["verify", os.path.join(output_directory, "full_image_fixed.hex")]) == p21_checksum.EXIT_CODE_PASS
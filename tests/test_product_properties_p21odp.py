@@ -0,0 +1,28 @@
+# test_product_properties_p21odp.py
+# - Product (import, result cache) tests
+from crc_result_cache import CrcResultCache
+from product_properties_p21odp import create_product_p21odp
+
+
+def test_cache_hit_without_snapshot_erases_the_memory_map(tmp_path, write_random_binary_file):
+    streamed_file_path = str(tmp_path / "streamed.bin")
+    other_file_path = str(tmp_path / "other.bin")
+    write_random_binary_file(streamed_file_path, seed=1)
+    write_random_binary_file(other_file_path, seed=2)
+    product = create_product_p21odp()
+    product.assign_result_cache(CrcResultCache(str(tmp_path / "cache")))
+    memory_map = product.hex_file_in.memory_map_out
+
+    # - streaming import stores a cache entry without a memory snapshot
+    assert product.import_firmware_file_streaming(streamed_file_path) == product.hex_file_in.IMPORT_SUCCESS
+    streamed_crc_results = product.get_crc_results()
+    # - fill the memory map with another file
+    assert product.import_firmware_file(other_file_path) == product.hex_file_in.IMPORT_SUCCESS
+    assert memory_map.get_last_populated_page() is not None
+    # - regular import of the streamed file is a cache hit without a snapshot
+    assert product.import_firmware_file(streamed_file_path) == product.hex_file_in.IMPORT_SUCCESS
+
+    assert product.get_crc_results() == streamed_crc_results
+    assert memory_map.get_last_populated_page() is None
+    assert not any(memory_map.page_is_modified(this_page_id) for this_page_id in range(memory_map.ROM_PAGES))
+    assert bytes(memory_map.get_memoryview_for_address_range(memory_map.BASE_ROM_ADDRESS, memory_map.ROM_END_ADDRESS)) == b"\xff"*memory_map.PROCESSOR_ROM_SIZE
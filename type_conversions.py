@@ -6,7 +6,6 @@
 # - supports binary values, hex values, and decimal values
 
 import math
-from numpy import number
 import struct # For float to memory representation conversions
 
 